@@ -5,6 +5,7 @@ from fastapi.staticfiles import StaticFiles
 from src.core.config import settings
 from src.core.logger import logger
 from src.core.redis import get_redis, close_redis
+from src.core.http import close_http_clients
 from src.core.database import init_db
 from src.core.scheduler import setup_scheduler, scheduler
 
@@ -31,6 +32,9 @@ async def lifespan(app: FastAPI):
     from src.bot.middlewares.logging import LoggingMiddleware
     from src.bot.middlewares.watchdog import WatchdogMiddleware
     from src.core.services.watchdog import watchdog_loop
+    from src.core.services.cargo_events import cargo_events_loop
+    from src.core.services.price_book import price_book_listener
+    from src.core.services.legal_precheck import legal_precheck
 
     logger.info("Starting bot...")
     
@@ -42,15 +46,48 @@ async def lifespan(app: FastAPI):
         from src.core.market_data import seed_market_prices
         from src.core.scheduler import archive_old_cargos_job
         async with async_session() as session:
-            await seed_market_prices(session)
-        logger.info("Market prices seeded")
+            changed = await seed_market_prices(session)
+        logger.info("Market prices seeded: %s changed", changed)
     except Exception as e:
         logger.warning("Market prices seed failed: %s", e)
 
+    try:
+        from src.core.database import async_session
+        from src.core.cities import seed_cities, backfill_city_ids
+        async with async_session() as session:
+            cities_changed = await seed_cities(session)
+            if cities_changed:
+                await backfill_city_ids(session)
+        logger.info("Cities seeded: %s new or changed", cities_changed)
+    except Exception as e:
+        logger.warning("Cities seed failed: %s", e)
+
+    try:
+        from src.core.services.price_book import reload_price_book
+        await reload_price_book()
+    except Exception as e:
+        logger.warning("Price book load failed: %s", e)
+
+    try:
+        from src.core.database import async_session
+        from src.core.services.route_index import route_index
+        async with async_session() as session:
+            await route_index.load(session)
+    except Exception as e:
+        logger.warning("Route index load failed: %s", e)
+
     try:
         await archive_old_cargos_job()
     except Exception as e:
         logger.warning("Archive old cargos failed: %s", e)
+
+    try:
+        from src.core.services.route_stats import refresh_route_stats, route_stats
+        await refresh_route_stats(rebuild=False)
+        if not len(route_stats):
+            await refresh_route_stats()
+    except Exception as e:
+        logger.warning("Route stats load failed: %s", e)
     
     redis = await get_redis()
     await redis.ping()
@@ -104,13 +141,27 @@ async def lifespan(app: FastAPI):
 
     polling_task = asyncio.create_task(_run_polling())
     asyncio.create_task(watchdog_loop())
+    events_task = asyncio.create_task(cargo_events_loop())
+    price_book_task = asyncio.create_task(price_book_listener())
+    legal_precheck.start()
+
+    try:
+        from src.core.services.broadcast import resume_broadcasts
+        await resume_broadcasts()
+    except Exception as e:
+        logger.warning("Broadcast resume failed: %s", e)
     logger.info("Bot polling started")
     logger.info("Watchdog started")
+    logger.info("Cargo events consumer started")
     yield
     logger.info("Shutting down...")
     scheduler.shutdown()
     polling_task.cancel()
+    events_task.cancel()
+    price_book_task.cancel()
+    await legal_precheck.stop()
     await bot.session.close()
+    await close_http_clients()
     await close_redis()
 
 app = FastAPI(title="Logistics Bot API", lifespan=lifespan)
@@ -165,17 +216,12 @@ async def api_stats():
 @app.get("/api/cargos")
 async def api_cargos(from_city: str = None, to_city: str = None):
     from src.core.database import async_session
-    from src.core.models import Cargo, CargoStatus
-    from sqlalchemy import select
+    from src.core.services.cargo_search import search_cargos
     
     async with async_session() as session:
-        query = select(Cargo).where(Cargo.status == CargoStatus.NEW)
-        if from_city:
-            query = query.where(Cargo.from_city.ilike(f"%{from_city}%"))
-        if to_city:
-            query = query.where(Cargo.to_city.ilike(f"%{to_city}%"))
-        result = await session.execute(query.limit(50))
-        cargos = result.scalars().all()
+        cargos = await search_cargos(
+            session, from_city=from_city, to_city=to_city, limit=50
+        )
     
     return [{"id": c.id, "from": c.from_city, "to": c.to_city, "weight": c.weight, "price": c.price} for c in cargos]
 
@@ -0,0 +1,36 @@
+-- cargos: нормализованные города и индексы для поиска (src/core/services/cargo_search.py)
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE cargos
+  ADD COLUMN IF NOT EXISTS from_city_norm VARCHAR(100) NULL;
+
+ALTER TABLE cargos
+  ADD COLUMN IF NOT EXISTS to_city_norm VARCHAR(100) NULL;
+
+-- Бэкфилл: то же, что src.core.cities._normalize, включая снятие префикса «г.»
+-- (алиасы «спб»/«мск» применяет только приложение)
+UPDATE cargos SET
+  from_city_norm = btrim(regexp_replace(
+      translate(regexp_replace(btrim(lower(split_part(from_city, ',', 1))), '^г\.?\s+', ''), 'ё-', 'е '),
+      '[^0-9a-zа-я]+', ' ', 'g')),
+  to_city_norm = btrim(regexp_replace(
+      translate(regexp_replace(btrim(lower(split_part(to_city, ',', 1))), '^г\.?\s+', ''), 'ё-', 'е '),
+      '[^0-9a-zа-я]+', ' ', 'g'))
+WHERE from_city_norm IS NULL OR to_city_norm IS NULL;
+
+-- Строки, заполненные прежней версией бэкфилла без снятия «г.» («г. Москва» -> «г москва»)
+UPDATE cargos SET from_city_norm = substr(from_city_norm, 3) WHERE from_city_norm LIKE 'г %';
+UPDATE cargos SET to_city_norm = substr(to_city_norm, 3) WHERE to_city_norm LIKE 'г %';
+
+CREATE INDEX IF NOT EXISTS ix_cargos_search
+    ON cargos(status, from_city_norm, to_city_norm, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_cargos_search_to
+    ON cargos(status, to_city_norm, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_cargos_from_city_norm_trgm
+    ON cargos USING gin (from_city_norm gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_cargos_to_city_norm_trgm
+    ON cargos USING gin (to_city_norm gin_trgm_ops);
+
+COMMIT;
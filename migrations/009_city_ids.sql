@@ -0,0 +1,36 @@
+-- cities: справочник городов, алиасы и from_city_id/to_city_id в cargos и route_subscriptions.
+-- Наполнение выполняет приложение на старте (src.core.cities.seed_cities); бэкфилл ID
+-- (backfill_city_ids) — только когда справочник изменился, новые строки получают ID в модели.
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS cities (
+    id          SERIAL PRIMARY KEY,
+    name        VARCHAR(100) NOT NULL,
+    name_norm   VARCHAR(100) NOT NULL,
+    created_at  TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'UTC'),
+    CONSTRAINT uq_cities_name_norm UNIQUE (name_norm)
+);
+
+CREATE TABLE IF NOT EXISTS city_aliases (
+    alias    VARCHAR(100) PRIMARY KEY,
+    city_id  INTEGER NOT NULL REFERENCES cities(id) ON DELETE CASCADE
+);
+
+ALTER TABLE cargos
+  ADD COLUMN IF NOT EXISTS from_city_id INTEGER NULL REFERENCES cities(id);
+ALTER TABLE cargos
+  ADD COLUMN IF NOT EXISTS to_city_id INTEGER NULL REFERENCES cities(id);
+
+ALTER TABLE route_subscriptions
+  ADD COLUMN IF NOT EXISTS from_city_id INTEGER NULL REFERENCES cities(id);
+ALTER TABLE route_subscriptions
+  ADD COLUMN IF NOT EXISTS to_city_id INTEGER NULL REFERENCES cities(id);
+
+CREATE INDEX IF NOT EXISTS ix_cargos_route_ids
+    ON cargos(status, from_city_id, to_city_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_cargos_to_city_id
+    ON cargos(status, to_city_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_route_subscriptions_route_ids
+    ON route_subscriptions(from_city_id, to_city_id) WHERE is_active;
+
+COMMIT;
@@ -0,0 +1,31 @@
+-- Исходящая доставка: пометка заблокировавших бота и dead letter неудачных отправок
+BEGIN;
+
+ALTER TABLE users
+  ADD COLUMN IF NOT EXISTS bot_blocked_at TIMESTAMP NULL;
+
+CREATE TABLE IF NOT EXISTS delivery_failures (
+    id            SERIAL PRIMARY KEY,
+    kind          VARCHAR(30) NOT NULL,
+    key           VARCHAR(100) NOT NULL,
+    chat_id       BIGINT NOT NULL,
+    error         TEXT NOT NULL,
+    payload_json  TEXT NULL,
+    attempts      INTEGER NOT NULL DEFAULT 1,
+    created_at    TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'UTC'),
+    updated_at    TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'UTC')
+);
+
+-- Одна строка на сообщение (kind, key) со счётчиком попыток; для таблиц,
+-- созданных до появления ключа, старые строки получают уникальный ключ по id
+ALTER TABLE delivery_failures ADD COLUMN IF NOT EXISTS key VARCHAR(100) NULL;
+ALTER TABLE delivery_failures ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE delivery_failures
+  ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'UTC');
+UPDATE delivery_failures SET key = 'legacy:' || id WHERE key IS NULL;
+ALTER TABLE delivery_failures ALTER COLUMN key SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_delivery_failures_created_at ON delivery_failures(created_at);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_delivery_failures_kind_key ON delivery_failures(kind, key);
+
+COMMIT;
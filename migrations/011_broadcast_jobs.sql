@@ -0,0 +1,29 @@
+-- broadcast_jobs: персистентные рассылки админа с чекпоинтом по users.id
+BEGIN;
+
+DO $$ BEGIN
+    CREATE TYPE broadcaststatus AS ENUM ('PENDING', 'RUNNING', 'DONE', 'CANCELLED', 'FAILED');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END $$;
+
+CREATE TABLE IF NOT EXISTS broadcast_jobs (
+    id            SERIAL PRIMARY KEY,
+    created_by    BIGINT NOT NULL,
+    from_chat_id  BIGINT NOT NULL,
+    message_id    BIGINT NOT NULL,
+    status        broadcaststatus NOT NULL DEFAULT 'PENDING',
+    last_user_id  BIGINT NOT NULL DEFAULT 0,
+    total         INTEGER NOT NULL DEFAULT 0,
+    sent          INTEGER NOT NULL DEFAULT 0,
+    failed        INTEGER NOT NULL DEFAULT 0,
+    blocked       INTEGER NOT NULL DEFAULT 0,
+    error         TEXT NULL,
+    created_at    TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'UTC'),
+    updated_at    TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'UTC'),
+    finished_at   TIMESTAMP NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_broadcast_jobs_status ON broadcast_jobs(status);
+
+COMMIT;
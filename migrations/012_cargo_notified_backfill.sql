@@ -0,0 +1,11 @@
+-- Sweeper push_notifications_job больше не ограничен окном created_at:
+-- помечаем исторические грузы как уведомлённые, чтобы не разослать их задним числом.
+BEGIN;
+
+UPDATE cargos SET notified_at = created_at
+WHERE notified_at IS NULL AND created_at < (NOW() AT TIME ZONE 'UTC') - INTERVAL '1 hour';
+
+CREATE INDEX IF NOT EXISTS ix_cargos_pending_notify
+    ON cargos(id) WHERE notified_at IS NULL;
+
+COMMIT;
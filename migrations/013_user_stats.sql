@@ -0,0 +1,24 @@
+-- Материализованные агрегаты оценок: user_stats.rating_sum / rating_count
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id       BIGINT PRIMARY KEY REFERENCES users(id),
+    rating_sum    INTEGER NOT NULL DEFAULT 0,
+    rating_count  INTEGER NOT NULL DEFAULT 0,
+    updated_at    TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'UTC')
+);
+
+CREATE INDEX IF NOT EXISTS ix_ratings_to_user_id ON ratings(to_user_id);
+
+-- Разовый бэкфилл из ratings (повторный запуск пересчитывает значения)
+INSERT INTO user_stats (user_id, rating_sum, rating_count, updated_at)
+SELECT r.to_user_id, SUM(r.score), COUNT(*), NOW() AT TIME ZONE 'UTC'
+FROM ratings r
+JOIN users u ON u.id = r.to_user_id
+GROUP BY r.to_user_id
+ON CONFLICT (user_id) DO UPDATE
+SET rating_sum = EXCLUDED.rating_sum,
+    rating_count = EXCLUDED.rating_count,
+    updated_at = EXCLUDED.updated_at;
+
+COMMIT;
@@ -0,0 +1,56 @@
+-- Счётчики для событийного пересчёта рейтинга компаний.
+-- Заполняются здесь один раз (тот же расчёт, что recalculate_all_ratings),
+-- дальше — событиями и ночным company_ratings_job.
+BEGIN;
+
+ALTER TABLE company_details ADD COLUMN IF NOT EXISTS deals_completed INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE company_details ADD COLUMN IF NOT EXISTS open_claims INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE company_details ADD COLUMN IF NOT EXISTS resolved_claims INTEGER NOT NULL DEFAULT 0;
+
+-- Ночной пересчёт: завершённые грузы по участникам
+CREATE INDEX IF NOT EXISTS ix_cargos_status_owner ON cargos(status, owner_id);
+CREATE INDEX IF NOT EXISTS ix_cargos_status_carrier ON cargos(status, carrier_id);
+
+-- Начальное заполнение (enum хранится по имени: 'COMPLETED', 'OPEN')
+WITH deals AS (
+    SELECT user_id, count(*) AS n
+    FROM (
+        SELECT owner_id AS user_id FROM cargos WHERE status = 'COMPLETED'
+        UNION ALL
+        SELECT carrier_id FROM cargos
+        WHERE status = 'COMPLETED' AND carrier_id IS NOT NULL AND carrier_id <> owner_id
+    ) participants
+    GROUP BY user_id
+),
+claims_by_company AS (
+    SELECT to_company_id,
+           count(*) FILTER (WHERE status = 'OPEN') AS open,
+           count(*) FILTER (WHERE status = 'RESOLVED') AS resolved
+    FROM claims
+    WHERE to_company_id IS NOT NULL
+    GROUP BY to_company_id
+),
+stats AS (
+    SELECT c.id,
+           coalesce(d.n, 0) AS deals,
+           coalesce(cl.open, 0) AS open,
+           coalesce(cl.resolved, 0) AS resolved
+    FROM company_details c
+    LEFT JOIN deals d ON d.user_id = c.user_id
+    LEFT JOIN claims_by_company cl ON cl.to_company_id = c.id
+)
+UPDATE company_details c
+SET deals_completed = s.deals,
+    open_claims = s.open,
+    resolved_claims = s.resolved,
+    rating_deals_completed = CASE WHEN s.deals >= 50 THEN 2 WHEN s.deals >= 10 THEN 1 ELSE 0 END,
+    rating_no_claims = CASE
+        WHEN s.open > 0 THEN -least(s.open, 2)
+        WHEN s.resolved > 0 THEN 0
+        ELSE 1
+    END,
+    rating_experience = CASE WHEN c.registered_at < now() - interval '365 days' THEN 1 ELSE 0 END
+FROM stats s
+WHERE c.id = s.id;
+
+COMMIT;
@@ -0,0 +1,27 @@
+-- Статистика цен по маршрутам из завершённых грузов (пересобирается route_stats_job)
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS route_price_stats (
+    id              SERIAL PRIMARY KEY,
+    from_key        VARCHAR(100) NOT NULL,
+    to_key          VARCHAR(100) NOT NULL,
+    cargo_type_key  VARCHAR(10) NOT NULL,
+    deals           INTEGER NOT NULL,
+    weight_p50      DOUBLE PRECISION NOT NULL,
+    price_p25       INTEGER NOT NULL,
+    price_p50       INTEGER NOT NULL,
+    price_p75       INTEGER NOT NULL,
+    per_ton_p25     DOUBLE PRECISION NOT NULL,
+    per_ton_p50     DOUBLE PRECISION NOT NULL,
+    per_ton_p75     DOUBLE PRECISION NOT NULL,
+    distance_km     DOUBLE PRECISION,
+    per_km_p25      DOUBLE PRECISION,
+    per_km_p50      DOUBLE PRECISION,
+    per_km_p75      DOUBLE PRECISION,
+    updated_at      TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'UTC')
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_route_price_stats_route
+    ON route_price_stats(from_key, to_key, cargo_type_key);
+
+COMMIT;
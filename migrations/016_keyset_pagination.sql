@@ -0,0 +1,16 @@
+-- Keyset-пагинация (src/core/pagination.py): ORDER BY created_at DESC, id DESC
+BEGIN;
+
+-- «Все грузы» / поиск без городов / админка с фильтром статуса
+CREATE INDEX IF NOT EXISTS ix_cargos_status_created_id
+    ON cargos(status, created_at DESC, id DESC);
+-- «Мои грузы» и админка без фильтра
+CREATE INDEX IF NOT EXISTS ix_cargos_owner_created_id
+    ON cargos(owner_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_cargos_created_id
+    ON cargos(created_at DESC, id DESC);
+-- Админка: пользователи
+CREATE INDEX IF NOT EXISTS ix_users_created_id
+    ON users(created_at DESC, id DESC);
+
+COMMIT;
@@ -0,0 +1,10 @@
+-- Кэш проверки контрагентов по ИНН (src/core/services/legal_cache.py)
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS legal_check_cache (
+    inn           VARCHAR(12) PRIMARY KEY,
+    sources_json  TEXT NOT NULL,
+    updated_at    TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'UTC')
+);
+
+COMMIT;
@@ -0,0 +1,16 @@
+-- Выборка напоминаний к отправке (check_reminders_job):
+-- WHERE NOT is_sent AND failed_at IS NULL AND remind_at <= now()
+-- ORDER BY remind_at LIMIT n FOR UPDATE SKIP LOCKED
+-- attempts — неудачные доставки (повтор с отсрочкой), failed_at — напоминание
+-- больше не отправляется (бот заблокирован или попытки исчерпаны).
+BEGIN;
+
+ALTER TABLE reminders ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE reminders ADD COLUMN IF NOT EXISTS failed_at TIMESTAMP;
+
+DROP INDEX IF EXISTS ix_reminders_due;
+CREATE INDEX ix_reminders_due
+    ON reminders(remind_at)
+    WHERE NOT is_sent AND failed_at IS NULL;
+
+COMMIT;
@@ -0,0 +1,89 @@
+"""
+Микробенчмарк: поиск городов в тексте запроса — старый цикл по алиасам
+(_parse_search_simple до AliasMatcher) против скомпилированной альтернативы.
+
+Алиасы — все города из src/core/russia_cities.txt (~1000 записей).
+
+    python scripts/bench_alias_matcher.py [--number 2000]
+"""
+
+import argparse
+import re
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.core.alias_matcher import AliasMatcher  # noqa: E402
+
+QUERIES = [
+    "мск спб 20т",
+    "из казани в екатеринбург 10-15 тонн до 100к",
+    "новосибирск омск",
+    "груз до 20т из самары",
+    "краснодар ростов-на-дону до 80000",
+    "нужна машина из тюмени в челябинск, 5 тонн, тент",
+]
+
+
+def load_aliases() -> dict[str, str]:
+    names = (ROOT / "src/core/russia_cities.txt").read_text(encoding="utf-8").splitlines()
+    return {n.strip().lower(): n.strip() for n in names if n.strip() and not n.startswith("#")}
+
+
+def legacy_matches(aliases: dict[str, str], text: str) -> list[tuple[int, str, str | None]]:
+    text_lower = text.lower()
+    matches = []
+    for alias, city in aliases.items():
+        alias_key = alias.lower()
+        idx = text_lower.find(alias_key)
+        if idx == -1 and len(alias_key) > 4:
+            idx = text_lower.find(alias_key[:-1])
+        if idx != -1:
+            prefix = text_lower[max(0, idx - 12):idx]
+            role = None
+            if re.search(r"(из|от)\s+$", prefix):
+                role = "from"
+            elif re.search(r"(в|до|к)\s+$", prefix):
+                role = "to"
+            matches.append((idx, city, role))
+    return sorted(matches, key=lambda x: x[0])
+
+
+_FROM = re.compile(r"(из|от)\s+$")
+_TO = re.compile(r"(в|до|к)\s+$")
+
+
+def matcher_matches(matcher: AliasMatcher, text: str) -> list[tuple[int, str, str | None]]:
+    text_lower = text.lower()
+    matches = []
+    for hit in matcher.finditer(text_lower):
+        prefix = text_lower[max(0, hit.start - 12):hit.start]
+        role = "from" if _FROM.search(prefix) else "to" if _TO.search(prefix) else None
+        matches.append((hit.start, hit.city, role))
+    return matches
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=2000, help="повторов на запрос")
+    args = parser.parse_args()
+
+    aliases = load_aliases()
+    build = timeit.timeit(lambda: AliasMatcher(aliases), number=1)
+    matcher = AliasMatcher(aliases)
+    print(f"aliases: {len(aliases)}, matcher build: {build * 1000:.1f} ms")
+
+    for name, fn in (
+        ("legacy loop", lambda q: legacy_matches(aliases, q)),
+        ("alias matcher", lambda q: matcher_matches(matcher, q)),
+    ):
+        total = sum(timeit.timeit(lambda q=q: fn(q), number=args.number) for q in QUERIES)
+        per_query = total / (args.number * len(QUERIES)) * 1e6
+        print(f"{name:>14}: {per_query:8.1f} µs/query")
+
+
+if __name__ == "__main__":
+    main()
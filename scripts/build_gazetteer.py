@@ -0,0 +1,164 @@
+"""
+Сборка src/core/russia_cities_geo.csv из справочника городов с координатами.
+
+Источники:
+- CSV в формате hflabs/city (колонки city, settlement, region, geo_lat,
+  geo_lon; https://github.com/hflabs/city); при нескольких совпадениях
+  берётся первая строка;
+- дамп GeoNames (cities500.txt / RU.txt, TSV; https://download.geonames.org/export/dump/,
+  CC BY 4.0): русские названия берутся из alternatenames. Каждый пункт
+  относится к одному городу — тому, чей транслит ближе к asciiname
+  (у Rostov-on-Don это Ростов-на-Дону, а не Ростов; у Королёва — не его
+  историческое «Калининград»); из одноимённых — самый населённый.
+
+Строки сопоставляются с russia_cities.txt через city_key(). Уже записанные
+координаты сохраняются, если не указан --overwrite. Если без координат
+остаётся город из REQUIRED_CITIES или из маршрутов MARKET_PRICES, файл
+не записывается и скрипт завершается с ошибкой.
+
+    python scripts/build_gazetteer.py city.csv [--overwrite]
+    python scripts/build_gazetteer.py cities500.txt --format geonames --overwrite
+
+Скрипт импортирует src.core.cities, поэтому нужны переменные окружения
+бота (.env), как для main.py.
+"""
+
+import argparse
+import csv
+import re
+import sys
+from difflib import SequenceMatcher
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.core.cities import city_key, get_resolver, is_known_city_key  # noqa: E402
+from src.core.market_data import MARKET_PRICES  # noqa: E402
+
+GEO_FILE = ROOT / "src/core/russia_cities_geo.csv"
+HEADER = [
+    "# Координаты городов из russia_cities.txt: name,lat,lon (WGS84).",
+    "# Генерируется scripts/build_gazetteer.py; строки без координат отсутствуют.",
+    "# Источник: GeoNames (geonames.org, CC BY 4.0); часть строк уточнена вручную.",
+]
+
+# Города прежней таблицы CITY_COORDS (src/core/ai.py): газеттир их не теряет
+REQUIRED_CITIES = [
+    "Москва", "Санкт-Петербург", "Новосибирск", "Екатеринбург", "Нижний Новгород",
+    "Казань", "Самара", "Омск", "Ростов-на-Дону", "Уфа", "Красноярск", "Пермь",
+    "Воронеж", "Волгоград", "Краснодар", "Челябинск", "Тюмень", "Симферополь",
+    "Мурманск", "Ставрополь", "Набережные Челны",
+]
+
+
+def required_keys() -> dict[str, str]:
+    names = REQUIRED_CITIES + [p[side] for p in MARKET_PRICES for side in ("from", "to")]
+    return {city_key(name): name for name in names}
+
+
+def read_existing() -> dict[str, tuple[str, str]]:
+    if not GEO_FILE.exists():
+        return {}
+    lines = GEO_FILE.read_text(encoding="utf-8").splitlines()
+    rows = csv.DictReader(line for line in lines if not line.startswith("#"))
+    return {city_key(r["name"]): (r["lat"], r["lon"]) for r in rows}
+
+
+def read_source(path: Path) -> dict[str, tuple[str, str]]:
+    coords: dict[str, tuple[str, str]] = {}
+    with path.open(encoding="utf-8-sig", newline="") as f:
+        for r in csv.DictReader(f):
+            # города федерального значения лежат в region, city пустой
+            name = r.get("city") or r.get("settlement") or r.get("region")
+            lat, lon = r.get("geo_lat"), r.get("geo_lon")
+            if not name or not lat or not lon:
+                continue
+            key = city_key(name)
+            if is_known_city_key(key):
+                coords.setdefault(key, (lat, lon))
+    return coords
+
+
+_TRANSLIT = dict(zip(
+    "абвгдеёжзийклмнопрстуфхцчшщъыьэюя",
+    ["a", "b", "v", "g", "d", "e", "e", "zh", "z", "i", "y", "k", "l", "m", "n", "o", "p",
+     "r", "s", "t", "u", "f", "kh", "ts", "ch", "sh", "shch", "", "y", "", "e", "yu", "ya"],
+))
+# GeoNames: столбцы name, asciiname, alternatenames, lat, lon, feature class, country, population
+_GN_ASCII, _GN_ALT, _GN_LAT, _GN_LON, _GN_CLASS, _GN_COUNTRY, _GN_POPULATION = 2, 3, 4, 5, 6, 8, 14
+MIN_NAME_SIMILARITY = 0.6
+
+
+def _translit(key: str) -> str:
+    return "".join(_TRANSLIT.get(ch, ch) for ch in key)
+
+
+def _latin(text: str) -> str:
+    return re.sub(r"[^a-z]+", "", text.lower())
+
+
+def read_geonames(path: Path) -> dict[str, tuple[str, str]]:
+    best: dict[str, tuple[int, str, str]] = {}
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) <= _GN_POPULATION or cols[_GN_COUNTRY] != "RU" or cols[_GN_CLASS] != "P":
+                continue
+            # Пункт относится к одному городу справочника — к тому, чей транслит
+            # ближе всего к asciiname («Ростов-на-Дону», а не «Ростов» у Rostov-on-Don)
+            ascii_name = _latin(cols[_GN_ASCII])
+            keys = {
+                city_key(name)
+                for name in cols[_GN_ALT].split(",")
+                if re.search("[а-яё]", name, re.I)
+            }
+            scored = [
+                (SequenceMatcher(None, _latin(_translit(key)), ascii_name).ratio(), key)
+                for key in keys
+                if is_known_city_key(key)
+            ]
+            if not scored:
+                continue
+            similarity, key = max(scored)
+            if similarity < MIN_NAME_SIMILARITY:
+                continue
+            population = int(cols[_GN_POPULATION] or 0)
+            if key not in best or population > best[key][0]:
+                best[key] = (population, cols[_GN_LAT], cols[_GN_LON])
+    return {key: (lat, lon) for key, (_, lat, lon) in best.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", type=Path)
+    parser.add_argument("--format", choices=("hflabs", "geonames"), default="hflabs")
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+
+    existing = read_existing()
+    source = read_geonames(args.source) if args.format == "geonames" else read_source(args.source)
+    merged = {**existing, **source} if args.overwrite else {**source, **existing}
+
+    lost = sorted({name for key, name in required_keys().items() if key not in merged})
+    if lost:
+        raise SystemExit(f"no coordinates for required cities: {', '.join(lost)}")
+
+    resolver = get_resolver()
+    names = resolver.index
+    with GEO_FILE.open("w", encoding="utf-8", newline="") as f:
+        f.write("\n".join(HEADER) + "\n")
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["name", "lat", "lon"])
+        for key in sorted(merged, key=names.__getitem__):
+            lat, lon = merged[key]
+            writer.writerow([names[key], f"{float(lat):.4f}", f"{float(lon):.4f}"])
+
+    missing = [names[k] for k in resolver.keys if k not in merged]
+    print(f"written: {len(merged)}, from source: {len(source)}, without coords: {len(missing)}")
+    if missing:
+        print("missing:", ", ".join(missing[:30]), "..." if len(missing) > 30 else "")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Проверка офлайн-разбора городов (_parse_search_simple, parse_city) без LLM и сети.
+
+Сценарии: дефисное и пробельное написание составных названий
+(«ростов-на-дону» / «ростов на дону»), сокращения, роль города по предлогу,
+«Ростов» — город Ростов, как у city_key.
+
+    python scripts/check_city_parsing.py
+
+Скрипт импортирует src.core.*, поэтому нужны переменные окружения бота
+(.env), как для main.py; LLM выключается, Redis для кэша необязателен.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.core import ai  # noqa: E402
+from src.core.cities import city_key  # noqa: E402
+from src.core.llm import LLMClient  # noqa: E402
+
+SEARCHES = [
+    ("из москвы в ростов-на-дону 20т", {"from_city": "Москва", "to_city": "Ростов-на-Дону"}),
+    ("из москвы в ростов на дону", {"from_city": "Москва", "to_city": "Ростов-на-Дону"}),
+    ("краснодар ростов-на-дону до 80000", {"from_city": "Краснодар", "to_city": "Ростов-на-Дону"}),
+    ("рнд мск", {"from_city": "Ростов-на-Дону", "to_city": "Москва"}),
+    ("из казани в спб 10-15 тонн", {"from_city": "Казань", "to_city": "Санкт-Петербург"}),
+]
+CITIES = [
+    ("Ростов-на-Дону", "Ростов-на-Дону"),
+    ("ростов на дону", "Ростов-на-Дону"),
+    ("рнд", "Ростов-на-Дону"),
+    ("Ростов", "Ростов"),
+]
+
+
+def check(condition: bool, label: str):
+    print(f"{'ok  ' if condition else 'FAIL'} {label}")
+    if not condition:
+        raise SystemExit(1)
+
+
+async def main():
+    ai.llm = LLMClient(api_key="")  # только локальный разбор
+
+    for text, expected in SEARCHES:
+        parsed = ai._parse_search_simple(text) or {}
+        got = {k: parsed.get(k) for k in expected}
+        check(got == expected, f"{text!r} -> {got}")
+
+    for text, expected in CITIES:
+        city = await ai.parse_city(text)
+        check(city == expected and city_key(city) == city_key(text), f"parse_city({text!r}) -> {city}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
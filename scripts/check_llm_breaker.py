@@ -0,0 +1,90 @@
+"""
+Проверка src.core.llm против локального stub (scripts/llm_stub_server.py), без сети.
+
+Сценарии: ответ модели; таймаут; ошибки подряд -> breaker open (запросы
+не уходят); half-open пропускает ровно одну пробу, отменённая проба не
+блокирует следующую; успешная проба -> closed; при открытом breaker
+parse_city переходит на локальный fallback.
+
+    python scripts/check_llm_breaker.py
+
+Скрипт импортирует src.core.*, поэтому нужны переменные окружения бота
+(.env), как для main.py; Redis для кэша необязателен.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from llm_stub_server import StubState, serve  # noqa: E402
+from src.core import ai  # noqa: E402
+from src.core.llm import CircuitBreaker, LLMClient  # noqa: E402
+
+PORT = 8181
+TIMEOUT = 0.5
+RESET = 1.0
+MESSAGES = [{"role": "user", "content": "Распознай город: мск"}]
+
+
+def check(condition: bool, label: str):
+    print(f"{'ok  ' if condition else 'FAIL'} {label}")
+    if not condition:
+        raise SystemExit(1)
+
+
+async def main():
+    state = StubState(mode="ok", reply="Москва")
+    server = serve(PORT, state)
+    client = LLMClient(
+        api_key="stub",
+        base_url=f"http://127.0.0.1:{PORT}",
+        timeout=TIMEOUT,
+        breaker=CircuitBreaker(failure_threshold=3, reset_timeout=RESET),
+    )
+    breaker = client.breaker
+
+    try:
+        reply = await client.complete(MESSAGES, max_tokens=10)
+        check(reply == "Москва" and breaker.state == "closed", "ответ модели, breaker closed")
+
+        state.update({"mode": "slow", "delay": TIMEOUT * 4})
+        reply = await client.complete(MESSAGES, max_tokens=10)
+        check(reply is None and breaker.failures == 1, "таймаут -> None, ошибка засчитана")
+
+        state.update({"mode": "error"})
+        for _ in range(2):
+            await client.complete(MESSAGES, max_tokens=10)
+        check(breaker.state == "open", "3 ошибки подряд -> open")
+
+        sent = state.stats()["requests"]
+        reply = await client.complete(MESSAGES, max_tokens=10)
+        check(reply is None and state.stats()["requests"] == sent, "open: запрос не уходит")
+
+        ai.llm = client
+        city = await ai.parse_city("урюпинскк")
+        check(city == "Урюпинскк", "open: parse_city -> локальный fallback")
+
+        await asyncio.sleep(RESET)
+        check(breaker.state == "half-open", "после reset_timeout -> half-open")
+
+        state.update({"mode": "slow", "delay": TIMEOUT * 4})
+        probe = asyncio.create_task(client.complete(MESSAGES, max_tokens=10))
+        await asyncio.sleep(0.1)
+        check(not breaker.allow(), "half-open: вторая проба не пропускается")
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+
+        state.update({"mode": "ok"})
+        reply = await client.complete(MESSAGES, max_tokens=10)
+        check(reply == "Москва", "отменённая проба не блокирует следующую")
+        check(breaker.state == "closed" and breaker.failures == 0, "успешная проба -> closed")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
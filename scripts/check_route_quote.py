@@ -0,0 +1,60 @@
+"""
+Проверка оценки цены по сделкам маршрута (ai._quote_for_weight) без БД.
+
+Для нескольких маршрутов (медианный вес 5, 10, 20 т) цена, низ и верх
+проверяются на сетке веса 0.1–40 т с шагом 0.1: не убывают, не прыгают
+больше, чем на ₽/т p75 × шаг (непрерывность), низ ≤ цена ≤ верх.
+
+    python scripts/check_route_quote.py
+
+Скрипт импортирует src.core.*, поэтому нужны переменные окружения бота
+(.env), как для main.py.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.core.ai import _quote_for_weight  # noqa: E402
+
+STEP = 0.1
+WEIGHTS = [round(STEP * i, 1) for i in range(1, 401)]
+ROUTES = [
+    SimpleNamespace(weight_p50=5, price_p25=40_000, price_p50=50_000, price_p75=60_000,
+                    per_ton_p25=8_000, per_ton_p50=10_000, per_ton_p75=12_000),
+    SimpleNamespace(weight_p50=10, price_p25=70_000, price_p50=90_000, price_p75=110_000,
+                    per_ton_p25=6_500, per_ton_p50=8_000, per_ton_p75=9_500),
+    SimpleNamespace(weight_p50=20, price_p25=95_000, price_p50=120_000, price_p75=150_000,
+                    per_ton_p25=4_500, per_ton_p50=6_000, per_ton_p75=7_500),
+]
+
+
+def check(condition: bool, label: str):
+    print(f"{'ok  ' if condition else 'FAIL'} {label}")
+    if not condition:
+        raise SystemExit(1)
+
+
+def main():
+    for stats in ROUTES:
+        name = f"медиана {stats.weight_p50}т"
+        quotes = [_quote_for_weight(stats, w) for w in WEIGHTS]
+        max_jump = stats.per_ton_p75 * STEP + 1
+
+        for i, label in enumerate(("цена", "низ", "верх")):
+            series = [q[i] for q in quotes]
+            steps = [b - a for a, b in zip(series, series[1:])]
+            check(min(steps) >= 0, f"{name}: {label} не убывает по весу")
+            check(max(steps) <= max_jump, f"{name}: {label} без скачков (max {max(steps)} ₽ на {STEP}т)")
+        check(all(low <= price <= high for price, low, high in quotes), f"{name}: низ ≤ цена ≤ верх")
+
+        band = [stats.weight_p50 / 2, stats.weight_p50 * 2]
+        edges = ", ".join(f"{w:g}т → {_quote_for_weight(stats, w)[0]:,}" for w in band)
+        print(f"     {name}: {edges}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Загрузка фида рыночных цен в market_prices (bulk upsert, см. src.core.market_data).
+
+CSV — колонки from,to,price[,type,weight,source]; JSON — список объектов
+с теми же полями. Работающие процессы бота перечитают цены по pub/sub.
+
+    python scripts/import_market_prices.py prices.csv --source ati
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.core.database import async_session  # noqa: E402
+from src.core.market_data import import_price_feed  # noqa: E402
+
+
+async def main(path: Path, source: str):
+    async with async_session() as session:
+        changed = await import_price_feed(session, path, source)
+    print(f"routes inserted/updated: {changed}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("feed", type=Path)
+    parser.add_argument("--source", required=True)
+    args = parser.parse_args()
+    asyncio.run(main(args.feed, args.source))
@@ -0,0 +1,88 @@
+"""
+Локальный stub всех источников /check (ФНС, kad.arbitr, ФССП, fedresurs).
+
+Один сервер отвечает на пути всех четырёх API; задержки задаются по
+источнику, чтобы проверить параллельный опрос, дедлайн и частичные ответы:
+
+    python scripts/legal_stub_server.py --port 8090 --delay arbitr=40 --delay fssp=3
+
+и в .env:
+
+    LEGAL_FNS_URL=http://127.0.0.1:8090
+    LEGAL_ARBITR_URL=http://127.0.0.1:8090
+    LEGAL_FSSP_URL=http://127.0.0.1:8090
+    LEGAL_BANKRUPT_URL=http://127.0.0.1:8090
+"""
+
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+FNS_ROW = {
+    "t": "stub-token",
+    "n": "ООО «ТЕСТОВАЯ ЛОГИСТИКА»",
+    "i": "7700000000",
+    "o": "1027700000000",
+    "a": "г. Москва, ул. Тестовая, д. 1",
+    "g": "Иванов Иван Иванович",
+    "r": "01.01.2015",
+    "s": "",
+}
+
+ROUTES = {
+    ("POST", "/api/search"): ("fns", {"rows": [FNS_ROW]}),
+    ("GET", "/api/vyp/stub-token"): ("fns", {}),
+    ("POST", "/Kad/SearchInstances"): ("arbitr", {"Result": {"Items": [], "TotalCount": 0}}),
+    ("GET", "/iss/ip"): ("fssp", "<html>Ничего не найдено</html>"),
+    ("GET", "/backend/sfactmessages"): ("bankrupt", {"pageData": []}),
+}
+
+
+def make_handler(delays: dict[str, float]):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, method: str):
+            route = ROUTES.get((method, urlparse(self.path).path))
+            if route is None:
+                self.send_error(404)
+                return
+            source, body = route
+            time.sleep(delays.get(source, 0))
+            payload = body if isinstance(body, str) else json.dumps(body, ensure_ascii=False)
+            data = payload.encode()
+            self.send_response(200)
+            content_type = "text/html" if isinstance(body, str) else "application/json"
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._reply("GET")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            self.rfile.read(length)
+            self._reply("POST")
+
+    return Handler
+
+
+def parse_delays(items: list[str]) -> dict[str, float]:
+    delays = {}
+    for item in items:
+        source, _, seconds = item.partition("=")
+        delays[source] = float(seconds)
+    return delays
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--delay", action="append", default=[], help="source=seconds")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(parse_delays(args.delay)))
+    print(f"legal stub on http://127.0.0.1:{args.port}")
+    server.serve_forever()
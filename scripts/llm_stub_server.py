@@ -0,0 +1,130 @@
+"""
+Локальный OpenAI-совместимый stub LLM для src.core.llm (без сети и ключей).
+
+Отвечает на POST .../chat/completions (Groq-клиент ходит на /openai/v1/...).
+Режим переключается на лету — так проверяются таймаут, circuit breaker и
+fallback (scripts/check_llm_breaker.py):
+
+    python scripts/llm_stub_server.py --port 8081 --mode ok --reply "Москва"
+    curl -X POST http://127.0.0.1:8081/_mode -d '{"mode": "slow", "delay": 20}'
+    curl http://127.0.0.1:8081/_stats
+
+Режимы: ok — ответ --reply; slow — ответ через delay секунд; error — HTTP 500.
+В .env: GROQ_API_KEY=stub, GROQ_BASE_URL=http://127.0.0.1:8081
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+class StubState:
+    def __init__(self, mode: str = "ok", delay: float = 0.0, reply: str = "Москва"):
+        self.mode = mode
+        self.delay = delay
+        self.reply = reply
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def hit(self) -> tuple[str, float, str]:
+        with self._lock:
+            self.requests += 1
+            return self.mode, self.delay, self.reply
+
+    def update(self, data: dict):
+        with self._lock:
+            self.mode = data.get("mode", self.mode)
+            self.delay = float(data.get("delay", self.delay))
+            self.reply = data.get("reply", self.reply)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"mode": self.mode, "delay": self.delay, "requests": self.requests}
+
+
+def completion(reply: str) -> dict:
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "stub",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": reply},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def _json(self, status: int, body: dict):
+            data = json.dumps(body, ensure_ascii=False).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if urlparse(self.path).path == "/_stats":
+                self._json(200, state.stats())
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length)
+            path = urlparse(self.path).path
+
+            if path == "/_mode":
+                state.update(json.loads(body or b"{}"))
+                self._json(200, state.stats())
+                return
+            if not path.endswith("/chat/completions"):
+                self.send_error(404)
+                return
+
+            mode, delay, reply = state.hit()
+            if mode == "error":
+                self._json(500, {"error": {"message": "stub failure", "type": "server_error"}})
+                return
+            if mode == "slow":
+                time.sleep(delay)
+            try:
+                self._json(200, completion(reply))
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # клиент ушёл по таймауту
+
+    return Handler
+
+
+def serve(port: int, state: StubState) -> ThreadingHTTPServer:
+    """Запустить stub в фоновом потоке (для проверочных скриптов)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--mode", choices=("ok", "slow", "error"), default="ok")
+    parser.add_argument("--delay", type=float, default=20.0, help="секунд для режима slow")
+    parser.add_argument("--reply", default="Москва")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", args.port),
+        make_handler(StubState(args.mode, args.delay, args.reply)),
+    )
+    print(f"llm stub on http://127.0.0.1:{args.port} (mode={args.mode})")
+    server.serve_forever()
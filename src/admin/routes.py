@@ -9,7 +9,10 @@ from src.admin.auth import (
 )
 from src.core.config import settings
 from src.core.database import async_session
-from src.core.models import User, Cargo, CargoStatus, Report, Rating, ChatMessage, Feedback
+from src.core.models import User, Cargo, CargoStatus, Report, ChatMessage, Feedback
+from src.core.pagination import fetch_page
+from src.core.services.broadcast import list_broadcasts, cancel_broadcast
+from src.core.services.user_stats import get_user_stats
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 templates = Jinja2Templates(directory="src/admin/templates")
@@ -92,24 +95,23 @@ async def dashboard(request: Request, admin: dict = Depends(get_current_admin)):
     })
 
 @router.get("/users", response_class=HTMLResponse)
-async def users_list(request: Request, admin: dict = Depends(get_current_admin), page: int = 1):
+async def users_list(
+    request: Request,
+    admin: dict = Depends(get_current_admin),
+    cursor: str | None = None,
+):
     limit = 20
-    offset = (page - 1) * limit
     
     async with async_session() as session:
-        total = await session.scalar(select(func.count()).select_from(User))
-        result = await session.execute(
-            select(User).order_by(desc(User.created_at)).offset(offset).limit(limit)
-        )
-        users = result.scalars().all()
+        users_page = await fetch_page(session, select(User), User, cursor, limit)
     
+    # Без номеров страниц и count(*): keyset-курсор не знает своей позиции
     return templates.TemplateResponse("users.html", {
         **_ctx(request),
         "admin": admin,
-        "users": users,
-        "page": page,
-        "total_pages": (total + limit - 1) // limit,
-        "total": total
+        "users": users_page.items,
+        "is_first": not cursor,
+        "next_cursor": users_page.next_cursor,
     })
 
 @router.get("/users/{user_id}", response_class=HTMLResponse)
@@ -128,9 +130,7 @@ async def user_detail(request: Request, user_id: int, admin: dict = Depends(get_
         cargos = cargos.scalars().all()
         
         # User's ratings
-        avg_rating = await session.scalar(
-            select(func.avg(Rating.score)).where(Rating.to_user_id == user_id)
-        )
+        stats = await get_user_stats(session, user_id)
         
         # Reports against user
         reports = await session.execute(
@@ -143,7 +143,7 @@ async def user_detail(request: Request, user_id: int, admin: dict = Depends(get_
         "admin": admin,
         "user": user,
         "cargos": cargos,
-        "avg_rating": round(avg_rating, 1) if avg_rating else None,
+        "avg_rating": round(stats.avg_rating, 1) if stats.avg_rating else None,
         "reports": reports
     })
 
@@ -168,32 +168,28 @@ async def unban_user(user_id: int, admin: dict = Depends(get_current_admin)):
     return RedirectResponse(url=f"/admin/users/{user_id}", status_code=302)
 
 @router.get("/cargos", response_class=HTMLResponse)
-async def cargos_list(request: Request, admin: dict = Depends(get_current_admin), page: int = 1, status: str = None):
+async def cargos_list(
+    request: Request,
+    admin: dict = Depends(get_current_admin),
+    cursor: str | None = None,
+    status: str = None,
+):
     limit = 20
-    offset = (page - 1) * limit
     
     async with async_session() as session:
         query = select(Cargo)
-        count_query = select(func.count()).select_from(Cargo)
         
         if status:
-            status_enum = CargoStatus(status)
-            query = query.where(Cargo.status == status_enum)
-            count_query = count_query.where(Cargo.status == status_enum)
+            query = query.where(Cargo.status == CargoStatus(status))
         
-        total = await session.scalar(count_query)
-        result = await session.execute(
-            query.order_by(desc(Cargo.created_at)).offset(offset).limit(limit)
-        )
-        cargos = result.scalars().all()
+        cargos_page = await fetch_page(session, query, Cargo, cursor, limit)
     
     return templates.TemplateResponse("cargos.html", {
         **_ctx(request),
         "admin": admin,
-        "cargos": cargos,
-        "page": page,
-        "total_pages": (total + limit - 1) // limit,
-        "total": total,
+        "cargos": cargos_page.items,
+        "is_first": not cursor,
+        "next_cursor": cargos_page.next_cursor,
         "current_status": status,
         "statuses": [s.value for s in CargoStatus]
     })
@@ -247,3 +243,17 @@ async def feedback_list(request: Request, admin: dict = Depends(get_current_admi
         "admin": admin,
         "feedbacks": feedbacks
     })
+
+@router.get("/broadcasts", response_class=HTMLResponse)
+async def broadcasts_list(request: Request, admin: dict = Depends(get_current_admin)):
+    jobs = await list_broadcasts(limit=50)
+    return templates.TemplateResponse("broadcasts.html", {
+        **_ctx(request),
+        "admin": admin,
+        "jobs": jobs
+    })
+
+@router.post("/broadcasts/{job_id}/cancel")
+async def broadcast_cancel(job_id: int, admin: dict = Depends(get_current_admin)):
+    await cancel_broadcast(job_id)
+    return RedirectResponse(url="/admin/broadcasts", status_code=302)
@@ -5,7 +5,15 @@ from sqlalchemy import select, func
 from src.core.config import settings
 from src.core.database import async_session
 from src.core.models import User, Cargo, Feedback
+from src.core.ai_cache import ai_cache_stats
 from src.core.redis import get_redis
+from src.core.services.broadcast import (
+    cancel_broadcast,
+    create_broadcast,
+    format_broadcast,
+    get_broadcast,
+    list_broadcasts,
+)
 from src.core.services.watchdog import watchdog
 from src.bot.bot import bot
 
@@ -67,6 +75,13 @@ async def admin_stats(message: Message):
     text += f"💬 Сообщений: {messages_count}\n"
     text += f"🔘 Callbacks: {callbacks_count}\n"
     text += f"📝 Отзывов: {feedback}"
+
+    for name, cache in ai_cache_stats().items():
+        hits = cache["local_hits"] + cache["redis_hits"]
+        text += (
+            f"\n🧠 AI-кэш {name}: {hits}/{hits + cache['misses']} "
+            f"(память {cache['local_hits']}, Redis {cache['redis_hits']})"
+        )
     
     await message.answer(text)
 
@@ -147,19 +162,61 @@ async def broadcast(message: Message):
         await message.answer("Ответь на сообщение которое нужно разослать")
         return
     
-    async with async_session() as session:
-        result = await session.execute(select(User).where(User.is_banned == False))
-        users = result.scalars().all()
+    source = message.reply_to_message
+    job = await create_broadcast(message.from_user.id, source.chat.id, source.message_id)
+    
+    await message.answer(
+        f"📣 Рассылка #{job.id} запущена: {job.total} получателей\n\n"
+        f"Статус: /broadcast_status {job.id}\n"
+        f"Отмена: /broadcast_cancel {job.id}"
+    )
+
+@router.message(Command("broadcast_status"))
+async def broadcast_status(message: Message):
+    if not is_admin(message.from_user.id):
+        return
+    
+    args = message.text.split()
+    if len(args) < 2:
+        jobs = await list_broadcasts(limit=5)
+        if not jobs:
+            await message.answer("📭 Рассылок нет")
+            return
+        await message.answer("\n\n".join(format_broadcast(j) for j in jobs))
+        return
+    
+    try:
+        job_id = int(args[1])
+    except ValueError:
+        await message.answer("❌ Неверный ID")
+        return
+    
+    job = await get_broadcast(job_id)
+    if not job:
+        await message.answer("❌ Рассылка не найдена")
+        return
+    await message.answer(format_broadcast(job))
+
+@router.message(Command("broadcast_cancel"))
+async def broadcast_cancel(message: Message):
+    if not is_admin(message.from_user.id):
+        return
     
-    sent = 0
-    for user in users:
-        try:
-            await message.reply_to_message.copy_to(user.id)
-            sent += 1
-        except:
-            pass
+    args = message.text.split()
+    if len(args) < 2:
+        await message.answer("Использование: /broadcast_cancel ID")
+        return
+    
+    try:
+        job_id = int(args[1])
+    except ValueError:
+        await message.answer("❌ Неверный ID")
+        return
     
-    await message.answer(f"✅ Отправлено {sent}/{len(users)} пользователям")
+    if await cancel_broadcast(job_id):
+        await message.answer(f"⛔ Рассылка #{job_id} отменена")
+    else:
+        await message.answer("❌ Рассылка не найдена или уже завершена")
 
 @router.message(Command("feedback_list"))
 async def feedback_list(message: Message):
@@ -5,10 +5,60 @@ from sqlalchemy import select, func, desc
 from datetime import datetime, timedelta
 from src.bot.keyboards import analytics_menu
 from src.core.database import async_session
+from src.core.geo import route_distances_km
+from src.core.logger import logger
 from src.core.models import Cargo, CargoStatus
+from src.core.redis import get_redis
 
 router = Router()
 
+# ₽/км по рынку: только грузы за последние PER_KM_WINDOW, результат кэшируется в Redis
+PER_KM_WINDOW = timedelta(days=90)
+PER_KM_TTL = 600
+_PER_KM_KEY = "analytics:per_km"
+
+
+def _per_km_suffix(price: float, distance: float | None) -> str:
+    if not distance or distance < 1:
+        return ""
+    return f" | {int(price / distance)} ₽/км"
+
+
+async def _market_per_km(session) -> float:
+    """Средняя цена за км по свежим грузам (кэш PER_KM_TTL секунд)."""
+    try:
+        redis = await get_redis()
+        cached = await redis.get(_PER_KM_KEY)
+        if cached is not None:
+            return float(cached)
+    except Exception as e:
+        logger.warning("Per-km cache read failed: %s", e)
+        redis = None
+
+    route_totals = (await session.execute(
+        select(
+            Cargo.from_city,
+            Cargo.to_city,
+            func.count().label('count'),
+            func.sum(Cargo.price).label('total'),
+        )
+        .where(Cargo.created_at >= datetime.utcnow() - PER_KM_WINDOW)
+        .group_by(Cargo.from_city, Cargo.to_city)
+    )).all()
+    distances = route_distances_km(
+        [r.from_city for r in route_totals], [r.to_city for r in route_totals]
+    )
+    priced = [(r.total, r.count * d) for r, d in zip(route_totals, distances) if d and d >= 1 and r.total]
+    per_km = sum(t for t, _ in priced) / sum(d for _, d in priced) if priced else 0
+
+    if redis is not None:
+        try:
+            await redis.set(_PER_KM_KEY, per_km, ex=PER_KM_TTL)
+        except Exception as e:
+            logger.warning("Per-km cache write failed: %s", e)
+    return per_km
+
+
 @router.callback_query(F.data == "analytics")
 async def show_analytics(cb: CallbackQuery):
     try:
@@ -88,10 +138,11 @@ async def my_routes(cb: CallbackQuery):
         await cb.answer()
         return
     
+    distances = route_distances_km([r.from_city for r in routes], [r.to_city for r in routes])
     text = "📊 <b>Мои маршруты:</b>\n\n"
-    for r in routes:
+    for r, distance in zip(routes, distances):
         text += f"🛣 {r.from_city} → {r.to_city}\n"
-        text += f"   Рейсов: {r.count} | Средняя: {int(r.avg_price):,} ₽\n\n"
+        text += f"   Рейсов: {r.count} | Средняя: {int(r.avg_price):,} ₽{_per_km_suffix(r.avg_price, distance)}\n\n"
     
     try:
         await cb.message.edit_text(text, reply_markup=analytics_menu())
@@ -123,10 +174,11 @@ async def popular_routes(cb: CallbackQuery):
         await cb.answer()
         return
     
+    distances = route_distances_km([r.from_city for r in routes], [r.to_city for r in routes])
     text = "🔥 <b>Популярные маршруты:</b>\n\n"
-    for i, r in enumerate(routes, 1):
+    for i, (r, distance) in enumerate(zip(routes, distances), 1):
         text += f"{i}. {r.from_city} → {r.to_city}\n"
-        text += f"   Грузов: {r.count} | Средняя: {int(r.avg_price):,} ₽\n\n"
+        text += f"   Грузов: {r.count} | Средняя: {int(r.avg_price):,} ₽{_per_km_suffix(r.avg_price, distance)}\n\n"
     
     try:
         await cb.message.edit_text(text, reply_markup=analytics_menu())
@@ -155,9 +207,13 @@ async def avg_prices(cb: CallbackQuery):
             .limit(5)
         )
         top_routes = expensive.all()
+        per_km = await _market_per_km(session)
     
     text = "📈 <b>Средние цены:</b>\n\n"
-    text += f"💰 Цена за тонну: {int(avg_per_ton):,} ₽\n\n"
+    text += f"💰 Цена за тонну: {int(avg_per_ton):,} ₽\n"
+    if per_km:
+        text += f"🛣 Цена за км: {int(per_km):,} ₽\n"
+    text += "\n"
     text += "<b>Топ дорогих маршрутов:</b>\n"
     for r in top_routes:
         text += f"• {r.from_city} → {r.to_city}: {int(r.avg_price):,} ₽\n"
@@ -7,9 +7,11 @@ from random import randint
 from src.bot.states import VerifyForm, ReportForm
 from src.bot.keyboards import main_menu, back_menu
 from src.core.database import async_session
-from src.core.models import User, Report, ReportType, Rating, Cargo, CargoStatus, UserProfile, VerificationStatus
+from src.core.models import User, Report, ReportType, Cargo, CargoStatus, UserProfile, VerificationStatus
 from src.core.config import settings
 from src.core.logger import logger
+from src.core.services.owner_summary import invalidate_owner_summary
+from src.core.services.user_stats import get_user_stats
 from src.bot.bot import bot
 
 router = Router()
@@ -79,6 +81,7 @@ async def verify_phone(message: Message, state: FSMContext):
             user.phone = phone
             user.verification_code = code
             await session.commit()
+    await invalidate_owner_summary(message.from_user.id)
     
     await state.update_data(phone=phone, code=code)
     
@@ -121,9 +124,7 @@ async def show_trust_score(cb: CallbackQuery):
             await cb.answer("❌ Профиль не найден", show_alert=True)
             return
         
-        avg_rating = await session.scalar(
-            select(func.avg(Rating.score)).where(Rating.to_user_id == cb.from_user.id)
-        )
+        stats = await get_user_stats(session, cb.from_user.id)
 
         profile = await session.scalar(select(UserProfile).where(UserProfile.user_id == cb.from_user.id))
         
@@ -157,7 +158,7 @@ async def show_trust_score(cb: CallbackQuery):
         text += f"✅ Верификация компании (+10)\n"
     else:
         text += f"❌ Верификация компании (+10)\n"
-    text += f"⭐ Средний рейтинг: {round(avg_rating, 1) if avg_rating else 'нет'}\n"
+    text += f"⭐ Средний рейтинг: {round(stats.avg_rating, 1) if stats.avg_rating else 'нет'}\n"
     text += f"📦 Завершённых сделок: {completed}\n"
     text += f"⚠️ Жалоб на вас: {reports}\n"
     text += f"🚫 Предупреждений: {user.warnings_count}"
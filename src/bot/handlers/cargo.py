@@ -8,7 +8,7 @@ import re
 from src.bot.states import CargoForm, EditCargo
 from src.bot.keyboards import main_menu, confirm_kb, cargo_actions, cargos_menu, cargo_open_list_kb, skip_kb, response_actions, deal_actions, city_kb, delete_confirm_kb, my_cargos_kb, cargo_edit_kb, price_suggest_kb
 from src.bot.utils import cargo_deeplink
-from src.bot.utils.cities import city_suggest
+from src.core.cities import city_suggest
 from src.core.ai import parse_city, parse_load_datetime
 from src.core.database import async_session
 from src.core.models import (
@@ -17,14 +17,19 @@ from src.core.models import (
     CargoResponse,
     User,
     RouteSubscription,
-    Rating,
     UserProfile,
-    VerificationStatus,
     CompanyDetails,
     Claim,
     ClaimStatus,
 )
 from src.core.documents import generate_ttn
+from src.core.pagination import fetch_page
+from src.core.services.legal_cache import cached_risks
+from src.core.services.legal_check import risk_badge
+from src.core.services.legal_precheck import enqueue_legal_check, request_legal_check
+from src.core.services.owner_summary import OwnerSummary, get_owner_summary, invalidate_owner_summary, verification_label
+from src.core.services.rating import on_cargo_completed
+from src.core.services.user_stats import get_users_stats
 from src.core.logger import logger
 from src.bot.bot import bot
 
@@ -42,38 +47,17 @@ def _looks_like_city(text: str) -> bool:
     return bool(re.search(r"[а-яА-Я]", t))
 
 
-def _verification_label(profile: UserProfile | None) -> str:
-    if not profile:
-        return "обычный"
-    if profile.verification_status == VerificationStatus.VERIFIED:
-        return "верифицирован"
-    if profile.verification_status == VerificationStatus.CONFIRMED:
-        return "подтверждён"
-    return "обычный"
+STATUS_MAP = {
+    "new": "🆕 Новый",
+    "in_progress": "🚚 В пути",
+    "completed": "✅ Завершён",
+    "cancelled": "❌ Отменён",
+    "archived": "🗄 Архив",
+    "active": "✅ Активный",
+}
 
-async def render_cargo_card(session, cargo: Cargo, viewer_id: int) -> tuple[str, bool, int | None]:
-    owner = await session.scalar(select(User).where(User.id == cargo.owner_id))
-    owner_profile = await session.scalar(select(UserProfile).where(UserProfile.user_id == cargo.owner_id))
-    owner_company = await session.scalar(
-        select(CompanyDetails).where(CompanyDetails.user_id == cargo.owner_id)
-    )
-
-    avg_rating = await session.scalar(
-        select(func.avg(Rating.score)).where(Rating.to_user_id == cargo.owner_id)
-    )
-    rating_count = await session.scalar(
-        select(func.count()).select_from(Rating).where(Rating.to_user_id == cargo.owner_id)
-    )
-
-    status_map = {
-        "new": "🆕 Новый",
-        "in_progress": "🚚 В пути",
-        "completed": "✅ Завершён",
-        "cancelled": "❌ Отменён",
-        "archived": "🗄 Архив",
-        "active": "✅ Активный",
-    }
 
+def _cargo_header(cargo: Cargo) -> str:
     text = f"📦 <b>Груз #{cargo.id}</b>\n\n"
     text += f"📍 {cargo.from_city} → {cargo.to_city}\n"
     text += f"📦 {cargo.cargo_type}\n"
@@ -83,9 +67,33 @@ async def render_cargo_card(session, cargo: Cargo, viewer_id: int) -> tuple[str,
     if cargo.load_time:
         text += f" в {cargo.load_time}"
     text += "\n"
-    text += f"📊 {status_map.get(cargo.status.value, cargo.status.value)}\n"
+    text += f"📊 {STATUS_MAP.get(cargo.status.value, cargo.status.value)}\n"
     if cargo.comment:
         text += f"💬 {cargo.comment}\n"
+    return text
+
+
+def _owner_company_lines(owner: OwnerSummary) -> str:
+    if owner.total_rating is None:
+        return "\n⚠️ Компания не зарегистрирована"
+    rating = owner.total_rating
+    stars = "⭐" * rating + "☆" * (10 - rating)
+    text = f"\n🏢 {owner.company_name or 'Компания'}"
+    text += f"\n📊 Рейтинг: {stars} ({rating}/10)"
+    return text
+
+
+def _owner_trust_lines(owner: OwnerSummary) -> str:
+    stars = "⭐" * round(owner.avg_rating) if owner.avg_rating else "нет оценок"
+    text = f"\n⭐ Оценки: {stars} ({owner.rating_count})"
+    text += f"\n🛡 Верификация: {owner.verification_label}"
+    return text
+
+
+async def render_cargo_card(session, cargo: Cargo, viewer_id: int) -> tuple[str, bool, int | None]:
+    owner = await get_owner_summary(session, cargo.owner_id)
+
+    text = _cargo_header(cargo)
 
     is_owner = cargo.owner_id == viewer_id
     is_carrier = cargo.carrier_id == viewer_id if cargo.carrier_id else False
@@ -93,23 +101,15 @@ async def render_cargo_card(session, cargo: Cargo, viewer_id: int) -> tuple[str,
     can_show_contacts = is_participant and cargo.status in {CargoStatus.IN_PROGRESS, CargoStatus.COMPLETED}
 
     if owner:
-        text += f"\n👤 Заказчик: {owner.full_name if owner.full_name else owner.id}"
-        if owner_company:
-            rating = owner_company.total_rating
-            stars = "⭐" * rating + "☆" * (10 - rating)
-            text += f"\n🏢 {owner_company.company_name or 'Компания'}"
-            text += f"\n📊 Рейтинг: {stars} ({rating}/10)"
-        else:
-            text += "\n⚠️ Компания не зарегистрирована"
+        text += f"\n👤 Заказчик: {owner.display_name}"
+        text += _owner_company_lines(owner)
         if can_show_contacts and owner.phone:
             text += f"\n📞 {owner.phone}"
         else:
-            stars_old = "⭐" * round(avg_rating) if avg_rating else "нет оценок"
-            text += f"\n⭐ Оценки: {stars_old} ({rating_count or 0})"
-            text += f"\n🛡 Верификация: {_verification_label(owner_profile)}"
+            text += _owner_trust_lines(owner)
             text += "\n📵 Контакты скрыты до начала сделки"
 
-    owner_company_id = owner_company.id if owner_company else None
+    owner_company_id = owner.company_id if owner else None
     return text, is_owner, owner_company_id
 
 
@@ -123,77 +123,46 @@ async def send_cargo_details(message: Message, cargo_id: int) -> bool:
             await message.answer("❌ Груз не найден")
             return False
 
-        owner = (await session.execute(select(User).where(User.id == cargo.owner_id))).scalar_one_or_none()
+        is_owner = cargo.owner_id == message.from_user.id
+        is_carrier = cargo.carrier_id == message.from_user.id if cargo.carrier_id else False
+        is_participant = is_owner or is_carrier
+        can_show_contacts = is_participant and cargo.status in {CargoStatus.IN_PROGRESS, CargoStatus.COMPLETED}
+
+        owner = await get_owner_summary(session, cargo.owner_id)
+        # Контакты перевозчика нужны только заказчику в сделке
         carrier = None
-        if cargo.carrier_id:
+        if can_show_contacts and is_owner and cargo.carrier_id:
             carrier = (await session.execute(select(User).where(User.id == cargo.carrier_id))).scalar_one_or_none()
 
-        owner_profile = await session.scalar(select(UserProfile).where(UserProfile.user_id == cargo.owner_id))
-        owner_company = await session.scalar(
-            select(CompanyDetails).where(CompanyDetails.user_id == cargo.owner_id)
-        )
+    text = _cargo_header(cargo)
 
-        avg_rating = await session.scalar(
-            select(func.avg(Rating.score)).where(Rating.to_user_id == cargo.owner_id)
-        )
-        rating_count = await session.scalar(
-            select(func.count()).select_from(Rating).where(Rating.to_user_id == cargo.owner_id)
-        )
-
-    status_map = {
-        "new": "🆕 Новый",
-        "in_progress": "🚚 В пути",
-        "completed": "✅ Завершён",
-        "cancelled": "❌ Отменён",
-        "archived": "🗄 Архив",
-        "active": "✅ Активный",
-    }
-
-    is_owner = cargo.owner_id == message.from_user.id
-    is_carrier = cargo.carrier_id == message.from_user.id if cargo.carrier_id else False
-    is_participant = is_owner or is_carrier
-    can_show_contacts = is_participant and cargo.status in {CargoStatus.IN_PROGRESS, CargoStatus.COMPLETED}
-
-    text = f"📦 <b>Груз #{cargo.id}</b>\n\n"
-    text += f"📍 {cargo.from_city} → {cargo.to_city}\n"
-    text += f"📦 {cargo.cargo_type}\n"
-    text += f"⚖️ {cargo.weight} т\n"
-    text += f"💰 {cargo.price} ₽\n"
-    text += f"📅 {cargo.load_date.strftime('%d.%m.%Y')}"
-    if cargo.load_time:
-        text += f" в {cargo.load_time}"
-    text += "\n"
-    text += f"📊 {status_map.get(cargo.status.value, cargo.status.value)}\n"
-    if cargo.comment:
-        text += f"💬 {cargo.comment}\n"
-
-    owner_name = owner.full_name if owner else "N/A"
+    owner_name = owner.display_name if owner else "N/A"
     text += f"\n👤 Заказчик: {owner_name}"
 
-    if owner_company:
-        rating = owner_company.total_rating
-        stars = "⭐" * rating + "☆" * (10 - rating)
-        text += f"\n🏢 {owner_company.company_name or 'Компания'}"
-        text += f"\n📊 Рейтинг: {stars} ({rating}/10)"
+    if owner:
+        text += _owner_company_lines(owner)
     else:
         text += "\n⚠️ Компания не зарегистрирована"
 
     if can_show_contacts and is_participant:
-        other = carrier if is_owner else owner
+        if is_owner:
+            other = (carrier.full_name, carrier.company, carrier.phone) if carrier else None
+        else:
+            other = (owner.display_name, owner.company, owner.phone) if owner else None
         if other:
-            company = f" ({other.company})" if other.company else ""
-            phone = other.phone or "не указан"
-            text += f"\n📞 Контакты: {other.full_name}{company} — {phone}"
+            name, company, phone = other
+            company = f" ({company})" if company else ""
+            phone = phone or "не указан"
+            text += f"\n📞 Контакты: {name}{company} — {phone}"
     else:
-        stars = "⭐" * round(avg_rating) if avg_rating else "нет оценок"
-        text += f"\n⭐ Оценки: {stars} ({rating_count or 0})"
-        text += f"\n🛡 Верификация: {_verification_label(owner_profile)}"
+        if owner:
+            text += _owner_trust_lines(owner)
         text += "\n📞 Контакты доступны только участникам сделки"
 
     if cargo.status == CargoStatus.IN_PROGRESS and is_participant:
         text += "\n\n🗺 Трекинг доступен в меню сделки"
 
-    owner_company_id = owner_company.id if owner_company else None
+    owner_company_id = owner.company_id if owner else None
     if cargo.status == CargoStatus.IN_PROGRESS and is_participant:
         reply_markup = deal_actions(cargo.id, is_owner)
     else:
@@ -212,13 +181,23 @@ async def cargos_handler(cb: CallbackQuery):
         pass
     await cb.answer()
 
+def _page_cursor(data: str) -> str | None:
+    """«all_cargos:<cursor>» -> cursor; без курсора — первая страница."""
+    _, _, cursor = data.partition(":")
+    return cursor or None
+
 @router.callback_query(F.data == "all_cargos")
+@router.callback_query(F.data.startswith("all_cargos:"))
 async def all_cargos(cb: CallbackQuery):
     async with async_session() as session:
-        result = await session.execute(
-            select(Cargo).where(Cargo.status == CargoStatus.NEW).limit(10)
+        page = await fetch_page(
+            session,
+            select(Cargo).where(Cargo.status == CargoStatus.NEW),
+            Cargo,
+            _page_cursor(cb.data),
+            limit=10,
         )
-        cargos = result.scalars().all()
+    cargos = page.items
     
     if not cargos:
         try:
@@ -233,26 +212,30 @@ async def all_cargos(cb: CallbackQuery):
         text += f"🔹 #{c.id}: {c.from_city} → {c.to_city}\n"
         text += f"   {c.cargo_type}, {c.weight}т, {c.price}₽\n\n"
 
+    next_cb = f"all_cargos:{page.next_cursor}" if page.has_more else None
     try:
         await cb.message.edit_text(
             text,
-            reply_markup=cargo_open_list_kb(cargos, back_cb="cargos"),
+            reply_markup=cargo_open_list_kb(cargos, back_cb="cargos", next_cb=next_cb),
         )
     except TelegramBadRequest:
         pass
     await cb.answer()
 
 @router.callback_query(F.data == "my_cargos")
+@router.callback_query(F.data.startswith("my_cargos:"))
 async def my_cargos(cb: CallbackQuery):
     async with async_session() as session:
-        result = await session.execute(
+        page = await fetch_page(
+            session,
             select(Cargo)
             .where(Cargo.owner_id == cb.from_user.id)
-            .where(Cargo.status.in_([CargoStatus.NEW, CargoStatus.IN_PROGRESS, CargoStatus.ACTIVE]))
-            .order_by(Cargo.created_at.desc())
-            .limit(15)
+            .where(Cargo.status.in_([CargoStatus.NEW, CargoStatus.IN_PROGRESS, CargoStatus.ACTIVE])),
+            Cargo,
+            _page_cursor(cb.data),
+            limit=15,
         )
-        cargos = result.scalars().all()
+    cargos = page.items
 
     if not cargos:
         try:
@@ -263,16 +246,12 @@ async def my_cargos(cb: CallbackQuery):
         return
 
     text = "📦 <b>Мои грузы</b>\n\nВыбери груз:"
+    next_cb = f"my_cargos:{page.next_cursor}" if page.has_more else None
+    kb = cargo_open_list_kb(cargos, back_cb="cargos", next_cb=next_cb)
     try:
-        await cb.message.edit_text(
-            text,
-            reply_markup=cargo_open_list_kb(cargos, back_cb="cargos"),
-        )
+        await cb.message.edit_text(text, reply_markup=kb)
     except TelegramBadRequest:
-        await cb.message.answer(
-            text,
-            reply_markup=cargo_open_list_kb(cargos, back_cb="cargos"),
-        )
+        await cb.message.answer(text, reply_markup=kb)
     await cb.answer()
 
 @router.callback_query(F.data.startswith("cargo_open_"))
@@ -523,15 +502,12 @@ async def restore_cargo(cb: CallbackQuery):
         await session.refresh(restored)
         new_id = restored.id
 
-    # Send push notifications to route subscribers
+    # Push notifications to route subscribers go through the cargo events stream
+    from src.core.services.cargo_events import publish_cargo_created
     from src.core.services.notifications import notify_subscribers
     try:
-        await notify_subscribers(restored)
-        async with async_session() as session:
-            c = await session.scalar(select(Cargo).where(Cargo.id == new_id))
-            if c:
-                c.notified_at = datetime.utcnow()
-                await session.commit()
+        if not await publish_cargo_created(new_id):
+            await notify_subscribers(restored)
     except Exception as e:
         logger.warning("Notification failed for cargo #%s: %s", new_id, e)
 
@@ -720,7 +696,7 @@ async def use_suggested_price(cb: CallbackQuery, state: FSMContext):
 
 @router.message(CargoForm.load_date)
 async def cargo_date(message: Message, state: FSMContext):
-    parsed = parse_load_datetime(message.text)
+    parsed = await parse_load_datetime(message.text)
     if not parsed:
         await message.answer(
             "❌ Формат: сегодня/завтра/послезавтра или ДД.ММ[.ГГГГ], "
@@ -801,8 +777,8 @@ async def show_confirm(message: Message, state: FSMContext):
 
 @router.callback_query(CargoForm.confirm, F.data == "yes")
 async def cargo_confirm_yes(cb: CallbackQuery, state: FSMContext):
+    from src.core.services.cargo_events import publish_cargo_created
     from src.core.services.notifications import notify_subscribers
-    from datetime import datetime as _dt
 
     data = await state.get_data()
     load_date = _load_date_from_state(data)
@@ -827,14 +803,10 @@ async def cargo_confirm_yes(cb: CallbackQuery, state: FSMContext):
     await state.clear()
     await cb.message.edit_text(f"✅ Груз #{cargo_id} опубликован!", reply_markup=main_menu())
 
-    # Send push notifications to route subscribers
+    # Push notifications to route subscribers go through the cargo events stream
     try:
-        await notify_subscribers(cargo)
-        async with async_session() as session:
-            c = await session.scalar(select(Cargo).where(Cargo.id == cargo_id))
-            if c:
-                c.notified_at = _dt.utcnow()
-                await session.commit()
+        if not await publish_cargo_created(cargo_id):
+            await notify_subscribers(cargo)
     except Exception as e:
         logger.warning("Notification failed for cargo #%s: %s", cargo_id, e)
 
@@ -873,6 +845,11 @@ async def respond_cargo(cb: CallbackQuery):
         response = CargoResponse(cargo_id=cargo_id, carrier_id=cb.from_user.id)
         session.add(response)
         await session.commit()
+
+        carrier_inn = await session.scalar(
+            select(CompanyDetails.inn).where(CompanyDetails.user_id == cb.from_user.id)
+        )
+        enqueue_legal_check(carrier_inn)
         
         cargo = await session.execute(select(Cargo).where(Cargo.id == cargo_id))
         cargo = cargo.scalar_one_or_none()
@@ -936,12 +913,8 @@ async def show_responses(cb: CallbackQuery):
             )
             open_claims_by_company = dict(claims_result.all())
 
-        ratings_result = await session.execute(
-            select(Rating.to_user_id, func.avg(Rating.score), func.count())
-            .where(Rating.to_user_id.in_(carrier_ids))
-            .group_by(Rating.to_user_id)
-        )
-        ratings = {row[0]: (row[1], row[2]) for row in ratings_result.all()}
+        ratings = await get_users_stats(session, carrier_ids)
+        legal_risks = await cached_risks(session, [c.inn for c in companies_by_user.values()])
 
     header = f"👥 <b>Отклики на груз #{cargo_id}</b>\n\n"
     try:
@@ -956,7 +929,9 @@ async def show_responses(cb: CallbackQuery):
         user = users.get(response.carrier_id)
         profile = profiles.get(response.carrier_id)
         carrier_company = companies_by_user.get(response.carrier_id)
-        rating_avg, rating_count = ratings.get(response.carrier_id, (None, 0))
+        stats = ratings.get(response.carrier_id)
+        rating_avg = stats.avg_rating if stats else None
+        rating_count = stats.rating_count if stats else 0
         status = "⏳" if response.is_accepted is None else ("✅" if response.is_accepted else "❌")
         name = user.full_name if user else "Перевозчик"
 
@@ -972,12 +947,16 @@ async def show_responses(cb: CallbackQuery):
             open_claims = open_claims_by_company.get(carrier_company.id, 0)
             if open_claims > 0:
                 text += f"🚨 Открытых претензий: {open_claims}\n"
+            if carrier_company.inn:
+                legal_risk = legal_risks.get(carrier_company.inn)
+                pending = legal_risk is None and await request_legal_check(carrier_company.inn)
+                text += risk_badge(legal_risk, pending) + "\n"
         else:
             text += "⚠️ Компания не зарегистрирована\n"
 
         stars_old = "⭐" * round(rating_avg) if rating_avg else "нет оценок"
         text += f"⭐ Оценки: {stars_old} ({rating_count})\n"
-        text += f"🛡 Верификация: {_verification_label(profile)}\n"
+        text += f"🛡 Верификация: {verification_label(profile.verification_status if profile else None)}\n"
         if response.price_offer:
             text += f"💰 Ставка: {response.price_offer:,} ₽\n"
         if response.comment:
@@ -1127,7 +1106,9 @@ async def complete_cargo(cb: CallbackQuery):
             return
         
         cargo.status = CargoStatus.COMPLETED
+        await on_cargo_completed(session, cargo)
         await session.commit()
+        await invalidate_owner_summary(cargo.owner_id, cargo.carrier_id)
         
         if cargo.carrier_id:
             try:
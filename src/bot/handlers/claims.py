@@ -7,6 +7,11 @@ from src.bot.keyboards import claim_type_kb, company_actions_kb, back_menu, main
 from src.core.database import async_session
 from src.core.models import Claim, ClaimStatus, CompanyDetails, User
 from src.core.logger import logger
+from src.core.services.legal_cache import cached_risks
+from src.core.services.legal_check import risk_badge
+from src.core.services.legal_precheck import request_legal_check
+from src.core.services.owner_summary import invalidate_owner_summary
+from src.core.services.rating import on_claim_opened
 
 router = Router()
 
@@ -43,6 +48,7 @@ async def view_company_profile(cb: CallbackQuery):
             .select_from(Claim)
             .where(Claim.to_company_id == company_id, Claim.status == ClaimStatus.OPEN)
         )
+        legal_risk = (await cached_risks(session, [company.inn])).get(company.inn)
 
     # Формируем рейтинг
     rating = company.total_rating
@@ -63,6 +69,8 @@ async def view_company_profile(cb: CallbackQuery):
 
     if company.inn:
         text += f"📋 ИНН: {company.inn}\n"
+        pending = legal_risk is None and await request_legal_check(company.inn)
+        text += risk_badge(legal_risk, pending) + "\n"
     if claims_count:
         text += f"⚠️ Претензий: {claims_count} (открытых: {open_claims})\n"
 
@@ -150,12 +158,12 @@ async def set_claim_amount(message: Message, state: FSMContext):
             status=ClaimStatus.OPEN,
         )
 
-        if to_company:
-            to_company.rating_no_claims = max(-2, to_company.rating_no_claims - 1)
-
         session.add(claim)
+        await on_claim_opened(session, claim.to_company_id)
         await session.commit()
         await session.refresh(claim)
+        if to_company:
+            await invalidate_owner_summary(to_company.user_id)
 
         logger.info("Claim #%s created by %s", claim.id, message.from_user.id)
 
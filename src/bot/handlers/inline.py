@@ -1,9 +1,8 @@
 from aiogram import Router
 from aiogram.types import InlineQuery, InlineQueryResultArticle, InputTextMessageContent
-from sqlalchemy import select
 
 from src.core.database import async_session
-from src.core.models import Cargo, CargoStatus
+from src.core.services.cargo_search import search_cargos
 from src.bot.utils import cargo_deeplink
 
 router = Router()
@@ -24,14 +23,7 @@ async def inline_search(inline: InlineQuery):
     from_city, to_city = _parse_query(inline.query)
 
     async with async_session() as session:
-        q = select(Cargo).where(Cargo.status == CargoStatus.NEW)
-        if from_city:
-            q = q.where(Cargo.from_city.ilike(f"%{from_city}%"))
-        if to_city:
-            q = q.where(Cargo.to_city.ilike(f"%{to_city}%"))
-
-        res = await session.execute(q.order_by(Cargo.created_at.desc()).limit(10))
-        cargos = res.scalars().all()
+        cargos = await search_cargos(session, from_city=from_city, to_city=to_city)
 
     results = []
     for c in cargos:
@@ -2,10 +2,13 @@ from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import Command
+from aiogram.exceptions import TelegramBadRequest
 
 from src.bot.states import LegalCheck
 from src.bot.keyboards import back_menu
-from src.core.services.legal_check import full_legal_check, format_legal_check
+from src.core.config import settings
+from src.core.services.legal_cache import cached_legal_check
+from src.core.services.legal_check import format_legal_check
 from src.core.logger import logger
 
 router = Router()
@@ -50,13 +53,20 @@ async def process_inn(message: Message, state: FSMContext):
 
 
 async def do_check(message: Message, inn: str):
-    """Выполняет проверку по ИНН и отправляет результат."""
+    """Выполняет проверку по ИНН, обновляя сообщение по мере ответов источников."""
     msg = await message.answer(
-        "⏳ Проверяю контрагента...\n\nЭто займёт 10–30 секунд"
+        "⏳ Проверяю контрагента...\n\n"
+        f"Источники опрашиваются параллельно, не дольше {settings.legal_check_deadline:.0f} секунд"
     )
 
+    async def show_progress(partial: dict):
+        try:
+            await msg.edit_text(format_legal_check(partial))
+        except TelegramBadRequest:
+            pass
+
     try:
-        result = await full_legal_check(inn)
+        result = await cached_legal_check(inn, on_update=show_progress)
         text = format_legal_check(result)
         await msg.edit_text(text, reply_markup=back_menu())
     except Exception as e:
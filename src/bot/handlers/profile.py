@@ -8,8 +8,10 @@ from src.bot.states import ProfileEdit
 from src.bot.keyboards import main_menu, skip_kb, profile_menu
 from src.bot.utils import cargo_deeplink
 from src.core.database import async_session
-from src.core.models import User, Cargo, CargoStatus, Rating, UserProfile, UserRole, VerificationStatus
+from src.core.models import User, Cargo, CargoStatus, UserProfile, UserRole, VerificationStatus
 from src.core.logger import logger
+from src.core.services.owner_summary import invalidate_owner_summary
+from src.core.services.user_stats import get_user_stats
 
 router = Router()
 
@@ -37,12 +39,7 @@ async def show_profile(cb: CallbackQuery):
             await cb.answer("❌ Профиль не найден", show_alert=True)
             return
 
-        avg_rating = await session.scalar(
-            select(func.avg(Rating.score)).where(Rating.to_user_id == cb.from_user.id)
-        )
-        rating_count = await session.scalar(
-            select(func.count()).select_from(Rating).where(Rating.to_user_id == cb.from_user.id)
-        )
+        stats = await get_user_stats(session, cb.from_user.id)
 
         cargos_count = await session.scalar(
             select(func.count()).select_from(Cargo).where(Cargo.owner_id == cb.from_user.id)
@@ -55,7 +52,7 @@ async def show_profile(cb: CallbackQuery):
 
         profile = await session.scalar(select(UserProfile).where(UserProfile.user_id == cb.from_user.id))
 
-    stars = "⭐" * round(avg_rating) if avg_rating else "нет оценок"
+    stars = "⭐" * round(stats.avg_rating) if stats.avg_rating else "нет оценок"
 
     text = f"👤 <b>Мой профиль</b>\n\n"
     text += f"🆔 <code>{user.id}</code>\n"
@@ -72,7 +69,7 @@ async def show_profile(cb: CallbackQuery):
     text += f"🏷 Роль: {role_label}\n"
     text += f"🧾 ИНН: {inn_value}\n"
     text += f"🛡 Верификация: {ver_label}\n\n"
-    text += f"⭐ Рейтинг: {stars} ({rating_count})\n"
+    text += f"⭐ Рейтинг: {stars} ({stats.rating_count})\n"
     text += f"📦 Грузов: {cargos_count} (завершено: {completed})\n"
     text += f"📅 С нами с: {user.created_at.strftime('%d.%m.%Y')}"
 
@@ -98,6 +95,7 @@ async def save_phone(message: Message, state: FSMContext):
         if user:
             user.phone = phone
             await session.commit()
+    await invalidate_owner_summary(message.from_user.id)
     
     await state.clear()
     await message.answer(f"✅ Телефон сохранён: {phone}", reply_markup=main_menu())
@@ -119,6 +117,7 @@ async def save_company(message: Message, state: FSMContext):
         if user:
             user.company = company
             await session.commit()
+    await invalidate_owner_summary(message.from_user.id)
     
     await state.clear()
     await message.answer(f"✅ Компания: {company}", reply_markup=main_menu())
@@ -5,20 +5,13 @@ from sqlalchemy import select, func, or_, and_
 from src.bot.states import RateForm
 from src.bot.keyboards import main_menu, skip_kb
 from src.core.database import async_session
-from src.core.models import Rating, Cargo, CargoStatus, User, UserProfile, VerificationStatus
+from src.core.models import Rating, Cargo, CargoStatus, User, UserProfile
 from src.core.logger import logger
+from src.core.services.owner_summary import invalidate_owner_summary, verification_label
+from src.core.services.user_stats import get_user_stats, record_rating
 
 router = Router()
 
-def _verification_label(profile: UserProfile | None) -> str:
-    if not profile:
-        return "обычный"
-    if profile.verification_status == VerificationStatus.VERIFIED:
-        return "верифицирован"
-    if profile.verification_status == VerificationStatus.CONFIRMED:
-        return "подтверждён"
-    return "обычный"
-
 @router.message(F.text.startswith("/rate_"))
 async def start_rate(message: Message, state: FSMContext):
     try:
@@ -95,8 +88,9 @@ async def save_rating(message: Message, state: FSMContext):
             score=data['score'],
             comment=data.get('comment')
         )
-        session.add(rating)
+        await record_rating(session, rating)
         await session.commit()
+    await invalidate_owner_summary(data['to_user_id'])
     
     stars = "⭐" * data['score']
     await state.clear()
@@ -118,12 +112,7 @@ async def view_user(message: Message):
             await message.answer("❌ Пользователь не найден")
             return
         
-        avg_rating = await session.scalar(
-            select(func.avg(Rating.score)).where(Rating.to_user_id == user_id)
-        )
-        rating_count = await session.scalar(
-            select(func.count()).select_from(Rating).where(Rating.to_user_id == user_id)
-        )
+        stats = await get_user_stats(session, user_id)
 
         profile = await session.scalar(select(UserProfile).where(UserProfile.user_id == user_id))
 
@@ -139,19 +128,19 @@ async def view_user(message: Message):
             )
         )
     
-    stars = "⭐" * round(avg_rating) if avg_rating else "нет оценок"
+    stars = "⭐" * round(stats.avg_rating) if stats.avg_rating else "нет оценок"
     
     text = f"👤 <b>{user.full_name}</b>\n\n"
     text += f"🆔 <code>{user.id}</code>\n"
     if user.username:
         text += f"📱 @{user.username}\n"
-    text += f"🛡 Верификация: {_verification_label(profile)}\n"
+    text += f"🛡 Верификация: {verification_label(profile.verification_status if profile else None)}\n"
     can_show_phone = user_id == message.from_user.id or bool(has_deal)
     if can_show_phone and user.phone:
         text += f"📞 {user.phone}\n"
     else:
         text += "📞 Контакты скрыты до сделки\n"
     text += f"\n⭐ Рейтинг: {stars}\n"
-    text += f"📊 Оценок: {rating_count}"
+    text += f"📊 Оценок: {stats.rating_count}"
     
     await message.answer(text)
@@ -50,6 +50,7 @@ async def cmd_reminders(message: Message):
             select(Reminder)
             .where(Reminder.user_id == message.from_user.id)
             .where(Reminder.is_sent == False)
+            .where(Reminder.failed_at.is_(None))
             .order_by(Reminder.remind_at)
             .limit(10)
         )
@@ -5,12 +5,14 @@ from aiogram.fsm.context import FSMContext
 from aiogram.exceptions import TelegramBadRequest
 from sqlalchemy import select, or_
 from src.bot.states import SearchCargo, SubscribeRoute
-from src.bot.keyboards import cargos_menu, subscriptions_menu, city_kb, main_menu
+from src.bot.keyboards import cargos_menu, subscriptions_menu, city_kb, main_menu, search_results_kb
 from src.bot.utils import cargo_deeplink
-from src.bot.utils.cities import city_suggest
+from src.core.cities import city_suggest
 from src.core.ai import parse_city, parse_cargo_search
 from src.core.database import async_session
-from src.core.models import Cargo, CargoStatus, RouteSubscription
+from src.core.models import RouteSubscription
+from src.core.services.cargo_search import search_cargos, search_cargos_page
+from src.core.services.route_index import route_index
 from src.core.logger import logger
 import re
 
@@ -53,27 +55,14 @@ async def smart_find(message: Message):
         return
 
     async with async_session() as session:
-        query = select(Cargo).where(Cargo.status == CargoStatus.NEW)
-
-        if params.get("from_city"):
-            query = query.where(Cargo.from_city.ilike(f"%{params['from_city']}%"))
-
-        if params.get("to_city"):
-            query = query.where(Cargo.to_city.ilike(f"%{params['to_city']}%"))
-
-        if params.get("min_weight") is not None:
-            query = query.where(Cargo.weight >= params["min_weight"])
-
-        if params.get("max_weight") is not None:
-            query = query.where(Cargo.weight <= params["max_weight"])
-
-        if params.get("max_price") is not None:
-            query = query.where(Cargo.price <= params["max_price"])
-
-        result = await session.execute(
-            query.order_by(Cargo.created_at.desc()).limit(10)
+        cargos = await search_cargos(
+            session,
+            from_city=params.get("from_city"),
+            to_city=params.get("to_city"),
+            min_weight=params.get("min_weight"),
+            max_weight=params.get("max_weight"),
+            max_price=params.get("max_price"),
         )
-        cargos = result.scalars().all()
 
     filters = []
     if params.get("from_city"):
@@ -188,29 +177,37 @@ async def search_to_select(cb: CallbackQuery, state: FSMContext):
 
 async def do_search(message: Message, state: FSMContext):
     data = await state.get_data()
-    from_city = data.get('from_city')
-    to_city = data.get('to_city')
-    
-    async with async_session() as session:
-        query = select(Cargo).where(Cargo.status == CargoStatus.NEW)
-        if from_city:
-            query = query.where(Cargo.from_city.ilike(f"%{from_city}%"))
-        if to_city:
-            query = query.where(Cargo.to_city.ilike(f"%{to_city}%"))
-        result = await session.execute(query.limit(10))
-        cargos = result.scalars().all()
+    filters = {"from_city": data.get('from_city'), "to_city": data.get('to_city')}
     
     await state.clear()
+    # Фильтры остаются в данных FSM для кнопки «Ещё» (search_more:<cursor>)
+    await state.update_data(search_filters=filters)
+    await _send_search_page(message, filters)
+
+async def _send_search_page(message: Message, filters: dict, cursor: str | None = None):
+    async with async_session() as session:
+        page = await search_cargos_page(session, cursor=cursor, **filters)
+    cargos = page.items
     
     if not cargos:
         await message.answer("📭 Ничего не нашли. Попробуй другие параметры.", reply_markup=cargos_menu())
         return
     
-    text = f"🔍 Найдено ({len(cargos)}):\n\n"
+    text = f"🔍 {'Ещё' if cursor else 'Найдено'} ({len(cargos)}):\n\n"
     for c in cargos:
         link = cargo_deeplink(c.id)
         text += f"🔹 {c.from_city} → {c.to_city}\n   {c.weight}т, {c.price}₽ {link}\n\n"
-    await message.answer(text, reply_markup=cargos_menu())
+    next_cb = f"search_more:{page.next_cursor}" if page.has_more else None
+    await message.answer(text, reply_markup=search_results_kb(next_cb))
+
+@router.callback_query(F.data.startswith("search_more:"))
+async def search_more(cb: CallbackQuery, state: FSMContext):
+    filters = (await state.get_data()).get("search_filters")
+    if filters is None:
+        await cb.answer("Поиск устарел — начни заново", show_alert=True)
+        return
+    await cb.answer()
+    await _send_search_page(cb.message, filters, cb.data.split(":", 1)[1])
 
 @router.callback_query(F.data == "subscriptions")
 async def subscriptions_handler(cb: CallbackQuery):
@@ -294,9 +291,10 @@ async def sub_to_select(cb: CallbackQuery, state: FSMContext):
 async def save_subscription(message: Message, state: FSMContext):
     data = await state.get_data()
     async with async_session() as session:
-        sub = RouteSubscription(user_id=message.chat.id, from_city=data.get('from_city'), to_city=data.get('to_city'))
+        sub = RouteSubscription(user_id=message.chat.id, from_city=data.get('from_city'), to_city=data.get('to_city'), is_active=True)
         session.add(sub)
-    await session.commit()
+        await session.commit()
+        route_index.add(sub)
     await state.clear()
     await message.answer(
         f"✅ Подписка сохранена: {data.get('from_city')} → {data.get('to_city')}",
@@ -330,4 +328,5 @@ async def unsubscribe(message: Message):
         if sub:
             sub.is_active = False
             await session.commit()
+            route_index.remove(sub.id)
             await message.answer("✅ Удалено", reply_markup=subscriptions_menu())
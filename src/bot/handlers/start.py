@@ -13,6 +13,7 @@ from src.bot.keyboards import main_menu, role_kb, contact_request_kb, legal_type
 from src.bot.handlers.cargo import send_cargo_details
 from src.core.database import async_session
 from src.core.models import User, Reminder, UserProfile, UserRole
+from src.core.services.owner_summary import invalidate_owner_summary
 from src.bot.states import Onboarding
 
 router = Router()
@@ -147,6 +148,9 @@ async def cmd_start(message: Message, state: FSMContext):
 
     async with async_session() as session:
         user = await session.get(User, message.from_user.id)
+        if user and user.bot_blocked_at:
+            user.bot_blocked_at = None
+            await session.commit()
 
     if user and user.is_verified:
         await state.clear()
@@ -213,6 +217,7 @@ async def onboarding_contact(message: Message, state: FSMContext):
             session.add(user)
         user.phone = phone
         await session.commit()
+    await invalidate_owner_summary(message.from_user.id)
 
     data = await state.get_data()
     role_value = data.get("role")
@@ -307,6 +312,7 @@ async def onboarding_company(message: Message, state: FSMContext):
             session.add(user)
         user.company = company
         await session.commit()
+    await invalidate_owner_summary(message.from_user.id)
 
     await state.clear()
     await upsert_text(
@@ -357,6 +363,7 @@ async def cmd_me(message: Message):
             select(Reminder)
             .where(Reminder.user_id == message.from_user.id)
             .where(Reminder.is_sent == False)
+            .where(Reminder.failed_at.is_(None))
         )
         rem_count = len(reminders.scalars().all())
 
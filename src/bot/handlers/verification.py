@@ -6,6 +6,7 @@ from src.bot.states import LegalVerification
 from src.bot.keyboards import skip_kb, profile_menu
 from src.core.database import async_session
 from src.core.models import User, UserProfile, VerificationStatus
+from src.core.services.owner_summary import invalidate_owner_summary
 
 router = Router()
 
@@ -105,6 +106,7 @@ async def finalize_verification(
                 user.trust_score = min(100, user.trust_score + 10)
 
         await session.commit()
+    await invalidate_owner_summary(message.from_user.id)
 
     await state.clear()
     await message.answer(
@@ -99,8 +99,12 @@ def delete_confirm_kb(cargo_id: int):
     b.row(InlineKeyboardButton(text="❌ Нет", callback_data=f"delete_no_{cargo_id}"))
     return b.as_markup()
 
-def cargo_open_list_kb(cargos, back_cb: str = "cargos") -> InlineKeyboardMarkup:
-    """Список грузов: кнопки «Открыть #id» + Назад."""
+def cargo_open_list_kb(
+    cargos,
+    back_cb: str = "cargos",
+    next_cb: str | None = None,
+) -> InlineKeyboardMarkup:
+    """Список грузов: кнопки «Открыть #id», «Ещё» (если next_cb) + Назад."""
     kb = InlineKeyboardMarkup(inline_keyboard=[])
 
     for c in cargos:
@@ -111,12 +115,24 @@ def cargo_open_list_kb(cargos, back_cb: str = "cargos") -> InlineKeyboardMarkup:
             )
         ])
 
+    if next_cb:
+        kb.inline_keyboard.append([
+            InlineKeyboardButton(text="Ещё ▶️", callback_data=next_cb)
+        ])
     kb.inline_keyboard.append([
         InlineKeyboardButton(text="⬅️ Назад", callback_data=back_cb)
     ])
     return kb
 
 
+def search_results_kb(next_cb: str | None = None) -> InlineKeyboardMarkup:
+    """Меню грузов; сверху «Ещё», если у результатов поиска есть следующая страница."""
+    kb = cargos_menu()
+    if next_cb:
+        kb.inline_keyboard.insert(0, [InlineKeyboardButton(text="Ещё ▶️", callback_data=next_cb)])
+    return kb
+
+
 def cargos_menu():
     b = InlineKeyboardBuilder()
     b.row(InlineKeyboardButton(text="📋 Все грузы", callback_data="all_cargos"))
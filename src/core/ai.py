@@ -1,75 +1,61 @@
 from datetime import datetime, timedelta
-from groq import Groq
-from src.core.config import settings
+from src.core.ai_cache import city_cache, search_cache
+from src.core.alias_matcher import AliasMatcher
+from src.core.cities import alias_cities, resolve_city
+from src.core.geo import distance_km as city_distance_km
+from src.core.llm import llm
 from src.core.logger import logger
 import json
-import math
 import re
 
-client = Groq(api_key=settings.groq_api_key) if settings.groq_api_key else None
-
 # Паттерн времени ЧЧ:ММ или ЧЧ.ММ
 _TIME_RE = re.compile(r"(?:в\s+)?(\d{1,2})[.:](\d{2})\s*$", re.I)
 
-CITY_ALIASES = {
-    "мск": "Москва", "москва": "Москва",
-    "спб": "Санкт-Петербург", "питер": "Санкт-Петербург", "петербург": "Санкт-Петербург",
-    "нск": "Новосибирск", "новосиб": "Новосибирск",
-    "екб": "Екатеринбург", "ёбург": "Екатеринбург",
-    "казань": "Казань", "кзн": "Казань",
-    "нн": "Нижний Новгород", "нижний": "Нижний Новгород",
-    "самара": "Самара", "самар": "Самара",
-    "ростов": "Ростов-на-Дону", "рнд": "Ростов-на-Дону",
-    "уфа": "Уфа",
-    "красноярск": "Красноярск", "крск": "Красноярск",
-    "воронеж": "Воронеж", "врн": "Воронеж",
-    "пермь": "Пермь",
-    "волгоград": "Волгоград",
-    "краснодар": "Краснодар", "крд": "Краснодар",
-    "челябинск": "Челябинск", "челяба": "Челябинск",
-    "омск": "Омск",
-    "тюмень": "Тюмень",
-}
+_ALIAS_MATCHER = AliasMatcher(alias_cities())
+_FROM_PREFIX_RE = re.compile(r"(из|от)\s+$")
+_TO_PREFIX_RE = re.compile(r"(в|до|к)\s+$")
 
 async def parse_city(text: str) -> str | None:
     """Распознать город из текста"""
     text_lower = text.lower().strip()
 
-    # Сначала проверяем алиасы
-    if text_lower in CITY_ALIASES:
-        return CITY_ALIASES[text_lower]
+    # Точное название, затем алиас — тот же порядок, что у city_key
+    # («нижний тагил» — не алиас «нижний», «Ростов» — не Ростов-на-Дону)
+    name, _ = resolve_city(text)
+    if name:
+        return name
 
-    # Проверяем частичное совпадение
-    for alias, city in CITY_ALIASES.items():
-        if alias in text_lower or text_lower in alias:
-            return city
+    # Проверяем частичное совпадение: алиас в тексте или текст — часть алиаса
+    city = _ALIAS_MATCHER.first(text_lower) or _ALIAS_MATCHER.by_fragment(text_lower)
+    if city:
+        return city
 
-    # Если не нашли — спрашиваем AI
-    if not client:
+    # Если не нашли — кэш ответов AI, затем AI
+    if not llm.enabled:
         return text.title()
-
-    try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{
-                "role": "system",
-                "content": "Ты помощник для распознавания городов России. Пользователь вводит название города, возможно с опечаткой или сокращением. Верни только название города с большой буквы. Если не можешь распознать — верни исходный текст."
-            }, {
-                "role": "user",
-                "content": f"Распознай город: {text}"
-            }],
-            max_tokens=50,
-            temperature=0
-        )
-        result = response.choices[0].message.content.strip()
-        logger.info(f"AI parsed city: {text} -> {result}")
-        return result
-    except Exception as e:
-        logger.error(f"AI city parse error: {e}")
+    cached = await city_cache.get(text)
+    if cached is not None:
+        return cached
+
+    result = await llm.complete(
+        [{
+            "role": "system",
+            "content": "Ты помощник для распознавания городов России. Пользователь вводит название города, возможно с опечаткой или сокращением. Верни только название города с большой буквы. Если не можешь распознать — верни исходный текст."
+        }, {
+            "role": "user",
+            "content": f"Распознай город: {text}"
+        }],
+        max_tokens=50,
+        temperature=0
+    )
+    if not result:
         return text.title()
+    logger.info(f"AI parsed city: {text} -> {result}")
+    await city_cache.set(text, result)
+    return result
 
 
-def parse_load_datetime(text: str):
+async def parse_load_datetime(text: str):
     """
     Парсит дату и опционально время из текста.
     Примеры: завтра, завтра в 10:00, послезавтра 14:00, 15.02.2026, 15.02 9:00.
@@ -108,9 +94,9 @@ def parse_load_datetime(text: str):
         pass
 
     # AI fallback: «завтра утром», «в понедельник», «20 числа»
-    if client:
+    if llm.enabled:
         try:
-            result = _parse_load_datetime_ai(text)
+            result = await _parse_load_datetime_ai(text)
             if result:
                 return result
         except Exception as e:
@@ -119,12 +105,11 @@ def parse_load_datetime(text: str):
     return None
 
 
-def _parse_load_datetime_ai(text: str):
+async def _parse_load_datetime_ai(text: str):
     """AI извлекает дату и время из естественной фразы."""
     today_str = datetime.now().strftime("%d.%m.%Y")
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[
+    out = await llm.complete(
+        [
             {
                 "role": "system",
                 "content": f"""Из фразы пользователя извлеки дату загрузки и время.
@@ -136,8 +121,7 @@ def _parse_load_datetime_ai(text: str):
         max_tokens=80,
         temperature=0,
     )
-    out = response.choices[0].message.content.strip()
-    if "{" not in out or "}" not in out:
+    if not out or "{" not in out or "}" not in out:
         return None
     try:
         j = json.loads(out[out.find("{") : out.rfind("}") + 1])
@@ -155,54 +139,9 @@ def _parse_load_datetime_ai(text: str):
         return (d, load_time_str)
     except (ValueError, KeyError, TypeError):
         return None
-    """Парсит запрос на груз из естественного языка"""
-    if not client:
-        return None
-
-    try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{
-                "role": "system",
-                "content": """Ты помощник для парсинга заявок на грузоперевозки. 
-Извлеки из текста: откуда, куда, вес (тонны), цену (рубли), тип груза.
-Верни JSON: {\"from_city\": \"...\", \"to_city\": \"...\", \"weight\": число, \"price\": число, \"cargo_type\": \"...\"}
-Если чего-то нет — не включай в JSON. Города пиши полностью с большой буквы."""
-            }, {
-                "role": "user",
-                "content": text
-            }],
-            max_tokens=200,
-            temperature=0
-        )
-        result = response.choices[0].message.content.strip()
-        # Извлекаем JSON
-        if "{" in result and "}" in result:
-            json_str = result[result.find("{"):result.rfind("}")+1]
-            data = json.loads(json_str)
-            logger.info(f"AI parsed cargo: {text} -> {data}")
-            return data
-    except Exception as e:
-        logger.error(f"AI cargo parse error: {e}")
-    return None
 
-async def parse_cargo_search(text: str) -> dict | None:
-    """
-    Парсит поисковый запрос из естественного языка.
-    Примеры:
-    - "москва питер" → {from_city: "Москва", to_city: "Санкт-Петербург"}
-    - "мск спб 20т" → {from_city: "Москва", to_city: "Санкт-Петербург", min_weight: 20, max_weight: 20}
-    - "из казани 10-15 тонн до 100000" → {from_city: "Казань", min_weight: 10, max_weight: 15, max_price: 100000}
-    """
-    if not client:
-        return _parse_search_simple(text)
 
-    try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{
-                "role": "system",
-                "content": """Ты парсер поисковых запросов для грузоперевозок.
+_SEARCH_PROMPT = """Ты парсер поисковых запросов для грузоперевозок.
 Извлеки параметры из текста. Верни ТОЛЬКО JSON без пояснений:
 {
   "from_city": "Город отправления",
@@ -223,24 +162,40 @@ async def parse_cargo_search(text: str) -> dict | None:
 - "50к" = 50000
 - Если параметр не указан — НЕ включай его в JSON
 - Если указан только один город без предлогов — это from_city"""
-            }, {
-                "role": "user",
-                "content": text
-            }],
-            max_tokens=150,
-            temperature=0
-        )
 
-        result = response.choices[0].message.content.strip()
-        logger.info(f"AI search parse: {text} -> {result}")
 
-        if "{" in result and "}" in result:
-            json_str = result[result.find("{"):result.rfind("}") + 1]
-            data = json.loads(json_str)
-            return _normalize_search_params(data)
+async def parse_cargo_search(text: str) -> dict | None:
+    """
+    Парсит поисковый запрос из естественного языка.
+    Примеры:
+    - "москва питер" → {from_city: "Москва", to_city: "Санкт-Петербург"}
+    - "мск спб 20т" → {from_city: "Москва", to_city: "Санкт-Петербург", min_weight: 20, max_weight: 20}
+    - "из казани 10-15 тонн до 100000" → {from_city: "Казань", min_weight: 10, max_weight: 15, max_price: 100000}
+    """
+    if not llm.enabled:
+        return _parse_search_simple(text)
+    cached = await search_cache.get(text)
+    if cached is not None:
+        return dict(cached)
 
-    except Exception as e:
-        logger.error(f"AI search parse error: {e}")
+    result = await llm.complete(
+        [
+            {"role": "system", "content": _SEARCH_PROMPT},
+            {"role": "user", "content": text},
+        ],
+        max_tokens=150,
+        temperature=0,
+    )
+    if result:
+        logger.info(f"AI search parse: {text} -> {result}")
+        if "{" in result and "}" in result:
+            try:
+                json_str = result[result.find("{"):result.rfind("}") + 1]
+                params = _normalize_search_params(json.loads(json_str))
+                await search_cache.set(text, params)
+                return params
+            except Exception as e:
+                logger.error(f"AI search parse error: {e}")
 
     return _parse_search_simple(text)
 
@@ -278,23 +233,18 @@ def _parse_search_simple(text: str) -> dict | None:
     text_lower = (text or "").lower()
 
     matches: list[tuple[int, str, str | None]] = []
-    for alias, city in CITY_ALIASES.items():
-        alias_key = alias.lower()
-        idx = text_lower.find(alias_key)
-        if idx == -1 and len(alias_key) > 4:
-            idx = text_lower.find(alias_key[:-1])
-        if idx != -1:
-            prefix = text_lower[max(0, idx - 12):idx]
-            role = None
-            if re.search(r"(из|от)\s+$", prefix):
-                role = "from"
-            elif re.search(r"(в|до|к)\s+$", prefix):
-                role = "to"
-            matches.append((idx, city, role))
+    for hit in _ALIAS_MATCHER.finditer(text_lower):
+        prefix = text_lower[max(0, hit.start - 12):hit.start]
+        role = None
+        if _FROM_PREFIX_RE.search(prefix):
+            role = "from"
+        elif _TO_PREFIX_RE.search(prefix):
+            role = "to"
+        matches.append((hit.start, hit.city, role))
 
     has_explicit_from = False
     has_explicit_to = False
-    for _, city, role in sorted(matches, key=lambda x: x[0]):
+    for _, city, role in matches:
         if role == "from" and not result.get("from_city"):
             result["from_city"] = city
             has_explicit_from = True
@@ -302,7 +252,7 @@ def _parse_search_simple(text: str) -> dict | None:
             result["to_city"] = city
             has_explicit_to = True
 
-    for _, city, _role in sorted(matches, key=lambda x: x[0]):
+    for _, city, _role in matches:
         if not result.get("from_city"):
             if has_explicit_to and not has_explicit_from:
                 continue
@@ -341,27 +291,25 @@ def _parse_search_simple(text: str) -> dict | None:
 
 async def estimate_price(from_city: str, to_city: str, weight: float) -> int | None:
     """Оценка цены перевозки"""
-    if not client:
-        return None
-
-    try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{
-                "role": "system",
-                "content": """Ты эксперт по грузоперевозкам в России. 
+    result = await llm.complete(
+        [{
+            "role": "system",
+            "content": """Ты эксперт по грузоперевозкам в России. 
 Оцени примерную стоимость перевозки груза.
 Учитывай: расстояние между городами, вес груза.
 Средняя ставка: 30-50 руб/км для фуры, минимум 5000 руб.
 Верни только число в рублях, без пояснений."""
-            }, {
-                "role": "user",
-                "content": f"Перевозка {weight} тонн из {from_city} в {to_city}"
-            }],
-            max_tokens=50,
-            temperature=0.3
-        )
-        result = response.choices[0].message.content.strip()
+        }, {
+            "role": "user",
+            "content": f"Перевозка {weight} тонн из {from_city} в {to_city}"
+        }],
+        max_tokens=50,
+        temperature=0.3
+    )
+    if not result:
+        return None
+
+    try:
         # Извлекаем число
         price = int(''.join(filter(str.isdigit, result)))
         logger.info(f"AI estimated price: {from_city}->{to_city}, {weight}t = {price}₽")
@@ -370,59 +318,12 @@ async def estimate_price(from_city: str, to_city: str, weight: float) -> int | N
         logger.error(f"AI price estimate error: {e}")
     return None
 
-def _normalize_city_key(text: str) -> str:
-    t = (text or "").strip().lower()
-    if not t:
-        return ""
-    t = t.replace("ё", "е")
-    t = t.replace("-", " ")
-    t = re.sub(r"[^0-9a-zа-я\s]", " ", t)
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
-
-CITY_COORDS: dict[str, tuple[float, float]] = {
-    "москва": (55.7558, 37.6173),
-    "санкт петербург": (59.9311, 30.3609),
-    "новосибирск": (55.0084, 82.9357),
-    "екатеринбург": (56.8389, 60.6057),
-    "нижний новгород": (56.2965, 43.9361),
-    "казань": (55.7961, 49.1064),
-    "самара": (53.1959, 50.1002),
-    "омск": (54.9885, 73.3242),
-    "ростов на дону": (47.2357, 39.7015),
-    "уфа": (54.7388, 55.9721),
-    "красноярск": (56.0097, 92.7917),
-    "пермь": (58.0105, 56.2502),
-    "воронеж": (51.6608, 39.2003),
-    "волгоград": (48.7080, 44.5133),
-    "краснодар": (45.0355, 38.9753),
-    "челябинск": (55.1644, 61.4368),
-    "тюмень": (57.1530, 65.5343),
-    "симферополь": (44.9521, 34.1024),
-    "мурманск": (68.9585, 33.0827),
-    "ставрополь": (45.0428, 41.9734),
-    "набережные челны": (55.7436, 52.3958),
-}
-
-def _haversine_km(a: tuple[float, float], b: tuple[float, float]) -> float:
-    lat1, lon1 = a
-    lat2, lon2 = b
-    r = 6371.0
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    lat1 = math.radians(lat1)
-    lat2 = math.radians(lat2)
-    h = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
-    return 2 * r * math.asin(math.sqrt(h))
-
 def estimate_price_local(from_city: str, to_city: str, weight: float) -> dict | None:
     """Локальная оценка цены по расстоянию (если известны координаты городов)"""
-    a = CITY_COORDS.get(_normalize_city_key(from_city))
-    b = CITY_COORDS.get(_normalize_city_key(to_city))
-    if not a or not b:
+    distance = city_distance_km(from_city, to_city)
+    if distance is None:
         return None
 
-    distance = _haversine_km(a, b)
     distance_km = max(1, int(distance))
 
     rate_per_km = 35 + min(weight, 20) * 0.5
@@ -440,59 +341,83 @@ def estimate_price_local(from_city: str, to_city: str, weight: float) -> dict |
         "max_price": max_price,
     }
 
+def _adjust_for_weight(base_price: int, base_weight: float, weight: float) -> int:
+    """Цена полной машины (base_weight) -> цена для weight тонн."""
+    if weight >= base_weight:
+        return base_price
+    if weight >= 10:
+        return int(base_price * (0.6 + 0.02 * weight))
+    if weight >= 5:
+        return int(base_price * (0.4 + 0.02 * weight))
+    return int(base_price * 0.4)
+
+# Минимум для маленькой загрузки — доля цены машины медианного веса
+# (как нижняя ступень _adjust_for_weight)
+MIN_LOAD_SHARE = 0.4
+
+def _quote_for_weight(stats, weight: float) -> tuple[int, int, int]:
+    """(цена, низ, верх) по статистике маршрута для weight тонн.
+
+    Одна модель на любой вес: перцентиль ₽/т × вес, но не меньше
+    MIN_LOAD_SHARE от цены медианной машины. Оба слагаемых непрерывны и не
+    убывают по весу — цена тоже, без скачков на границах.
+    """
+    weight = max(weight, 0)
+
+    def quote(per_ton: float, price: int) -> int:
+        return int(max(per_ton * weight, MIN_LOAD_SHARE * price))
+
+    return (
+        quote(stats.per_ton_p50, stats.price_p50),
+        quote(stats.per_ton_p25, stats.price_p25),
+        quote(stats.per_ton_p75, stats.price_p75),
+    )
+
 async def get_market_price(from_city: str, to_city: str, weight: float, cargo_type: str = "тент") -> dict | None:
-    """Получить рыночную цену с учётом веса"""
-    from src.core.database import async_session
-    from src.core.models import MarketPrice
-    from sqlalchemy import select
-
-    cargo_type_key = (cargo_type or "тент").strip()
-
-    async with async_session() as session:
-        price_data = await session.scalar(
-            select(MarketPrice).where(
-                MarketPrice.from_city == from_city,
-                MarketPrice.to_city == to_city,
-                MarketPrice.cargo_type.ilike(f"%{cargo_type_key[:3]}%"),
-            )
-        )
+    """Получить рыночную цену с учётом веса (из price_book, без запроса в БД)"""
+    from src.core.services.price_book import price_book
 
-        if not price_data:
-            price_data = await session.scalar(
-                select(MarketPrice).where(
-                    MarketPrice.from_city == to_city,
-                    MarketPrice.to_city == from_city,
-                    MarketPrice.cargo_type.ilike(f"%{cargo_type_key[:3]}%"),
-                )
-            )
-
-        if not price_data:
-            return None
-
-        base_price = price_data.price
-        base_weight = price_data.weight or 20.0
-
-        if weight >= base_weight:
-            adjusted_price = base_price
-        elif weight >= 10:
-            adjusted_price = int(base_price * (0.6 + 0.02 * weight))
-        elif weight >= 5:
-            adjusted_price = int(base_price * (0.4 + 0.02 * weight))
-        else:
-            adjusted_price = int(base_price * 0.4)
+    await price_book.ensure_loaded()
+    price_data = price_book.lookup(from_city, to_city, cargo_type)
+    if not price_data:
+        return None
+
+    base_price = price_data.price
+    base_weight = price_data.weight
+    adjusted_price = _adjust_for_weight(base_price, base_weight, weight)
 
+    return {
+        "market_price": base_price,
+        "adjusted_price": adjusted_price,
+        "base_weight": base_weight,
+        "your_weight": weight,
+        "source": price_data.source,
+        "updated": price_data.updated_at.strftime("%d.%m.%Y"),
+        "cargo_type": price_data.cargo_type,
+    }
+
+async def estimate_price_smart(from_city: str, to_city: str, weight: float, cargo_type: str = "тент") -> dict:
+    """Умная оценка цены: сначала наши сделки, потом рынок, потом расчёт"""
+    from src.core.services.route_stats import route_stats
+
+    stats = route_stats.lookup(from_city, to_city, cargo_type)
+    if stats:
+        # ₽/т сделок маршрута × вес (с минимумом для маленькой загрузки)
+        price, low, high = _quote_for_weight(stats, weight)
+        details = (
+            f"📈 По сделкам в боте ({stats.deals})\n"
+            f"• Медиана: {stats.price_p50:,} ₽ за ~{stats.weight_p50:g}т\n"
+            f"• За {weight}т: {low:,} — {high:,} ₽"
+        )
+        if stats.per_km_p50:
+            details += f"\n• Ставка: ~{int(stats.per_km_p50)} ₽/км"
         return {
-            "market_price": base_price,
-            "adjusted_price": adjusted_price,
-            "base_weight": base_weight,
-            "your_weight": weight,
-            "source": price_data.source,
-            "updated": price_data.updated_at.strftime("%d.%m.%Y"),
-            "cargo_type": price_data.cargo_type,
+            "price": price,
+            "source": "deals",
+            "deals": stats.deals,
+            "details": details,
         }
 
-async def estimate_price_smart(from_city: str, to_city: str, weight: float, cargo_type: str = "тент") -> dict:
-    """Умная оценка цены: сначала рынок, потом расчёт"""
     market = await get_market_price(from_city, to_city, weight, cargo_type)
     if market:
         return {
@@ -529,25 +454,20 @@ async def estimate_price_smart(from_city: str, to_city: str, weight: float, carg
 
 async def chat_response(user_message: str, context: str = "") -> str:
     """Ответ на вопрос пользователя"""
-    if not client:
+    if not llm.enabled:
         return "AI временно недоступен"
 
-    try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{
-                "role": "system",
-                "content": f"""Ты помощник в боте грузоперевозок. Отвечай кратко и по делу на русском языке.
+    result = await llm.complete(
+        [{
+            "role": "system",
+            "content": f"""Ты помощник в боте грузоперевозок. Отвечай кратко и по делу на русском языке.
 {context}
 Если вопрос не по теме — вежливо направь к функциям бота."""
-            }, {
-                "role": "user",
-                "content": user_message
-            }],
-            max_tokens=300,
-            temperature=0.7
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        logger.error(f"AI chat error: {e}")
-        return "Произошла ошибка. Попробуйте позже."
+        }, {
+            "role": "user",
+            "content": user_message
+        }],
+        max_tokens=300,
+        temperature=0.7
+    )
+    return result or "Произошла ошибка. Попробуйте позже."
@@ -0,0 +1,121 @@
+"""
+Двухуровневый кэш результатов LLM-парсинга (parse_cargo_search, parse_city).
+
+L1 — LRU в памяти процесса с TTL, L2 — Redis (общий для процессов, переживает
+рестарт). Ключ — нормализованный текст запроса: «Мск  СПБ 20т» и «мск спб 20т»
+попадают в одну запись. Кэшируются только ответы LLM; локальный fallback
+дёшев и не должен вытеснять ответы модели, пока открыт circuit breaker.
+
+Счётчики попаданий/промахов — ai_cache_stats() (выводится в /stats админа).
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any
+
+from src.core.logger import logger
+from src.core.redis import get_redis
+
+
+def normalize_query(text: str) -> str:
+    return " ".join((text or "").lower().replace("ё", "е").split())
+
+
+class LRUCache:
+    """LRU с TTL на запись; без блокировок — используется из одного event loop."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ParseCache:
+    def __init__(self, namespace: str, maxsize: int, local_ttl: float, redis_ttl: int):
+        self.namespace = namespace
+        self.redis_ttl = redis_ttl
+        self.local = LRUCache(maxsize, local_ttl)
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def _redis_key(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return f"ai:{self.namespace}:{digest}"
+
+    async def get(self, text: str) -> Any:
+        """Значение или None (промах)."""
+        key = normalize_query(text)
+        value = self.local.get(key)
+        if value is not None:
+            self.local_hits += 1
+            return value
+
+        try:
+            redis = await get_redis()
+            raw = await redis.get(self._redis_key(key))
+        except Exception as e:
+            logger.warning("AI cache read failed (%s): %s", self.namespace, e)
+            raw = None
+        if raw is not None:
+            value = json.loads(raw)
+            self.local.set(key, value)
+            self.redis_hits += 1
+            return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, text: str, value: Any):
+        if value is None:
+            return
+        key = normalize_query(text)
+        self.local.set(key, value)
+        try:
+            redis = await get_redis()
+            await redis.set(
+                self._redis_key(key), json.dumps(value, ensure_ascii=False), ex=self.redis_ttl
+            )
+        except Exception as e:
+            logger.warning("AI cache write failed (%s): %s", self.namespace, e)
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        hits = self.local_hits + self.redis_hits
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "local_size": len(self.local),
+        }
+
+
+search_cache = ParseCache("search", maxsize=2048, local_ttl=600, redis_ttl=86400)
+city_cache = ParseCache("city", maxsize=4096, local_ttl=3600, redis_ttl=7 * 86400)
+
+
+def ai_cache_stats() -> dict[str, dict]:
+    return {cache.namespace: cache.stats() for cache in (search_cache, city_cache)}
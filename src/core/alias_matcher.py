@@ -0,0 +1,97 @@
+"""
+Поиск алиасов городов в тексте одним проходом.
+
+Все алиасы (и их «основы» без последней буквы для падежей: «казан» → «казани»)
+собираются в одну скомпилированную альтернативу, свёрнутую по префиксам.
+Совпадение должно начинаться с начала слова, иначе «нн» находится в «тонн».
+
+Модуль без зависимостей от настроек: его использует scripts/bench_alias_matcher.py.
+"""
+
+import re
+from typing import NamedTuple
+
+_WORD_CHARS = "0-9a-zа-яё"
+
+
+def _fold(text: str) -> str:
+    """Дефис -> пробел, как в cities._normalize; длина строки не меняется (смещения те же)."""
+    return text.replace("-", " ")
+
+
+def _trie_regex(words) -> str:
+    """Альтернатива, свёрнутая по общим префиксам: «м(?:осква|ск)|...».
+
+    Плоская «a|b|c» на ~1000 городов перебирает ветки по одной; с префиксным
+    деревом движок отбрасывает всё поддерево после первого несовпавшего символа.
+    Самое длинное совпадение выигрывает: «конец слова» идёт последней веткой.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            return f"(?:{body})?" if len(branches) == 1 else body[:-1] + "|)"
+        return body
+
+    return build(trie)
+
+
+class AliasHit(NamedTuple):
+    start: int
+    end: int
+    alias: str
+    city: str
+
+
+class AliasMatcher:
+    def __init__(self, aliases: dict[str, str], stem_min_len: int = 5):
+        self._city: dict[str, str] = {}
+        for alias, city in aliases.items():
+            alias = _fold(alias.lower())
+            self._city.setdefault(alias, city)
+            if len(alias) >= stem_min_len:
+                self._city.setdefault(alias[:-1], city)
+
+        # «text in alias» из parse_city: подстрока алиаса -> город первого такого алиаса
+        self._fragments: dict[str, str] = {}
+        for alias, city in aliases.items():
+            alias = _fold(alias.lower())
+            for i in range(len(alias)):
+                for j in range(i + 1, len(alias) + 1):
+                    self._fragments.setdefault(alias[i:j], city)
+
+        alternation = _trie_regex(self._city)
+        self._pattern = re.compile(rf"(?<![{_WORD_CHARS}])(?:{alternation})") if alternation else None
+
+    def finditer(self, text: str):
+        """Все совпадения (без перекрытий) в порядке позиции; text — в нижнем регистре.
+
+        «ростов-на-дону» и «ростов на дону» совпадают одинаково; смещения — по исходному text.
+        """
+        if not self._pattern:
+            return
+        for m in self._pattern.finditer(_fold(text)):
+            alias = m.group(0)
+            yield AliasHit(m.start(), m.end(), alias, self._city[alias])
+
+    def findall(self, text: str) -> list[AliasHit]:
+        return list(self.finditer(text))
+
+    def first(self, text: str) -> str | None:
+        """Город первого совпадения в тексте."""
+        hit = next(self.finditer(text), None)
+        return hit.city if hit else None
+
+    def by_fragment(self, text: str) -> str | None:
+        """Город, алиас которого содержит text целиком («красн» -> «Красноярск»)."""
+        return self._fragments.get(_fold(text))
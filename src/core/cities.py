@@ -1,4 +1,15 @@
+"""
+Справочник городов — единая точка разрешения названий.
+
+Список загружается из russia_cities.txt один раз на процесс (get_resolver()),
+нормализация одна (_normalize), таблица алиасов одна (CITY_ALIASES).
+Через CityResolver проходят точное совпадение, алиасы, префиксный и нечёткий
+поиск (city_suggest); координаты — src.core.geo. city_key() кэшируется:
+одна и та же строка из формы, поиска и подписки нормализуется один раз.
+"""
+
 import re
+from bisect import bisect_left
 from difflib import get_close_matches
 from functools import lru_cache
 from pathlib import Path
@@ -6,69 +17,327 @@ from typing import Iterable, Tuple
 
 from src.core.logger import logger
 
+try:
+    from rapidfuzz import process as rf_process
+except Exception:  # pragma: no cover - fallback when rapidfuzz not installed
+    rf_process = None
+
 _CITIES_FILE = Path(__file__).with_name("russia_cities.txt")
 
-_ALIASES = {
-    "спб": "Санкт-Петербург",
-    "питер": "Санкт-Петербург",
-    "мск": "Москва",
-    "н новгород": "Нижний Новгород",
-    "екб": "Екатеринбург",
-    "ростов на дону": "Ростов-на-Дону",
+FALLBACK_CITIES = [
+    "Москва",
+    "Санкт-Петербург",
+    "Новосибирск",
+    "Екатеринбург",
+    "Нижний Новгород",
+    "Казань",
+    "Самара",
+    "Омск",
+    "Ростов-на-Дону",
+    "Уфа",
+    "Красноярск",
+    "Пермь",
+    "Воронеж",
+    "Волгоград",
+]
+
+# Сокращения и разговорные названия. Точное название города важнее алиаса
+# (CityResolver.key/canonical), поэтому алиас, совпадающий с городом из
+# справочника («ростов» — город Ростов), здесь не задаётся: он бы не сработал.
+CITY_ALIASES = {
+    "мск": "Москва", "москва": "Москва",
+    "спб": "Санкт-Петербург", "питер": "Санкт-Петербург", "петербург": "Санкт-Петербург",
+    "нск": "Новосибирск", "новосиб": "Новосибирск",
+    "екб": "Екатеринбург", "ёбург": "Екатеринбург",
+    "казань": "Казань", "кзн": "Казань",
+    "нн": "Нижний Новгород", "нижний": "Нижний Новгород", "н новгород": "Нижний Новгород",
+    "самара": "Самара", "самар": "Самара",
+    "рнд": "Ростов-на-Дону", "ростов на дону": "Ростов-на-Дону",
+    "уфа": "Уфа",
+    "красноярск": "Красноярск", "крск": "Красноярск",
+    "воронеж": "Воронеж", "врн": "Воронеж",
+    "пермь": "Пермь",
+    "волгоград": "Волгоград",
+    "краснодар": "Краснодар", "крд": "Краснодар",
+    "челябинск": "Челябинск", "челяба": "Челябинск",
+    "омск": "Омск",
+    "тюмень": "Тюмень",
 }
 
+_NGRAM = 3
+_FUZZY_SHORTLIST = 20
+
 
 def _normalize(text: str) -> str:
+    """«г. Ростов-на-Дону, обл.» -> «ростов на дону»."""
     t = (text or "").strip().lower()
     if not t:
         return ""
     t = t.split(",", 1)[0]
-    t = re.sub(r"^г\\.?\\s+", "", t)
+    t = re.sub(r"^г\.?\s+", "", t)
     t = t.replace("ё", "е")
-    t = re.sub(r"[^0-9a-zа-я\\s-]", " ", t)
+    t = re.sub(r"[^0-9a-zа-я\s-]", " ", t)
     t = t.replace("-", " ")
-    t = re.sub(r"\\s+", " ", t).strip()
+    t = re.sub(r"\s+", " ", t).strip()
     return t
 
 
-@lru_cache(maxsize=1)
-def _city_index() -> Tuple[list[str], dict[str, str], list[str]]:
+def _ngrams(norm: str) -> set[str]:
+    padded = f"  {norm} "
+    return {padded[i : i + _NGRAM] for i in range(len(padded) - _NGRAM + 1)}
+
+
+def _dedupe(items: Iterable[str]) -> list[str]:
+    seen: set[str] = set()
+    out: list[str] = []
+    for item in items:
+        if item in seen:
+            continue
+        seen.add(item)
+        out.append(item)
+    return out
+
+
+class CityResolver:
+    """Индексы справочника городов, строятся один раз на процесс.
+
+    - index: нормализованное название -> название;
+    - aliases: нормализованный алиас -> название;
+    - word_keys: отсортированные «хвосты» названий с начала каждого слова
+      («нижний новгород», «новгород») — префиксный поиск через bisect
+      (компактная замена префиксного дерева);
+    - grams: триграмма -> ключи; rapidfuzz/difflib оценивают только
+      _FUZZY_SHORTLIST кандидатов с лучшим пересечением триграмм.
+    """
+
+    def __init__(self, names: list[str], aliases: dict[str, str]):
+        self.names = names
+        self.index: dict[str, str] = {}
+        for name in names:
+            norm = _normalize(name)
+            if norm and norm not in self.index:
+                self.index[norm] = name
+        self.keys = list(self.index)
+        self.aliases = {_normalize(a): c for a, c in aliases.items() if _normalize(a)}
+
+        suffixes: list[tuple[str, int, str]] = []
+        for key in self.keys:
+            pos = 0
+            for word in key.split(" "):
+                suffixes.append((key[pos:], pos, key))
+                pos += len(word) + 1
+        suffixes.sort()
+        self.word_keys = [s for s, _, _ in suffixes]
+        self.word_refs = [(pos, key) for _, pos, key in suffixes]
+
+        self.grams: dict[str, list[str]] = {}
+        self.gram_counts: dict[str, int] = {}
+        for key in self.keys:
+            grams = _ngrams(key)
+            self.gram_counts[key] = len(grams)
+            for gram in grams:
+                self.grams.setdefault(gram, []).append(key)
+
+    def key(self, norm: str) -> str:
+        """Ключ по нормализованному тексту: точное название, иначе алиас."""
+        if norm in self.index:
+            return norm
+        alias = self.aliases.get(norm)
+        return _normalize(alias) if alias else norm
+
+    def canonical(self, norm: str) -> str | None:
+        """Название из справочника (или алиаса) либо None."""
+        return self.index.get(norm) or self.aliases.get(norm)
+
+    def prefix(self, norm: str, limit: int) -> list[str]:
+        """Ключи, у которых название или одно из слов начинается с norm."""
+        lo = bisect_left(self.word_keys, norm)
+        hi = bisect_left(self.word_keys, norm + "\uffff")
+        refs = self.word_refs[lo:hi]
+        # Сначала совпадение с начала названия, затем по слову; внутри — по алфавиту
+        return _dedupe(key for _, key in sorted(refs))[:limit]
+
+    def fuzzy(self, norm: str, limit: int) -> list[str]:
+        query_grams = _ngrams(norm)
+        counts: dict[str, int] = {}
+        for gram in query_grams:
+            for key in self.grams.get(gram, ()):
+                counts[key] = counts.get(key, 0) + 1
+        if not counts:
+            return []
+        # Коэффициент Дайса по триграммам: длинные названия не вытесняют точные
+        total = len(query_grams)
+        shortlist = sorted(
+            counts,
+            key=lambda k: counts[k] / (total + self.gram_counts[k]),
+            reverse=True,
+        )[:_FUZZY_SHORTLIST]
+        if rf_process:
+            matches = rf_process.extract(norm, shortlist, limit=limit, score_cutoff=70)
+            return [key for key, _score, _ in matches]
+        return get_close_matches(norm, shortlist, n=limit, cutoff=0.8)
+
+    def suggest(self, norm: str, limit: int) -> list[str]:
+        results: list[str] = []
+        alias = self.aliases.get(norm)
+        if alias:
+            results.append(alias)
+        exact = self.index.get(norm)
+        if exact:
+            results.append(exact)
+        results.extend(self.index[key] for key in self.prefix(norm, limit))
+        if len(_dedupe(results)) < limit:
+            results.extend(self.index[key] for key in self.fuzzy(norm, limit))
+        return _dedupe(results)[:limit]
+
+
+def _load_names() -> list[str]:
     try:
         raw = _CITIES_FILE.read_text(encoding="utf-8").splitlines()
     except FileNotFoundError:
         logger.error("Cities file not found: %s", _CITIES_FILE)
-        return [], {}, []
+        return list(FALLBACK_CITIES)
+    return [line.strip() for line in raw if line.strip() and not line.startswith("#")]
 
-    cities: list[str] = []
-    index: dict[str, str] = {}
-    for line in raw:
-        name = line.strip()
-        if not name or name.startswith("#"):
-            continue
-        cities.append(name)
-        norm = _normalize(name)
-        if norm and norm not in index:
-            index[norm] = name
-    keys = list(index.keys())
-    return cities, index, keys
+
+@lru_cache(maxsize=1)
+def get_resolver() -> CityResolver:
+    return CityResolver(_load_names(), CITY_ALIASES)
 
 
 def resolve_city(raw: str) -> Tuple[str | None, list[str]]:
+    """Название из справочника либо (None, до 3 похожих)."""
     norm = _normalize(raw)
     if not norm:
         return None, []
+    resolver = get_resolver()
+    name = resolver.canonical(norm)
+    if name:
+        return name, []
+    return None, [resolver.index[k] for k in resolver.fuzzy(norm, 3)]
 
-    alias = _ALIASES.get(norm)
-    if alias:
-        return alias, []
 
-    _, index, keys = _city_index()
-    if not index:
-        return None, []
+def alias_cities() -> dict[str, str]:
+    """{алиас: город} с тем же приоритетом, что у city_key (точное название важнее)."""
+    resolver = get_resolver()
+    return {
+        alias: resolver.canonical(_normalize(alias)) or city
+        for alias, city in CITY_ALIASES.items()
+    }
+
+
+def city_suggest(query: str, limit: int = 8) -> list[str]:
+    """Подсказки для клавиатур выбора города (city:from:/city:to:)."""
+    norm = _normalize(query)
+    if not norm:
+        return []
+    return get_resolver().suggest(norm, limit)
+
+
+@lru_cache(maxsize=8192)
+def city_key(raw: str | None) -> str | None:
+    """Канонический ключ города для хранения и поиска: «СПб» -> «санкт петербург»."""
+    norm = _normalize(raw or "")
+    if not norm:
+        return None
+    return get_resolver().key(norm)
+
+
+def is_known_city_key(key: str | None) -> bool:
+    """True, если ключ совпадает с городом из справочника."""
+    if not key:
+        return False
+    return key in get_resolver().index
+
+
+# Ключ города (включая алиасы) -> cities.id; заполняется seed_cities() на старте
+_CITY_IDS: dict[str, int] = {}
+
+
+def city_id(key: str | None) -> int | None:
+    """ID города из справочника по ключу city_key(); None, если справочник не загружен."""
+    if not key:
+        return None
+    return _CITY_IDS.get(key)
+
+
+async def seed_cities(session) -> int:
+    """Заполнить cities/city_aliases из russia_cities.txt и алиасов, загрузить ID в память.
+
+    Возвращает число новых или изменённых записей справочника (0 — справочник
+    не менялся, backfill_city_ids не нужен).
+    """
+    from sqlalchemy import select
+    from sqlalchemy.dialects.postgresql import insert
+    from src.core.models import City, CityAlias
+
+    changed = 0
+    resolver = get_resolver()
+    index = resolver.index
+    if index:
+        inserted = await session.execute(
+            insert(City)
+            .values([{"name": name, "name_norm": norm} for norm, name in index.items()])
+            .on_conflict_do_nothing(index_elements=["name_norm"])
+            .returning(City.id)
+        )
+        changed += len(inserted.all())
+
+    rows = await session.execute(select(City.name_norm, City.id))
+    ids = dict(rows.all())
+
+    alias_rows = []
+    for alias, name in resolver.aliases.items():
+        target = ids.get(_normalize(name))
+        if alias and target and alias not in ids:
+            alias_rows.append({"alias": alias, "city_id": target})
+    if alias_rows:
+        stmt = insert(CityAlias).values(alias_rows)
+        upserted = await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["alias"],
+                set_={"city_id": stmt.excluded.city_id},
+                where=CityAlias.city_id != stmt.excluded.city_id,
+            ).returning(CityAlias.alias)
+        )
+        changed += len(upserted.all())
+    await session.commit()
+
+    aliases = await session.execute(select(CityAlias.alias, CityAlias.city_id))
+    _CITY_IDS.clear()
+    _CITY_IDS.update(ids)
+    for alias, target in aliases.all():
+        _CITY_IDS.setdefault(alias, target)
+    return changed
+
+
+# SQL-эквивалент _normalize для бэкфилла (см. migrations/008_cargo_search.sql)
+_SQL_NORM = (
+    "btrim(regexp_replace(translate(regexp_replace(btrim(lower(split_part({col}, ',', 1))), "
+    "'^г\\.?\\s+', ''), 'ё-', 'е '), '[^0-9a-zа-я]+', ' ', 'g'))"
+)
+
+
+async def backfill_city_ids(session) -> None:
+    """Проставить from_city_id/to_city_id строкам, созданным до справочника.
 
-    if norm in index:
-        return index[norm], []
+    Полный проход по таблицам: вызывается только после изменения справочника
+    (seed_cities() > 0); новые строки получают ID в @validates моделей.
+    """
+    from sqlalchemy import text
 
-    suggestions_norm = get_close_matches(norm, keys, n=3, cutoff=0.8)
-    suggestions = [index[s] for s in suggestions_norm]
-    return None, suggestions
+    for table, norm_from, norm_to in (
+        ("cargos", "c.from_city_norm", "c.to_city_norm"),
+        ("route_subscriptions", _SQL_NORM.format(col="c.from_city"), _SQL_NORM.format(col="c.to_city")),
+    ):
+        for side, norm_expr in (("from", norm_from), ("to", norm_to)):
+            await session.execute(text(f"""
+                UPDATE {table} AS c SET {side}_city_id = k.city_id
+                FROM (
+                    SELECT name_norm AS key, id AS city_id FROM cities
+                    UNION ALL
+                    SELECT alias, city_id FROM city_aliases
+                ) AS k
+                WHERE c.{side}_city_id IS NULL AND c.{side}_city IS NOT NULL AND k.key = {norm_expr}
+            """))
+    await session.commit()
@@ -18,6 +18,24 @@ class Settings(BaseSettings):
 
     # AI
     groq_api_key: str | None = None
+    groq_base_url: str | None = None  # например, локальный stub для отладки
+    ai_timeout: float = 8.0  # секунд на запрос к LLM
+    ai_max_concurrency: int = 4
+
+    # Проверка контрагентов (/check); URL можно направить на локальные stub-серверы
+    legal_fns_url: str = "https://egrul.nalog.ru"
+    legal_arbitr_url: str = "https://kad.arbitr.ru"
+    legal_fssp_url: str = "https://fssp.gov.ru"
+    legal_bankrupt_url: str = "https://bankrot.fedresurs.ru"
+    legal_check_deadline: float = 25.0  # секунд на всю проверку
+    legal_source_concurrency: int = 4  # одновременных запросов к одному источнику
+    legal_precheck_workers: int = 2  # фоновые проверки откликнувшихся (legal_precheck)
+
+    # Исходящие HTTP-запросы (src/core/http.py)
+    http_max_connections: int = 50
+    http_max_keepalive: int = 20
+    http_keepalive_expiry: float = 30.0  # секунд
+    http2: bool = True  # используется, если установлен пакет h2
     
     class Config:
         env_file = ".env"
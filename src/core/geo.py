@@ -0,0 +1,193 @@
+"""
+Координаты городов и расстояния между ними.
+
+Газеттир — russia_cities_geo.csv (name,lat,lon), строки сопоставляются
+с russia_cities.txt через city_key(). Файл собирается
+scripts/build_gazetteer.py из открытого справочника городов; города без
+координат просто отсутствуют, и расстояние для них — None.
+
+Координаты хранятся в двух массивах (радианы), расстояния считаются
+векторно: один-ко-многим (distances_from), матрица (distance_matrix) и
+попарно для списков маршрутов (route_distances_km) — один вызов на тысячи
+грузов в аналитике. С NumPy считается массивами, без него — тем же
+кодом на math (медленнее, но без новой зависимости).
+"""
+
+import csv
+import math
+from functools import lru_cache
+from pathlib import Path
+from typing import Sequence
+
+from src.core.cities import city_key, is_known_city_key
+from src.core.logger import logger
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - fallback when numpy not installed
+    np = None
+
+_GEO_FILE = Path(__file__).with_name("russia_cities_geo.csv")
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(a: tuple[float, float], b: tuple[float, float]) -> float:
+    """Расстояние по дуге между (широта, долгота) в градусах."""
+    lat1, lon1 = map(math.radians, a)
+    lat2, lon2 = map(math.radians, b)
+    h = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+def _haversine_rad(lat1, lon1, lat2, lon2):
+    """Векторная формула для массивов в радианах (с broadcasting)."""
+    h = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+
+class Gazetteer:
+    def __init__(self, rows: Sequence[tuple[str, float, float]]):
+        self.index: dict[str, int] = {}
+        lats: list[float] = []
+        lons: list[float] = []
+        for key, lat, lon in rows:
+            if key in self.index:
+                continue
+            self.index[key] = len(lats)
+            lats.append(lat)
+            lons.append(lon)
+        self.lat_deg = lats
+        self.lon_deg = lons
+        if np is not None:
+            self.lat = np.radians(np.asarray(lats, dtype=np.float64))
+            self.lon = np.radians(np.asarray(lons, dtype=np.float64))
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def row(self, raw: str | None) -> int | None:
+        key = city_key(raw)
+        if not key:
+            return None
+        return self.index.get(key)
+
+    def coords(self, raw: str | None) -> tuple[float, float] | None:
+        i = self.row(raw)
+        if i is None:
+            return None
+        return self.lat_deg[i], self.lon_deg[i]
+
+    def distance_km(self, a: str | None, b: str | None) -> float | None:
+        ca = self.coords(a)
+        cb = self.coords(b)
+        if not ca or not cb:
+            return None
+        return haversine_km(ca, cb)
+
+    def _rows(self, names: Sequence[str | None]) -> list[int | None]:
+        return [self.row(name) for name in names]
+
+    def distances_from(self, src: str | None, dsts: Sequence[str | None]) -> list[float | None]:
+        """Расстояния от одного города до каждого из dsts (None — нет координат)."""
+        return self.route_distances_km([src] * len(dsts), dsts)
+
+    def distance_matrix(
+        self, srcs: Sequence[str | None], dsts: Sequence[str | None]
+    ) -> list[list[float | None]]:
+        """Матрица len(srcs) x len(dsts)."""
+        src_rows = self._rows(srcs)
+        dst_rows = self._rows(dsts)
+        if np is None or not self.index:
+            return [
+                [self._pair(i, j) for j in dst_rows]
+                for i in src_rows
+            ]
+
+        si, s_ok = self._take(src_rows)
+        di, d_ok = self._take(dst_rows)
+        matrix = _haversine_rad(
+            self.lat[si][:, None], self.lon[si][:, None],
+            self.lat[di][None, :], self.lon[di][None, :],
+        )
+        matrix[~(s_ok[:, None] & d_ok[None, :])] = np.nan
+        return _to_list(matrix)
+
+    def route_distances_km(
+        self, froms: Sequence[str | None], tos: Sequence[str | None]
+    ) -> list[float | None]:
+        """Попарные расстояния froms[i] -> tos[i] для списка маршрутов."""
+        if len(froms) != len(tos):
+            raise ValueError("froms and tos must have the same length")
+        from_rows = self._rows(froms)
+        to_rows = self._rows(tos)
+        if np is None or not self.index:
+            return [self._pair(i, j) for i, j in zip(from_rows, to_rows)]
+
+        fi, f_ok = self._take(from_rows)
+        ti, t_ok = self._take(to_rows)
+        distances = _haversine_rad(self.lat[fi], self.lon[fi], self.lat[ti], self.lon[ti])
+        distances[~(f_ok & t_ok)] = np.nan
+        return _to_list(distances)
+
+    def _take(self, rows: list[int | None]):
+        """Индексы для fancy indexing (неизвестные -> 0) и маска известных."""
+        ok = np.fromiter((i is not None for i in rows), dtype=bool, count=len(rows))
+        idx = np.fromiter((i or 0 for i in rows), dtype=np.intp, count=len(rows))
+        return idx, ok
+
+    def _pair(self, i: int | None, j: int | None) -> float | None:
+        if i is None or j is None:
+            return None
+        return haversine_km((self.lat_deg[i], self.lon_deg[i]), (self.lat_deg[j], self.lon_deg[j]))
+
+
+def _to_list(values) -> list:
+    """ndarray -> вложенные списки float, NaN -> None."""
+    if values.ndim > 1:
+        return [_to_list(row) for row in values]
+    return [None if math.isnan(v) else v for v in values.tolist()]
+
+
+def _load_rows() -> list[tuple[str, float, float]]:
+    try:
+        lines = _GEO_FILE.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        logger.error("Gazetteer file not found: %s", _GEO_FILE)
+        return []
+
+    rows = []
+    unknown = 0
+    for record in csv.DictReader(line for line in lines if not line.startswith("#")):
+        key = city_key(record["name"])
+        if not is_known_city_key(key):
+            unknown += 1
+            continue
+        rows.append((key, float(record["lat"]), float(record["lon"])))
+    if unknown:
+        logger.warning("Gazetteer: %d rows without a matching city", unknown)
+    return rows
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer() -> Gazetteer:
+    return Gazetteer(_load_rows())
+
+
+def city_coords(raw: str | None) -> tuple[float, float] | None:
+    """(широта, долгота) города, если известны."""
+    return get_gazetteer().coords(raw)
+
+
+def distance_km(from_city: str | None, to_city: str | None) -> float | None:
+    return get_gazetteer().distance_km(from_city, to_city)
+
+
+def route_distances_km(froms: Sequence[str | None], tos: Sequence[str | None]) -> list[float | None]:
+    return get_gazetteer().route_distances_km(froms, tos)
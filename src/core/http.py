@@ -0,0 +1,60 @@
+"""
+Общие httpx-клиенты для исходящих интеграций (проверка контрагентов, watchdog).
+
+Клиент на имя интеграции создаётся один раз (лениво) и переиспользуется:
+пул соединений по хостам, keep-alive, HTTP/2, если установлен пакет h2.
+Лимиты — settings.http_*. Закрываются в lifespan (close_http_clients).
+Таймаут задаётся на запрос: client.get(url, timeout=15).
+"""
+
+import httpx
+
+from src.core.config import settings
+from src.core.logger import logger
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except Exception:  # pragma: no cover - HTTP/1.1 when h2 not installed
+    HTTP2_AVAILABLE = False
+
+DEFAULT_TIMEOUT = 15.0
+
+
+class HttpClients:
+    def __init__(self):
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def get(self, name: str = "default") -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=DEFAULT_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.http_max_connections,
+                    max_keepalive_connections=settings.http_max_keepalive,
+                    keepalive_expiry=settings.http_keepalive_expiry,
+                ),
+                http2=settings.http2 and HTTP2_AVAILABLE,
+            )
+            self._clients[name] = client
+        return client
+
+    async def aclose(self):
+        clients, self._clients = self._clients, {}
+        for name, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning("HTTP client %s close failed: %s", name, e)
+
+
+http_clients = HttpClients()
+
+
+def get_http_client(name: str = "default") -> httpx.AsyncClient:
+    return http_clients.get(name)
+
+
+async def close_http_clients():
+    await http_clients.aclose()
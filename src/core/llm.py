@@ -0,0 +1,147 @@
+"""
+Асинхронный клиент LLM (Groq) для src.core.ai.
+
+- AsyncGroq вместо синхронного Groq: запрос не блокирует event loop бота;
+- общий таймаут на вызов (settings.ai_timeout);
+- не больше settings.ai_max_concurrency одновременных запросов;
+- circuit breaker: после FAILURE_THRESHOLD ошибок подряд LLM не вызывается
+  RESET_TIMEOUT секунд, затем пропускается один пробный запрос.
+
+complete() не бросает исключений: None означает «LLM недоступен», и вызывающий
+переходит на локальный парсинг. settings.groq_base_url позволяет направить
+клиент на локальный stub-сервер с OpenAI-совместимым /chat/completions
+(scripts/llm_stub_server.py; сценарии breaker — scripts/check_llm_breaker.py).
+"""
+
+import asyncio
+import time
+
+from groq import AsyncGroq
+
+from src.core.config import settings
+from src.core.logger import logger
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release_probe(self):
+        """Снять пробу, завершившуюся без success()/failure() (например, отменённую)."""
+        self._probing = False
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning("LLM circuit opened after %d failures", self.failures)
+            self.opened_at = time.monotonic()
+
+
+class LLMClient:
+    def __init__(
+        self,
+        api_key: str | None,
+        base_url: str | None = None,
+        timeout: float = 8.0,
+        max_concurrency: int = 4,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = (
+            AsyncGroq(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0)
+            if api_key
+            else None
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Ключ задан (breaker не учитывается)."""
+        return self._client is not None
+
+    @property
+    def available(self) -> bool:
+        return self.enabled and self.breaker.state != "open"
+
+    async def complete(
+        self,
+        messages: list[dict],
+        *,
+        max_tokens: int,
+        temperature: float = 0,
+        model: str = DEFAULT_MODEL,
+    ) -> str | None:
+        """Текст ответа модели или None (нет ключа, breaker открыт, таймаут, ошибка)."""
+        if not self._client:
+            return None
+        probe = self.breaker.state == "half-open"
+        if not self.breaker.allow():
+            return None
+
+        try:
+            async with self._semaphore:
+                response = await asyncio.wait_for(
+                    self._client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                    ),
+                    timeout=self.timeout,
+                )
+        except asyncio.TimeoutError:
+            logger.warning("LLM request timed out after %.1fs", self.timeout)
+            self.breaker.failure()
+            return None
+        except Exception as e:
+            logger.error("LLM request failed: %s", e)
+            self.breaker.failure()
+            return None
+        finally:
+            # CancelledError — не Exception: без этого _probing остался бы True навсегда
+            if probe:
+                self.breaker.release_probe()
+
+        self.breaker.success()
+        return (response.choices[0].message.content or "").strip()
+
+
+llm = LLMClient(
+    api_key=settings.groq_api_key,
+    base_url=settings.groq_base_url,
+    timeout=settings.ai_timeout,
+    max_concurrency=settings.ai_max_concurrency,
+)
@@ -1,5 +1,7 @@
 """Рыночные цены из @umnayalogistika (январь 2026)"""
 
+from src.core.logger import logger
+
 MARKET_PRICES = [
     # Тент (20 тонн, без НДС)
     {"from": "Екатеринбург", "to": "Симферополь", "price": 269543, "type": "тент"},
@@ -25,32 +27,94 @@ MARKET_PRICES = [
     {"from": "Нижний Новгород", "to": "Самара", "price": 81360, "type": "реф"},
 ]
 
-async def seed_market_prices(session):
-    """Заполнить базу рыночными ценами"""
+UPSERT_BATCH_SIZE = 1000
+DEFAULT_SOURCE = "umnayalogistika"
+
+
+def _price_row(item: dict, source: str) -> dict:
+    return {
+        "from_city": str(item["from"]).strip(),
+        "to_city": str(item["to"]).strip(),
+        "price": int(float(item["price"])),
+        "cargo_type": (str(item.get("type") or "тент")).strip(),
+        "weight": float(item.get("weight") or 20.0),
+        "source": item.get("source") or source,
+    }
+
+
+def load_price_feed(path) -> list[dict]:
+    """Фид цен из CSV (from,to,price[,type,weight,source]) или JSON-списка тех же полей."""
+    import csv
+    import json
+    from pathlib import Path
+
+    path = Path(path)
+    if path.suffix.lower() == ".json":
+        return json.loads(path.read_text(encoding="utf-8"))
+    with path.open(encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+async def upsert_market_prices(
+    session,
+    items,
+    source: str = DEFAULT_SOURCE,
+    batch_size: int = UPSERT_BATCH_SIZE,
+) -> int:
+    """INSERT ... ON CONFLICT по ix_market_route пачками; commit внутри.
+
+    Строки с той же ценой не перезаписываются (updated_at не сдвигается).
+    Возвращает число вставленных/изменённых маршрутов.
+    """
     from datetime import datetime
-    from sqlalchemy import select
+    from sqlalchemy import or_
+    from sqlalchemy.dialects.postgresql import insert
     from src.core.models import MarketPrice
 
-    for item in MARKET_PRICES:
-        existing = await session.scalar(
-            select(MarketPrice).where(
-                MarketPrice.from_city == item["from"],
-                MarketPrice.to_city == item["to"],
-                MarketPrice.cargo_type == item["type"],
-            )
+    # Один INSERT ... ON CONFLICT не может обновить строку дважды — дубли схлопываем
+    rows: dict[tuple, dict] = {}
+    for item in items:
+        try:
+            row = _price_row(item, source)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("Market price row skipped (%s): %s", e, item)
+            continue
+        rows[(row["from_city"], row["to_city"], row["cargo_type"])] = row
+
+    now = datetime.utcnow()
+    values = [{**row, "updated_at": now} for row in rows.values()]
+    changed = 0
+    for start in range(0, len(values), batch_size):
+        stmt = insert(MarketPrice).values(values[start:start + batch_size])
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["from_city", "to_city", "cargo_type"],
+            set_={
+                "price": excluded.price,
+                "weight": excluded.weight,
+                "source": excluded.source,
+                "updated_at": excluded.updated_at,
+            },
+            where=or_(
+                MarketPrice.price != excluded.price,
+                MarketPrice.weight.is_distinct_from(excluded.weight),
+                MarketPrice.source.is_distinct_from(excluded.source),
+            ),
         )
-        if existing:
-            existing.price = item["price"]
-            existing.updated_at = datetime.utcnow()
-        else:
-            session.add(
-                MarketPrice(
-                    from_city=item["from"],
-                    to_city=item["to"],
-                    price=item["price"],
-                    cargo_type=item["type"],
-                    weight=20.0,
-                    source="umnayalogistika",
-                )
-            )
+        result = await session.execute(stmt)
+        changed += result.rowcount or 0
     await session.commit()
+
+    if changed:
+        from src.core.services.price_book import publish_market_prices_changed
+        await publish_market_prices_changed()
+    return changed
+
+
+async def import_price_feed(session, path, source: str) -> int:
+    return await upsert_market_prices(session, load_price_feed(path), source=source)
+
+
+async def seed_market_prices(session) -> int:
+    """Заполнить базу рыночными ценами"""
+    return await upsert_market_prices(session, MARKET_PRICES)
@@ -1,7 +1,8 @@
 from datetime import datetime
-from sqlalchemy import BigInteger, String, DateTime, Boolean, Text, Integer, Float, Enum, Index, ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import BigInteger, String, DateTime, Boolean, Text, Integer, Float, Enum, Index, ForeignKey, text as sql_text
+from sqlalchemy.orm import Mapped, mapped_column, validates
 from src.core.database import Base
+from src.core.cities import city_id, city_key
 import enum
 
 class User(Base):
@@ -18,9 +19,41 @@ class User(Base):
     verification_code: Mapped[str | None] = mapped_column(String(10), nullable=True)
     trust_score: Mapped[int] = mapped_column(Integer, default=50)
     warnings_count: Mapped[int] = mapped_column(Integer, default=0)
+    bot_blocked_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # заблокировал бота
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
+class UserStats(Base):
+    """Агрегаты оценок пользователя, обновляются при записи (src.core.services.user_stats)."""
+    __tablename__ = "user_stats"
+
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id"), primary_key=True)
+    rating_sum: Mapped[int] = mapped_column(Integer, default=0)
+    rating_count: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def avg_rating(self) -> float | None:
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
+
+
+class City(Base):
+    """Справочник городов (сидируется из russia_cities.txt, см. src.core.cities.seed_cities)."""
+    __tablename__ = "cities"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String(100))
+    name_norm: Mapped[str] = mapped_column(String(100), unique=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class CityAlias(Base):
+    __tablename__ = "city_aliases"
+
+    alias: Mapped[str] = mapped_column(String(100), primary_key=True)  # нормализованный: «спб», «мск»
+    city_id: Mapped[int] = mapped_column(Integer, ForeignKey("cities.id"))
+
 
 class UserRole(enum.Enum):
     CUSTOMER = "customer"
@@ -67,6 +100,11 @@ class Cargo(Base):
 
     from_city: Mapped[str] = mapped_column(String(100))
     to_city: Mapped[str] = mapped_column(String(100))
+    # Нормализованные ключи городов для индексированного поиска (см. cargo_search)
+    from_city_norm: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    to_city_norm: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    from_city_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("cities.id"), nullable=True)
+    to_city_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("cities.id"), nullable=True)
     
     cargo_type: Mapped[str] = mapped_column(String(100))
     weight: Mapped[float] = mapped_column(Float)
@@ -83,6 +121,13 @@ class Cargo(Base):
     notified_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
+    @validates("from_city", "to_city")
+    def _sync_city_norm(self, key: str, value: str) -> str:
+        norm = city_key(value)
+        setattr(self, f"{key}_norm", norm)
+        setattr(self, f"{key}_id", city_id(norm))
+        return value
+
 
 class Application(Base):
     __tablename__ = "applications"
@@ -158,6 +203,11 @@ class CompanyDetails(Base):
     rating_response_time: Mapped[int] = mapped_column(Integer, default=0)  # быстрый ответ = +1
     rating_documents: Mapped[int] = mapped_column(Integer, default=0)      # документы в порядке = +1
 
+    # Счётчики для баллов выше (src.core.services.rating)
+    deals_completed: Mapped[int] = mapped_column(Integer, default=0)
+    open_claims: Mapped[int] = mapped_column(Integer, default=0)
+    resolved_claims: Mapped[int] = mapped_column(Integer, default=0)
+
     registered_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -264,6 +314,33 @@ class MarketPrice(Base):
         Index("ix_market_route", "from_city", "to_city", "cargo_type", unique=True),
     )
 
+
+class RoutePriceStats(Base):
+    """Перцентили цен завершённых сделок по маршруту и типу кузова (см. services/route_stats)."""
+    __tablename__ = "route_price_stats"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    from_key: Mapped[str] = mapped_column(String(100))  # city_key()
+    to_key: Mapped[str] = mapped_column(String(100))
+    cargo_type_key: Mapped[str] = mapped_column(String(10))  # первые 3 буквы типа кузова
+    deals: Mapped[int] = mapped_column(Integer)
+    weight_p50: Mapped[float] = mapped_column(Float)
+    price_p25: Mapped[int] = mapped_column(Integer)
+    price_p50: Mapped[int] = mapped_column(Integer)
+    price_p75: Mapped[int] = mapped_column(Integer)
+    per_ton_p25: Mapped[float] = mapped_column(Float)
+    per_ton_p50: Mapped[float] = mapped_column(Float)
+    per_ton_p75: Mapped[float] = mapped_column(Float)
+    distance_km: Mapped[float | None] = mapped_column(Float, nullable=True)
+    per_km_p25: Mapped[float | None] = mapped_column(Float, nullable=True)
+    per_km_p50: Mapped[float | None] = mapped_column(Float, nullable=True)
+    per_km_p75: Mapped[float | None] = mapped_column(Float, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_route_price_stats_route", "from_key", "to_key", "cargo_type_key", unique=True),
+    )
+
 class Feedback(Base):
     __tablename__ = "feedback"
     
@@ -280,7 +357,67 @@ class Reminder(Base):
     text: Mapped[str] = mapped_column(Text)
     remind_at: Mapped[datetime] = mapped_column(DateTime)
     is_sent: Mapped[bool] = mapped_column(Boolean, default=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    failed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # доставка невозможна
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index(
+            "ix_reminders_due", "remind_at",
+            postgresql_where=sql_text("NOT is_sent AND failed_at IS NULL"),
+        ),
+    )
+
+class DeliveryFailure(Base):
+    """Dead letter: сообщение, которое не удалось доставить (src.core.services.delivery)."""
+    __tablename__ = "delivery_failures"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    kind: Mapped[str] = mapped_column(String(30))  # notification, broadcast, reminder
+    # Ключ исходного сообщения (Reminder.id, «cargo_id:user_id»...): одна строка на сообщение
+    key: Mapped[str] = mapped_column(String(100))
+    chat_id: Mapped[int] = mapped_column(BigInteger)
+    error: Mapped[str] = mapped_column(Text)
+    payload_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=1)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("uq_delivery_failures_kind_key", "kind", "key", unique=True),
+    )
+
+class BroadcastStatus(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+class BroadcastJob(Base):
+    """Рассылка админа: копия сообщения всем пользователям, курсор по users.id."""
+    __tablename__ = "broadcast_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    created_by: Mapped[int] = mapped_column(BigInteger)
+    from_chat_id: Mapped[int] = mapped_column(BigInteger)
+    message_id: Mapped[int] = mapped_column(BigInteger)
+    status: Mapped[BroadcastStatus] = mapped_column(Enum(BroadcastStatus), default=BroadcastStatus.PENDING)
+
+    last_user_id: Mapped[int] = mapped_column(BigInteger, default=0)  # keyset-курсор (чекпоинт)
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    sent: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    blocked: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.failed + self.blocked
 
 class RouteSubscription(Base):
     __tablename__ = "route_subscriptions"
@@ -289,16 +426,23 @@ class RouteSubscription(Base):
     user_id: Mapped[int] = mapped_column(BigInteger)
     from_city: Mapped[str | None] = mapped_column(String(100), nullable=True)
     to_city: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    from_city_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("cities.id"), nullable=True)
+    to_city_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("cities.id"), nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
+    @validates("from_city", "to_city")
+    def _sync_city_id(self, key: str, value: str | None) -> str | None:
+        setattr(self, f"{key}_id", city_id(city_key(value)))
+        return value
+
 class Rating(Base):
     __tablename__ = "ratings"
     
     id: Mapped[int] = mapped_column(primary_key=True)
     cargo_id: Mapped[int] = mapped_column(Integer)
     from_user_id: Mapped[int] = mapped_column(BigInteger)
-    to_user_id: Mapped[int] = mapped_column(BigInteger)
+    to_user_id: Mapped[int] = mapped_column(BigInteger, index=True)
     score: Mapped[int] = mapped_column(Integer)
     comment: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -343,3 +487,12 @@ class CargoLocation(Base):
     longitude: Mapped[float] = mapped_column(Float)
     address: Mapped[str | None] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+class LegalCheckCache(Base):
+    """Кэш проверки контрагента по ИНН (src.core.services.legal_cache)."""
+    __tablename__ = "legal_check_cache"
+
+    inn: Mapped[str] = mapped_column(String(12), primary_key=True)
+    # {"fns": {"result": {...}, "checked_at": "ISO"}, "arbitr": ...}
+    sources_json: Mapped[str] = mapped_column(Text)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,70 @@
+"""
+Keyset-пагинация списков «новые сверху» по (created_at, id).
+
+Курсор — непрозрачная строка (base64url от created_at в микросекундах и id,
+22 символа): помещается в callback_data Telegram и в query-параметр.
+Следующая страница — WHERE (created_at, id) < курсора ORDER BY created_at
+DESC, id DESC LIMIT n: глубокая страница стоит столько же, сколько первая,
+в отличие от OFFSET.
+"""
+
+import base64
+import binascii
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Generic, TypeVar
+
+from sqlalchemy import Select, tuple_
+
+T = TypeVar("T")
+
+_EPOCH = datetime(1970, 1, 1)
+_CURSOR = struct.Struct(">qQ")
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    micros = (created_at - _EPOCH) // timedelta(microseconds=1)
+    return base64.urlsafe_b64encode(_CURSOR.pack(micros, row_id)).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str | None) -> tuple[datetime, int] | None:
+    """(created_at, id) или None для пустого/битого курсора (= первая страница)."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        micros, row_id = _CURSOR.unpack(raw)
+    except (binascii.Error, struct.error, ValueError):
+        return None
+    return _EPOCH + timedelta(microseconds=micros), row_id
+
+
+@dataclass
+class Page(Generic[T]):
+    items: list[T]
+    next_cursor: str | None
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+def keyset_query(query: Select, model, cursor: str | None, limit: int) -> Select:
+    """query с порядком (created_at DESC, id DESC), условием после курсора и limit+1."""
+    query = query.order_by(None).order_by(model.created_at.desc(), model.id.desc())
+    after = decode_cursor(cursor)
+    if after is not None:
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(*after))
+    return query.limit(limit + 1)
+
+
+async def fetch_page(session, query: Select, model, cursor: str | None = None, limit: int = 10) -> Page:
+    """Страница ORM-объектов model; лишняя (limit+1)-я строка означает «есть ещё»."""
+    result = await session.execute(keyset_query(query, model, cursor, limit))
+    rows = list(result.scalars().all())
+    if len(rows) <= limit:
+        return Page(rows, None)
+    rows = rows[:limit]
+    last = rows[-1]
+    return Page(rows, encode_cursor(last.created_at, last.id))
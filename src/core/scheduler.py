@@ -1,7 +1,7 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy import select
 from src.core.logger import logger
 
@@ -30,28 +30,73 @@ async def daily_stats_job():
     )
     logger.info("Daily stats sent")
 
+REMINDER_BATCH = 100
+REMINDER_MAX_BATCHES = 20  # за один запуск; остальное — через 30 секунд
+REMINDER_MAX_ATTEMPTS = 3
+REMINDER_RETRY_DELAY = timedelta(minutes=5)  # × номер попытки
+
 async def check_reminders_job():
-    from src.bot.bot import bot
+    """Отправить наступившие напоминания пачками по REMINDER_BATCH.
+
+    Пачка забирается SELECT ... FOR UPDATE SKIP LOCKED: несколько инстансов
+    делят очередь без дублей. Пачка рассылается параллельно (delivery),
+    отправленные помечаются, commit снимает блокировки. Если бот
+    заблокирован или исчерпаны REMINDER_MAX_ATTEMPTS, напоминание
+    помечается failed_at и больше не выбирается; иначе remind_at
+    откладывается на REMINDER_RETRY_DELAY × попытка.
+    """
     from src.core.database import async_session
     from src.core.models import Reminder
-    
-    async with async_session() as session:
-        result = await session.execute(
-            select(Reminder)
-            .where(Reminder.is_sent == False)
-            .where(Reminder.remind_at <= datetime.utcnow())
-        )
-        reminders = result.scalars().all()
-        
-        for r in reminders:
-            try:
-                await bot.send_message(r.user_id, f"⏰ Напоминание:\n\n{r.text}")
-                r.is_sent = True
-                logger.info(f"Reminder sent to {r.user_id}")
-            except Exception as e:
-                logger.error(f"Failed to send reminder: {e}")
-        
-        await session.commit()
+    from src.core.services.delivery import OutboundMessage, delivery
+
+    attempted: list[int] = []
+    for _ in range(REMINDER_MAX_BATCHES):
+        async with async_session() as session:
+            query = (
+                select(Reminder)
+                .where(Reminder.is_sent == False)
+                .where(Reminder.failed_at.is_(None))
+                .where(Reminder.remind_at <= datetime.utcnow())
+                .order_by(Reminder.remind_at)
+                .limit(REMINDER_BATCH)
+                .with_for_update(skip_locked=True)
+            )
+            if attempted:
+                query = query.where(Reminder.id.not_in(attempted))
+            result = await session.execute(query)
+            reminders = {r.id: r for r in result.scalars().all()}
+            if not reminders:
+                return
+
+            report = await delivery.send_many(
+                (
+                    OutboundMessage(
+                        chat_id=r.user_id,
+                        text=f"⏰ Напоминание:\n\n{r.text}",
+                        key=r.id,
+                    )
+                    for r in reminders.values()
+                ),
+                kind="reminder",
+            )
+            now = datetime.utcnow()
+            for reminder_id in report.sent_keys:
+                reminders[reminder_id].is_sent = True
+            for reminder_id in report.blocked_keys:
+                reminders[reminder_id].failed_at = now
+            for reminder_id in report.failed_keys:
+                reminder = reminders[reminder_id]
+                reminder.attempts += 1
+                if reminder.attempts >= REMINDER_MAX_ATTEMPTS:
+                    reminder.failed_at = now
+                else:
+                    reminder.remind_at = now + REMINDER_RETRY_DELAY * reminder.attempts
+            await session.commit()
+
+        attempted.extend(reminders)
+        if len(reminders) < REMINDER_BATCH:
+            return
+
 
 async def archive_old_cargos_job():
     from src.core.database import async_session
@@ -75,32 +120,65 @@ async def archive_old_cargos_job():
 
 
 async def push_notifications_job():
-    """Find cargos created in the last 5 min that haven't been notified yet."""
+    """Catch-up sweeper: notify new cargos the events stream has missed."""
     from datetime import timedelta
     from src.core.database import async_session
     from src.core.models import Cargo, CargoStatus
-    from src.core.services.notifications import notify_subscribers
+    from src.core.services.notifications import notify_cargos
 
-    cutoff = datetime.utcnow() - timedelta(minutes=6)
+    # Свежие грузы оставляем потребителю stream'а
+    grace = datetime.utcnow() - timedelta(minutes=1)
     async with async_session() as session:
         result = await session.execute(
             select(Cargo)
             .where(Cargo.status == CargoStatus.NEW)
             .where(Cargo.notified_at.is_(None))
-            .where(Cargo.created_at >= cutoff)
+            .where(Cargo.created_at < grace)
+            .order_by(Cargo.id)
+            .limit(500)
         )
         cargos = result.scalars().all()
 
-        for cargo in cargos:
-            try:
-                await notify_subscribers(cargo)
-                cargo.notified_at = datetime.utcnow()
-            except Exception as e:
-                logger.error("Push notification error for cargo #%s: %s", cargo.id, e)
+    if not cargos:
+        return
 
-        if cargos:
-            await session.commit()
-            logger.info("Push-notified %d new cargos", len(cargos))
+    try:
+        await notify_cargos(list(cargos))
+        logger.info("Push-notified %d missed cargos", len(cargos))
+    except Exception as e:
+        logger.error("Push notification batch error: %s", e)
+
+
+async def company_ratings_job():
+    """Ночная сверка рейтингов всех компаний одним сгруппированным UPDATE."""
+    from src.core.database import async_session
+    from src.core.services.rating import recalculate_all_ratings
+
+    async with async_session() as session:
+        updated = await recalculate_all_ratings(session)
+    logger.info("Company ratings recalculated: %s", updated)
+
+
+async def route_stats_job():
+    """Ночная пересборка статистики цен по маршрутам (route_price_stats)."""
+    from src.core.services.route_stats import refresh_route_stats
+
+    routes = await refresh_route_stats()
+    logger.info("Route price stats rebuilt: %s routes", routes)
+
+
+async def market_prices_refresh_job():
+    """Страховка к pub/sub: перечитать справочник рыночных цен."""
+    from src.core.services.price_book import reload_price_book
+
+    await reload_price_book()
+
+
+async def resume_broadcasts_job():
+    """Подобрать рассылки, брошенные упавшим инстансом (аренда broadcast.LEASE истекла)."""
+    from src.core.services.broadcast import resume_broadcasts
+
+    await resume_broadcasts()
 
 
 def setup_scheduler():
@@ -108,5 +186,9 @@ def setup_scheduler():
     scheduler.add_job(check_reminders_job, IntervalTrigger(seconds=30), id="check_reminders")
     scheduler.add_job(archive_old_cargos_job, CronTrigger(hour=0, minute=10), id="archive_cargos")
     scheduler.add_job(push_notifications_job, IntervalTrigger(minutes=5), id="push_notifications")
+    scheduler.add_job(company_ratings_job, CronTrigger(hour=3, minute=0), id="company_ratings")
+    scheduler.add_job(route_stats_job, CronTrigger(hour=3, minute=30), id="route_stats")
+    scheduler.add_job(market_prices_refresh_job, IntervalTrigger(minutes=15), id="market_prices_refresh")
+    scheduler.add_job(resume_broadcasts_job, IntervalTrigger(minutes=1), id="resume_broadcasts")
     scheduler.start()
     logger.info("Scheduler started")
@@ -0,0 +1,272 @@
+"""
+Персистентные рассылки админа (broadcast_jobs).
+
+Задача идёт в фоне пачками по BATCH_SIZE пользователей: keyset-курсор
+users.id > last_user_id, после каждой пачки — чекпоинт (курсор + счётчики).
+После рестарта незавершённые задачи продолжаются с чекпоинта (resume_broadcasts);
+пачка, прерванная посередине, может быть отправлена повторно.
+Задачу берёт один инстанс (условный UPDATE в _claim); аренду продлевают
+чекпоинт и, пока пачка отправляется, heartbeat раз в HEARTBEAT — пачка
+с flood-wait и таймаутами может идти дольше LEASE. Брошенную дольше LEASE
+задачу подбирает resume_broadcasts_job.
+Отмена — статус CANCELLED, проверяется перед каждой пачкой.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, select, update
+
+from src.core.database import async_session
+from src.core.logger import logger
+from src.core.models import BroadcastJob, BroadcastStatus, User
+from src.core.services.delivery import OutboundMessage, delivery
+
+BATCH_SIZE = 200
+LEASE = timedelta(minutes=5)  # RUNNING без продления дольше — задача брошена, её можно взять
+HEARTBEAT = LEASE / 5
+
+_tasks: dict[int, asyncio.Task] = {}
+
+
+def _recipients_query():
+    return (
+        select(User.id)
+        .where(User.is_banned == False)
+        .where(User.bot_blocked_at.is_(None))
+    )
+
+
+async def create_broadcast(created_by: int, from_chat_id: int, message_id: int) -> BroadcastJob:
+    """Создать задачу рассылки и запустить её в фоне."""
+    async with async_session() as session:
+        total = await session.scalar(
+            select(func.count()).select_from(_recipients_query().subquery())
+        )
+        job = BroadcastJob(
+            created_by=created_by,
+            from_chat_id=from_chat_id,
+            message_id=message_id,
+            status=BroadcastStatus.PENDING,
+            last_user_id=0,
+            total=total or 0,
+            sent=0,
+            failed=0,
+            blocked=0,
+        )
+        session.add(job)
+        await session.commit()
+
+    start_broadcast(job.id)
+    return job
+
+
+def start_broadcast(job_id: int):
+    task = _tasks.get(job_id)
+    if task and not task.done():
+        return
+    _tasks[job_id] = asyncio.create_task(run_broadcast(job_id))
+
+
+async def get_broadcast(job_id: int) -> BroadcastJob | None:
+    async with async_session() as session:
+        return await session.get(BroadcastJob, job_id)
+
+
+async def list_broadcasts(limit: int = 20) -> list[BroadcastJob]:
+    async with async_session() as session:
+        result = await session.execute(
+            select(BroadcastJob).order_by(BroadcastJob.id.desc()).limit(limit)
+        )
+        return list(result.scalars().all())
+
+
+async def cancel_broadcast(job_id: int) -> bool:
+    """Отменить рассылку; текущая пачка дошлётся, следующая не начнётся."""
+    async with async_session() as session:
+        cancelled = await session.scalar(
+            update(BroadcastJob)
+            .where(BroadcastJob.id == job_id)
+            .where(BroadcastJob.status.in_([BroadcastStatus.PENDING, BroadcastStatus.RUNNING]))
+            .values(status=BroadcastStatus.CANCELLED, finished_at=datetime.utcnow())
+            .returning(BroadcastJob.id)
+        )
+        await session.commit()
+    return cancelled is not None
+
+
+async def run_broadcast(job_id: int):
+    try:
+        await _run(job_id)
+    except Exception as e:
+        logger.error("Broadcast #%s crashed: %s", job_id, e, exc_info=True)
+        async with async_session() as session:
+            await session.execute(
+                update(BroadcastJob)
+                .where(BroadcastJob.id == job_id)
+                .where(BroadcastJob.status == BroadcastStatus.RUNNING)
+                .values(status=BroadcastStatus.FAILED, error=str(e)[:500], finished_at=datetime.utcnow())
+            )
+            await session.commit()
+    finally:
+        _tasks.pop(job_id, None)
+
+
+async def _claim(job_id: int) -> bool:
+    """Взять задачу: PENDING (или RUNNING без чекпоинта дольше LEASE) -> RUNNING.
+
+    Условный UPDATE ... RETURNING: отмену, пришедшую раньше, не перезаписывает,
+    а из нескольких инстансов задачу получает только один.
+    """
+    now = datetime.utcnow()
+    async with async_session() as session:
+        claimed = await session.scalar(
+            update(BroadcastJob)
+            .where(BroadcastJob.id == job_id)
+            .where(or_(
+                BroadcastJob.status == BroadcastStatus.PENDING,
+                and_(
+                    BroadcastJob.status == BroadcastStatus.RUNNING,
+                    BroadcastJob.updated_at < now - LEASE,
+                ),
+            ))
+            .values(status=BroadcastStatus.RUNNING, updated_at=now)
+            .returning(BroadcastJob.id)
+        )
+        await session.commit()
+    return claimed is not None
+
+
+async def _heartbeat(job_id: int, cursor: int):
+    """Продлевать аренду, пока отправляется пачка после курсора cursor."""
+    while True:
+        await asyncio.sleep(HEARTBEAT.total_seconds())
+        try:
+            async with async_session() as session:
+                await session.execute(
+                    update(BroadcastJob)
+                    .where(BroadcastJob.id == job_id)
+                    .where(BroadcastJob.status == BroadcastStatus.RUNNING)
+                    .where(BroadcastJob.last_user_id == cursor)
+                    .values(updated_at=datetime.utcnow())
+                )
+                await session.commit()
+        except Exception as e:
+            logger.warning("Broadcast #%s heartbeat failed: %s", job_id, e)
+
+
+async def _run(job_id: int):
+    if not await _claim(job_id):
+        logger.info("Broadcast #%s is cancelled, finished or running elsewhere", job_id)
+        return
+
+    while True:
+        async with async_session() as session:
+            job = await session.get(BroadcastJob, job_id)
+            if not job or job.status != BroadcastStatus.RUNNING:
+                return
+            cursor = job.last_user_id
+            result = await session.execute(
+                _recipients_query()
+                .where(User.id > cursor)
+                .order_by(User.id)
+                .limit(BATCH_SIZE)
+            )
+            user_ids = result.scalars().all()
+
+        if not user_ids:
+            async with async_session() as session:
+                await session.execute(
+                    update(BroadcastJob)
+                    .where(BroadcastJob.id == job_id)
+                    .where(BroadcastJob.status == BroadcastStatus.RUNNING)
+                    .values(status=BroadcastStatus.DONE, finished_at=datetime.utcnow())
+                )
+                await session.commit()
+            break
+
+        heartbeat = asyncio.create_task(_heartbeat(job_id, cursor))
+        try:
+            report = await delivery.send_many(
+                (
+                    OutboundMessage(
+                        chat_id=uid,
+                        copy_from=(job.from_chat_id, job.message_id),
+                        key=f"{job_id}:{uid}",
+                    )
+                    for uid in user_ids
+                ),
+                kind="broadcast",
+            )
+        finally:
+            heartbeat.cancel()
+
+        # Чекпоинт (и продление аренды). Статус не трогаем — его мог сменить
+        # cancel_broadcast; курсор сдвигаем, только если его не сдвинул другой инстанс
+        async with async_session() as session:
+            advanced = await session.scalar(
+                update(BroadcastJob)
+                .where(BroadcastJob.id == job_id)
+                .where(BroadcastJob.last_user_id == cursor)
+                .values(
+                    last_user_id=user_ids[-1],
+                    sent=BroadcastJob.sent + report.sent,
+                    failed=BroadcastJob.failed + report.failed,
+                    blocked=BroadcastJob.blocked + report.blocked,
+                    updated_at=datetime.utcnow(),
+                )
+                .returning(BroadcastJob.id)
+            )
+            await session.commit()
+        if advanced is None:
+            logger.warning("Broadcast #%s was taken over by another instance", job_id)
+            return
+
+    job = await get_broadcast(job_id)
+    logger.info("Broadcast #%s done: %s/%s", job.id, job.sent, job.total)
+    try:
+        from src.bot.bot import bot
+        await bot.send_message(job.created_by, format_broadcast(job))
+    except Exception as e:
+        logger.warning("Broadcast #%s summary not sent: %s", job.id, e)
+
+
+async def resume_broadcasts():
+    """Продолжить незавершённые рассылки (после рестарта и периодически из планировщика).
+
+    Запускается на каждом инстансе; задачу берёт тот, чей _claim прошёл.
+    """
+    async with async_session() as session:
+        result = await session.execute(
+            select(BroadcastJob.id).where(
+                BroadcastJob.status.in_([BroadcastStatus.PENDING, BroadcastStatus.RUNNING])
+            )
+        )
+        job_ids = result.scalars().all()
+    for job_id in job_ids:
+        task = _tasks.get(job_id)
+        if task and not task.done():
+            continue
+        logger.info("Resuming broadcast #%s", job_id)
+        start_broadcast(job_id)
+
+
+_STATUS_LABELS = {
+    BroadcastStatus.PENDING: "⏳ В очереди",
+    BroadcastStatus.RUNNING: "📤 Идёт",
+    BroadcastStatus.DONE: "✅ Завершена",
+    BroadcastStatus.CANCELLED: "⛔ Отменена",
+    BroadcastStatus.FAILED: "❌ Ошибка",
+}
+
+
+def format_broadcast(job: BroadcastJob) -> str:
+    text = f"📣 <b>Рассылка #{job.id}</b>\n"
+    text += f"Статус: {_STATUS_LABELS.get(job.status, job.status.value)}\n"
+    text += f"Обработано: {job.processed}/{job.total}\n"
+    text += f"✅ Отправлено: {job.sent}\n"
+    text += f"🚫 Заблокировали бота: {job.blocked}\n"
+    text += f"❌ Ошибок: {job.failed}"
+    if job.error:
+        text += f"\n⚠️ {job.error[:200]}"
+    return text
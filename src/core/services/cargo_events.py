@@ -0,0 +1,133 @@
+"""
+События грузов в Redis Stream и их потребитель (consumer group).
+
+Публикация: publish_cargo_created() при создании/восстановлении груза.
+Потребитель: cargo_events_loop() читает stream группой "notifier", рассылает
+уведомления пачкой (notify_cargos) и подтверждает события (XACK).
+Имя consumer'а меняется при рестарте (host-pid), поэтому неподтверждённые
+события любого consumer'а, пролежавшие дольше CLAIM_IDLE_MS, забираются
+XAUTOCLAIM'ом — при старте и раз в CLAIM_EVERY секунд. Дубли исключены:
+notify_cargos берёт груз условным UPDATE по notified_at.
+Всё, что не дошло через stream, подберёт push_notifications_job
+(notified_at IS NULL).
+"""
+
+import asyncio
+import os
+import socket
+import time
+
+from redis.exceptions import ResponseError
+from sqlalchemy import select
+
+from src.core.database import async_session
+from src.core.logger import logger
+from src.core.models import Cargo, CargoStatus
+from src.core.redis import get_redis
+
+STREAM = "cargo:events"
+GROUP = "notifier"
+CONSUMER = f"{socket.gethostname()}-{os.getpid()}"
+STREAM_MAXLEN = 10000
+READ_COUNT = 100
+BLOCK_MS = 5000
+CLAIM_IDLE_MS = 60_000  # неподтверждённое дольше — consumer, вероятно, умер
+CLAIM_EVERY = 30  # секунд между проходами XAUTOCLAIM
+
+
+async def publish_cargo_created(cargo_id: int) -> bool:
+    """Опубликовать событие; False — Redis недоступен (груз подберёт sweeper)."""
+    try:
+        redis = await get_redis()
+        await redis.xadd(
+            STREAM,
+            {"type": "cargo_created", "cargo_id": str(cargo_id)},
+            maxlen=STREAM_MAXLEN,
+            approximate=True,
+        )
+        return True
+    except Exception as e:
+        logger.warning("Cargo event publish failed for #%s: %s", cargo_id, e)
+        return False
+
+
+async def _ensure_group(redis):
+    try:
+        await redis.xgroup_create(STREAM, GROUP, id="$", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def _handle(redis, entries: list[tuple[str, dict]]):
+    from src.core.services.notifications import notify_cargos
+
+    if not entries:
+        return
+    cargo_ids = {
+        int(fields["cargo_id"])
+        for _, fields in entries
+        if fields.get("type") == "cargo_created" and fields.get("cargo_id")
+    }
+    if cargo_ids:
+        async with async_session() as session:
+            result = await session.execute(
+                select(Cargo)
+                .where(Cargo.id.in_(cargo_ids))
+                .where(Cargo.status == CargoStatus.NEW)
+                .where(Cargo.notified_at.is_(None))
+            )
+            cargos = list(result.scalars().all())
+        if cargos:
+            await notify_cargos(cargos)
+
+    await redis.xack(STREAM, GROUP, *[entry_id for entry_id, _ in entries])
+
+
+async def _claim_stale(redis):
+    """Забрать и обработать зависшие события других (в т.ч. умерших) consumer'ов."""
+    start_id = "0-0"
+    while True:
+        response = await redis.xautoclaim(
+            STREAM, GROUP, CONSUMER, CLAIM_IDLE_MS, start_id=start_id, count=READ_COUNT
+        )
+        # Redis 7: [next_id, entries, deleted_ids]; Redis 6.2: [next_id, entries]
+        start_id, entries = response[0], response[1]
+        entries = [(entry_id, fields) for entry_id, fields in entries if fields]
+        if entries:
+            logger.info("Cargo events: claimed %d stale entries", len(entries))
+            await _handle(redis, entries)
+        if start_id in ("0-0", b"0-0"):
+            return
+
+
+async def cargo_events_loop():
+    """Фоновый потребитель событий грузов."""
+    redis = await get_redis()
+    await _ensure_group(redis)
+
+    # Сначала — свои неподтверждённые события (процесс упал до XACK)
+    last_id = "0"
+    next_claim = 0.0
+    while True:
+        try:
+            if time.monotonic() >= next_claim:
+                next_claim = time.monotonic() + CLAIM_EVERY
+                await _claim_stale(redis)
+            response = await redis.xreadgroup(
+                GROUP,
+                CONSUMER,
+                {STREAM: last_id},
+                count=READ_COUNT,
+                block=None if last_id == "0" else BLOCK_MS,
+            )
+            entries = response[0][1] if response else []
+            if last_id == "0" and not entries:
+                last_id = ">"
+                continue
+            await _handle(redis, entries)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Cargo events loop error: %s", e)
+            await asyncio.sleep(5)
@@ -0,0 +1,80 @@
+"""
+Поиск грузов: единый построитель запросов для бота, inline, WebApp и API.
+
+Фильтр по городам:
+- город из справочника — равенство по from_city_id/to_city_id, индекс
+  (status, from_city_id, to_city_id, created_at DESC);
+- справочник не загружен — равенство по from_city_norm/to_city_norm;
+- произвольный фрагмент («мос») — LIKE '%...%' по *_norm, обслуживается GIN pg_trgm.
+Индексы — migrations/008_cargo_search.sql, migrations/009_city_ids.sql.
+"""
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cities import city_id, city_key, is_known_city_key
+from src.core.models import Cargo, CargoStatus
+from src.core.pagination import Page, fetch_page
+
+
+def _city_clause(id_column, norm_column, raw: str | None):
+    key = city_key(raw)
+    if not key:
+        return None
+    cid = city_id(key)
+    if cid is not None:
+        return id_column == cid
+    if is_known_city_key(key):
+        return norm_column == key
+    return norm_column.contains(key, autoescape=True)
+
+
+def cargo_search_query(
+    from_city: str | None = None,
+    to_city: str | None = None,
+    min_weight: float | None = None,
+    max_weight: float | None = None,
+    max_price: int | None = None,
+    status: CargoStatus = CargoStatus.NEW,
+) -> Select:
+    """SELECT грузов по фильтрам, новые сверху."""
+    query = select(Cargo).where(Cargo.status == status)
+
+    from_clause = _city_clause(Cargo.from_city_id, Cargo.from_city_norm, from_city)
+    if from_clause is not None:
+        query = query.where(from_clause)
+
+    to_clause = _city_clause(Cargo.to_city_id, Cargo.to_city_norm, to_city)
+    if to_clause is not None:
+        query = query.where(to_clause)
+
+    if min_weight is not None:
+        query = query.where(Cargo.weight >= min_weight)
+    if max_weight is not None:
+        query = query.where(Cargo.weight <= max_weight)
+    if max_price is not None:
+        query = query.where(Cargo.price <= max_price)
+
+    return query.order_by(Cargo.created_at.desc())
+
+
+async def search_cargos(
+    session: AsyncSession,
+    *,
+    limit: int = 10,
+    **filters,
+) -> list[Cargo]:
+    """Выполнить поиск; filters — аргументы cargo_search_query."""
+    result = await session.execute(cargo_search_query(**filters).limit(limit))
+    return list(result.scalars().all())
+
+
+async def search_cargos_page(
+    session: AsyncSession,
+    *,
+    cursor: str | None = None,
+    limit: int = 10,
+    **filters,
+) -> Page[Cargo]:
+    """Страница поиска после cursor (см. src.core.pagination)."""
+    return await fetch_page(session, cargo_search_query(**filters), Cargo, cursor, limit)
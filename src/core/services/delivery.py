@@ -0,0 +1,240 @@
+"""
+Исходящая доставка сообщений Telegram для массовых рассылок.
+
+- пул asyncio-воркеров;
+- глобальный token bucket (~30 msg/s, лимит Bot API) и не чаще 1 msg/s в один чат;
+- TelegramRetryAfter: ждём retry_after и повторяем;
+- зависший запрос обрывается через SEND_TIMEOUT и уходит в dead letter;
+- TelegramForbiddenError: пользователь заблокировал бота — users.bot_blocked_at;
+- прочие ошибки — запись в delivery_failures (dead letter): одна строка на
+  сообщение (kind, key) со счётчиком attempts, повтор обновляет её.
+Вызывающий получает DeliveryReport со счётчиками и ключами сообщений
+(sent_keys / failed_keys / blocked_keys), чтобы пометить источник.
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Iterable
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+
+from src.core.database import async_session
+from src.core.logger import logger
+from src.core.models import DeliveryFailure, User
+
+GLOBAL_RATE = 30.0  # сообщений в секунду на бота
+PER_CHAT_INTERVAL = 1.0  # секунд между сообщениями в один чат
+MAX_RETRIES = 3
+WORKERS = 20
+SEND_TIMEOUT = 15.0  # секунд на один запрос к Bot API
+
+
+@dataclass
+class OutboundMessage:
+    chat_id: int
+    text: str | None = None
+    reply_markup: Any = None
+    # copy_message: (from_chat_id, message_id) вместо text
+    copy_from: tuple[int, int] | None = None
+    # произвольный ключ вызывающего (например, Reminder.id) — попадает в report.*_keys
+    # и в delivery_failures.key; без ключа dead letter ключуется по chat_id
+    key: Any = None
+
+    @property
+    def failure_key(self) -> str:
+        return str(self.key) if self.key is not None else f"chat:{self.chat_id}"
+
+
+@dataclass
+class DeliveryReport:
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    blocked: int = 0
+    throttled: int = 0
+    sent_keys: list = field(default_factory=list)
+    failed_keys: list = field(default_factory=list)
+    blocked_keys: list = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return (
+            f"sent={self.sent}/{self.total} failed={self.failed} "
+            f"blocked={self.blocked} throttled={self.throttled}"
+        )
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Flood-wait от Telegram касается всего бота — опустошаем корзину."""
+        self._tokens = -seconds * self.rate
+
+
+class DeliveryEngine:
+    def __init__(
+        self,
+        rate: float = GLOBAL_RATE,
+        per_chat_interval: float = PER_CHAT_INTERVAL,
+        workers: int = WORKERS,
+    ):
+        self.bucket = TokenBucket(rate)
+        self.per_chat_interval = per_chat_interval
+        self.workers = workers
+        self._chat_next: dict[int, float] = {}
+
+    async def _chat_slot(self, chat_id: int):
+        now = time.monotonic()
+        ready_at = self._chat_next.get(chat_id, now)
+        self._chat_next[chat_id] = max(ready_at, now) + self.per_chat_interval
+        if ready_at > now:
+            await asyncio.sleep(ready_at - now)
+
+    async def _send(self, msg: OutboundMessage):
+        from src.bot.bot import bot
+
+        if msg.copy_from:
+            from_chat_id, message_id = msg.copy_from
+            await bot.copy_message(msg.chat_id, from_chat_id, message_id)
+        else:
+            await bot.send_message(msg.chat_id, msg.text, reply_markup=msg.reply_markup)
+
+    async def _deliver_one(
+        self,
+        msg: OutboundMessage,
+        report: DeliveryReport,
+        blocked: list[int],
+        dead: list[dict],
+    ):
+        for attempt in range(MAX_RETRIES + 1):
+            await self._chat_slot(msg.chat_id)
+            await self.bucket.acquire()
+            try:
+                await asyncio.wait_for(self._send(msg), SEND_TIMEOUT)
+                report.sent += 1
+                if msg.key is not None:
+                    report.sent_keys.append(msg.key)
+                return
+            except TelegramRetryAfter as e:
+                report.throttled += 1
+                self.bucket.pause(e.retry_after)
+                if attempt < MAX_RETRIES:
+                    await asyncio.sleep(e.retry_after)
+                    continue
+                error = f"retry_after exhausted: {e.retry_after}s"
+            except TelegramForbiddenError:
+                report.blocked += 1
+                blocked.append(msg.chat_id)
+                if msg.key is not None:
+                    report.blocked_keys.append(msg.key)
+                return
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            report.failed += 1
+            if msg.key is not None:
+                report.failed_keys.append(msg.key)
+            dead.append({
+                "key": msg.failure_key[:100],
+                "chat_id": msg.chat_id,
+                "error": error[:500],
+                "payload_json": json.dumps(
+                    {"text": msg.text, "copy_from": msg.copy_from, "key": msg.key},
+                    ensure_ascii=False,
+                    default=str,
+                ),
+            })
+            return
+
+    async def send_many(
+        self,
+        messages: Iterable[OutboundMessage],
+        kind: str = "message",
+    ) -> DeliveryReport:
+        """Разослать сообщения пулом воркеров; блокирует до окончания рассылки."""
+        queue: asyncio.Queue[OutboundMessage] = asyncio.Queue()
+        for msg in messages:
+            queue.put_nowait(msg)
+
+        report = DeliveryReport(total=queue.qsize())
+        if not report.total:
+            return report
+
+        blocked: list[int] = []
+        dead: list[dict] = []
+
+        async def worker():
+            while True:
+                try:
+                    msg = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    await self._deliver_one(msg, report, blocked, dead)
+                except Exception as e:
+                    logger.error("Delivery worker error for chat %s: %s", msg.chat_id, e)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, report.total))))
+        await self._persist(kind, blocked, dead)
+        self._chat_next = {
+            chat_id: t for chat_id, t in self._chat_next.items() if t > time.monotonic()
+        }
+
+        logger.info("Delivery %s: %s", kind, report)
+        return report
+
+    async def _persist(self, kind: str, blocked: list[int], dead: list[dict]):
+        if not blocked and not dead:
+            return
+        try:
+            async with async_session() as session:
+                if blocked:
+                    await session.execute(
+                        update(User)
+                        .where(User.id.in_(blocked))
+                        .values(bot_blocked_at=datetime.utcnow())
+                    )
+                # Повторная неудача того же сообщения — attempts + 1, а не новая строка
+                rows = list({row["key"]: {"kind": kind, **row} for row in dead}.values())
+                if rows:
+                    stmt = insert(DeliveryFailure).values(rows)
+                    await session.execute(
+                        stmt.on_conflict_do_update(
+                            index_elements=["kind", "key"],
+                            set_={
+                                "chat_id": stmt.excluded.chat_id,
+                                "error": stmt.excluded.error,
+                                "payload_json": stmt.excluded.payload_json,
+                                "attempts": DeliveryFailure.attempts + 1,
+                                "updated_at": datetime.utcnow(),
+                            },
+                        )
+                    )
+                await session.commit()
+        except Exception as e:
+            logger.error("Delivery persist failed (%s): %s", kind, e)
+
+
+delivery = DeliveryEngine()
@@ -0,0 +1,219 @@
+"""
+Кэш проверки контрагента по ИНН: Redis (быстрый) + legal_check_cache (Postgres).
+
+Ответ каждого источника хранится со своим временем проверки и своим TTL
+(SOURCE_TTL: статус в ФНС — сутки, ФССП — час). cached_legal_check():
+- свежие ответы отдаются из кэша без запросов;
+- устаревшие, но не старше MAX_STALE, тоже отдаются сразу, а в фоне
+  запускается перепроверка только этих источников (stale-while-revalidate,
+  одна на ИНН — Redis-замок);
+- отсутствующие запрашиваются сейчас (full_legal_check с known=...).
+
+Кэшируются только состоявшиеся ответы ("ok", "not_found"): ошибки
+и таймауты источников не должны закрепляться на часы.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy import Text, cast, select
+from sqlalchemy.dialects.postgresql import JSONB, insert
+
+from src.core.database import async_session
+from src.core.logger import logger
+from src.core.models import LegalCheckCache
+from src.core.redis import get_redis
+from src.core.services.legal_check import SOURCES, full_legal_check, score_legal_check
+
+SOURCE_TTL = {
+    "fns": timedelta(days=1),
+    "arbitr": timedelta(hours=12),
+    "fssp": timedelta(hours=1),
+    "bankrupt": timedelta(hours=6),
+}
+MAX_STALE = timedelta(days=7)
+CACHEABLE_STATUSES = {"ok", "not_found"}
+REFRESH_LOCK_TTL = 120
+
+_KEY = "legal_check:{}"
+_LOCK_KEY = "legal_check:refresh:{}"
+
+# Фоновые перепроверки по ИНН (ссылки держим, чтобы задачи не собрал GC)
+_refresh_tasks: dict[str, asyncio.Task] = {}
+
+
+async def _load(inn: str) -> dict[str, dict]:
+    """{источник: {"result": ..., "checked_at": ISO}} из Redis, иначе из Postgres."""
+    try:
+        redis = await get_redis()
+        raw = await redis.get(_KEY.format(inn))
+        if raw:
+            return json.loads(raw)
+    except Exception as e:
+        logger.warning("Legal cache read failed for %s: %s", inn, e)
+
+    try:
+        async with async_session() as session:
+            row = await session.scalar(
+                select(LegalCheckCache).where(LegalCheckCache.inn == inn)
+            )
+    except Exception as e:
+        logger.warning("Legal cache DB read failed for %s: %s", inn, e)
+        return {}
+    if not row:
+        return {}
+    entries = json.loads(row.sources_json)
+    await _cache_in_redis(inn, entries)
+    return entries
+
+
+async def _cache_in_redis(inn: str, entries: dict[str, dict]):
+    try:
+        redis = await get_redis()
+        await redis.set(
+            _KEY.format(inn),
+            json.dumps(entries, ensure_ascii=False),
+            ex=int(MAX_STALE.total_seconds()),
+        )
+    except Exception as e:
+        logger.warning("Legal cache write failed for %s: %s", inn, e)
+
+
+async def _store(inn: str, results: dict, sources) -> dict[str, dict]:
+    """Дописать ответы sources в кэш (Postgres + Redis); вернуть записи ИНН.
+
+    Слияние с уже сохранёнными источниками — в самом UPSERT (jsonb ||),
+    чтобы параллельные /check и фоновая перепроверка не затирали друг друга.
+    """
+    checked_at = datetime.utcnow().isoformat()
+    fresh = {
+        source: {"result": results[source], "checked_at": checked_at}
+        for source in sources
+        if results.get(source, {}).get("status") in CACHEABLE_STATUSES
+    }
+    if not fresh:
+        return await _load(inn)
+
+    try:
+        async with async_session() as session:
+            stmt = insert(LegalCheckCache).values(
+                inn=inn,
+                sources_json=json.dumps(fresh, ensure_ascii=False),
+                updated_at=datetime.utcnow(),
+            )
+            merged = cast(
+                cast(LegalCheckCache.sources_json, JSONB).op("||")(cast(stmt.excluded.sources_json, JSONB)),
+                Text,
+            )
+            payload = await session.scalar(
+                stmt.on_conflict_do_update(
+                    index_elements=["inn"],
+                    set_={"sources_json": merged, "updated_at": stmt.excluded.updated_at},
+                ).returning(LegalCheckCache.sources_json)
+            )
+            await session.commit()
+        entries = json.loads(payload)
+    except Exception as e:
+        logger.warning("Legal cache DB write failed for %s: %s", inn, e)
+        entries = {**await _load(inn), **fresh}
+    await _cache_in_redis(inn, entries)
+    return entries
+
+
+def _split(entries: dict[str, dict], now: datetime) -> tuple[dict, dict]:
+    """(свежие, устаревшие-но-годные) записи по TTL источников."""
+    fresh, stale = {}, {}
+    for source, entry in entries.items():
+        if source not in SOURCE_TTL:
+            continue
+        age = now - datetime.fromisoformat(entry["checked_at"])
+        if age < SOURCE_TTL[source]:
+            fresh[source] = entry
+        elif age < MAX_STALE:
+            stale[source] = entry
+    return fresh, stale
+
+
+async def _refresh(inn: str, sources: tuple[str, ...]):
+    redis = None
+    try:
+        redis = await get_redis()
+        if not await redis.set(_LOCK_KEY.format(inn), "1", nx=True, ex=REFRESH_LOCK_TTL):
+            return
+    except Exception as e:
+        logger.warning("Legal cache lock failed for %s: %s", inn, e)
+        redis = None
+
+    try:
+        entries = await _load(inn)
+        known = {s: e["result"] for s, e in entries.items() if s in SOURCES and s not in sources}
+        results = await full_legal_check(inn, known=known)
+        await _store(inn, results, sources)
+        logger.info("Legal cache refreshed %s: %s", inn, ", ".join(sources))
+    except Exception as e:
+        logger.error("Legal cache refresh failed for %s: %s", inn, e)
+    finally:
+        if redis is not None:
+            try:
+                await redis.delete(_LOCK_KEY.format(inn))
+            except Exception as e:
+                logger.warning("Legal cache unlock failed for %s: %s", inn, e)
+
+
+def _schedule_refresh(inn: str, sources: tuple[str, ...]):
+    if inn in _refresh_tasks:
+        return
+    task = asyncio.create_task(_refresh(inn, sources))
+    _refresh_tasks[inn] = task
+    task.add_done_callback(lambda _: _refresh_tasks.pop(inn, None))
+
+
+async def cached_legal_check(
+    inn: str,
+    on_update: Callable[[dict], Awaitable[None]] | None = None,
+) -> dict:
+    """full_legal_check через кэш; result["cached_at"] — время самого старого ответа из кэша."""
+    entries = await _load(inn)
+    fresh, stale = _split(entries, datetime.utcnow())
+    cached = {**fresh, **stale}
+
+    known = {source: entry["result"] for source, entry in cached.items()}
+    result = await full_legal_check(inn, on_update=on_update, known=known)
+
+    missing = tuple(source for source in SOURCES if source not in known)
+    if missing:
+        await _store(inn, result, missing)
+    if stale:
+        _schedule_refresh(inn, tuple(stale))
+
+    if cached:
+        result["cached_at"] = min(entry["checked_at"] for entry in cached.values())
+    return result
+
+
+async def cached_risks(session, inns) -> dict[str, dict]:
+    """{ИНН: результат с risk_*} по кэшу одним запросом, без обращения к источникам.
+
+    Нужен хотя бы ответ ФНС не старше MAX_STALE; ИНН без него в ответ не попадают.
+    """
+    inns = {inn for inn in inns if inn}
+    if not inns:
+        return {}
+    rows = await session.execute(
+        select(LegalCheckCache.inn, LegalCheckCache.sources_json).where(LegalCheckCache.inn.in_(inns))
+    )
+    now = datetime.utcnow()
+    risks = {}
+    for inn, sources_json in rows.all():
+        fresh, stale = _split(json.loads(sources_json), now)
+        cached = {**fresh, **stale}
+        if "fns" not in cached:
+            continue
+        results = {source: {"status": "unknown"} for source in SOURCES}
+        results.update({source: entry["result"] for source, entry in cached.items()})
+        results["inn"] = inn
+        results["cached_at"] = min(entry["checked_at"] for entry in cached.values())
+        risks[inn] = score_legal_check(results)
+    return risks
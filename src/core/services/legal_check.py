@@ -4,48 +4,80 @@ AI-юрист: проверка контрагента по ИНН
 - Арбитражные суды (kad.arbitr.ru)
 - ФССП (исполнительные производства)
 - Банкротство (fedresurs)
+
+Источники опрашиваются параллельно (iter_legal_check) под общим дедлайном
+settings.legal_check_deadline; ФССП ждёт только ответа ФНС (нужно название).
+Результаты отдаются по мере готовности — бот редактирует сообщение после
+каждого источника. Не ответившие к дедлайну получают status="timeout".
+Адреса источников — settings.legal_*_url (можно направить на stub-серверы),
+одновременных запросов к одному источнику — не больше settings.legal_source_concurrency.
+Кэш по ИНН с TTL на источник — src.core.services.legal_cache.
 """
 
-import httpx
+import asyncio
+import time
 from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable
 
+from src.core.config import settings
+from src.core.http import get_http_client
 from src.core.logger import logger
 
+SOURCES = ("fns", "arbitr", "fssp", "bankrupt")
+SOURCE_TITLES = {
+    "fns": "ФНС",
+    "arbitr": "Арбитражные суды",
+    "fssp": "ФССП",
+    "bankrupt": "Банкротство",
+}
+
+# Не больше settings.legal_source_concurrency одновременных запросов к источнику
+_source_slots: dict[str, asyncio.Semaphore] = {}
+
+
+async def _limited(source: str, check: Callable[[], Awaitable[dict]]) -> dict:
+    slots = _source_slots.get(source)
+    if slots is None:
+        slots = _source_slots[source] = asyncio.Semaphore(settings.legal_source_concurrency)
+    async with slots:
+        return await check()
+
 
 async def check_fns(inn: str) -> dict:
     """Проверка в ФНС — статус, название, адрес, директор"""
-    url = "https://egrul.nalog.ru/api/search"
+    base_url = settings.legal_fns_url.rstrip("/")
+    url = f"{base_url}/api/search"
 
     try:
-        async with httpx.AsyncClient(timeout=15) as client:
-            resp = await client.post(url, json={"query": inn})
-            data = resp.json()
+        client = get_http_client("legal")
+        resp = await client.post(url, json={"query": inn}, timeout=15)
+        data = resp.json()
 
-            if not data.get("rows"):
-                return {
-                    "status": "not_found",
-                    "message": "Компания не найдена в ЕГРЮЛ",
-                }
+        if not data.get("rows"):
+            return {
+                "status": "not_found",
+                "message": "Компания не найдена в ЕГРЮЛ",
+            }
 
-            row = data["rows"][0]
-            token = row.get("t")
+        row = data["rows"][0]
+        token = row.get("t")
 
-            detail_resp = await client.get(
-                f"https://egrul.nalog.ru/api/vyp/{token}"
-            )
-            detail_resp.raise_for_status()
+        detail_resp = await client.get(
+            f"{base_url}/api/vyp/{token}", timeout=15
+        )
+        detail_resp.raise_for_status()
 
-            return {
-                "status": "ok",
-                "name": row.get("n", ""),
-                "inn": row.get("i", ""),
-                "ogrn": row.get("o", ""),
-                "address": row.get("a", ""),
-                "director": row.get("g", ""),
-                "reg_date": row.get("r", ""),
-                "is_active": row.get("s") != "ликвидирована",
-                "raw": row,
-            }
+        return {
+            "status": "ok",
+            "name": row.get("n", ""),
+            "inn": row.get("i", ""),
+            "ogrn": row.get("o", ""),
+            "address": row.get("a", ""),
+            "director": row.get("g", ""),
+            "reg_date": row.get("r", ""),
+            "is_active": row.get("s") != "ликвидирована",
+            "raw": row,
+        }
     except Exception as e:
         logger.error("FNS check error: %s", e)
         return {"status": "error", "message": str(e)}
@@ -53,7 +85,7 @@ async def check_fns(inn: str) -> dict:
 
 async def check_arbitr(inn: str) -> dict:
     """Проверка арбитражных дел на kad.arbitr.ru"""
-    url = "https://kad.arbitr.ru/Kad/SearchInstances"
+    url = f"{settings.legal_arbitr_url.rstrip('/')}/Kad/SearchInstances"
 
     headers = {
         "User-Agent": "Mozilla/5.0 (compatible; LogisticsBot/1.0)",
@@ -70,55 +102,59 @@ async def check_arbitr(inn: str) -> dict:
     }
 
     try:
-        async with httpx.AsyncClient(timeout=20) as client:
-            resp = await client.post(url, json=payload, headers=headers)
-            data = resp.json()
+        client = get_http_client("legal")
+        resp = await client.post(url, json=payload, headers=headers, timeout=20)
+        data = resp.json()
 
-            result = data.get("Result", {})
-            cases = result.get("Items", [])
-            total = result.get("TotalCount", 0)
+        result = data.get("Result", {})
+        cases = result.get("Items", [])
+        total = result.get("TotalCount", 0)
 
-            as_plaintiff = 0
-            as_defendant = 0
+        as_plaintiff = 0
+        as_defendant = 0
 
-            for case in cases:
-                for p in case.get("Participants", []):
-                    if inn in str(p.get("Inn", "")):
-                        if p.get("Type") == 1:
-                            as_plaintiff += 1
-                        elif p.get("Type") == 2:
-                            as_defendant += 1
+        for case in cases:
+            for p in case.get("Participants", []):
+                if inn in str(p.get("Inn", "")):
+                    if p.get("Type") == 1:
+                        as_plaintiff += 1
+                    elif p.get("Type") == 2:
+                        as_defendant += 1
 
-            return {
-                "status": "ok",
-                "total_cases": total,
-                "as_plaintiff": as_plaintiff,
-                "as_defendant": as_defendant,
-                "recent_cases": cases[:5],
-            }
+        return {
+            "status": "ok",
+            "total_cases": total,
+            "as_plaintiff": as_plaintiff,
+            "as_defendant": as_defendant,
+            "recent_cases": cases[:5],
+        }
     except Exception as e:
         logger.error("Arbitr check error: %s", e)
         return {"status": "error", "message": str(e)}
 
 
-async def check_fssp(inn: str, region: int = 0) -> dict:
-    """Проверка исполнительных производств в ФССП (по названию из ФНС)."""
-    url = "https://fssp.gov.ru/iss/ip"
+async def check_fssp(inn: str, region: int = 0, fns: dict | None = None) -> dict:
+    """Проверка исполнительных производств в ФССП (по названию из ФНС).
+
+    fns — уже полученный ответ check_fns, чтобы не запрашивать ФНС второй раз.
+    """
+    url = f"{settings.legal_fssp_url.rstrip('/')}/iss/ip"
 
     try:
-        fns = await check_fns(inn)
+        if fns is None:
+            fns = await check_fns(inn)
         if fns["status"] != "ok":
             return {"status": "skip", "message": "Не удалось получить название"}
 
         name = fns.get("name", "")
 
-        async with httpx.AsyncClient(timeout=15) as client:
-            params = {
-                "is": "ip",
-                "searchstring": name[:50],
-                "region_id": region,
-            }
-            resp = await client.get(url, params=params)
+        client = get_http_client("legal")
+        params = {
+            "is": "ip",
+            "searchstring": name[:50],
+            "region_id": region,
+        }
+        resp = await client.get(url, params=params, timeout=15)
 
         has_debts = (
             "Найдено:" in resp.text and "Ничего не найдено" not in resp.text
@@ -136,16 +172,16 @@ async def check_fssp(inn: str, region: int = 0) -> dict:
 
 async def check_bankrupt(inn: str) -> dict:
     """Проверка на банкротство в fedresurs"""
-    url = "https://bankrot.fedresurs.ru/backend/sfactmessages"
+    url = f"{settings.legal_bankrupt_url.rstrip('/')}/backend/sfactmessages"
 
     try:
-        async with httpx.AsyncClient(timeout=15) as client:
-            params = {
-                "searchString": inn,
-                "pageSize": 10,
-            }
-            resp = await client.get(url, params=params)
-            data = resp.json()
+        client = get_http_client("legal")
+        params = {
+            "searchString": inn,
+            "pageSize": 10,
+        }
+        resp = await client.get(url, params=params, timeout=15)
+        data = resp.json()
 
         messages = data.get("pageData", [])
         is_bankrupt = len(messages) > 0
@@ -166,17 +202,65 @@ async def check_bankrupt(inn: str) -> dict:
         return {"status": "error", "message": str(e)}
 
 
-async def full_legal_check(inn: str) -> dict:
-    """Полная проверка контрагента по ИНН."""
-    results = {
-        "inn": inn,
-        "checked_at": datetime.utcnow().isoformat(),
-        "fns": await check_fns(inn),
-        "arbitr": await check_arbitr(inn),
-        "fssp": await check_fssp(inn),
-        "bankrupt": await check_bankrupt(inn),
-    }
+async def iter_legal_check(
+    inn: str,
+    deadline: float | None = None,
+    sources: tuple[str, ...] = SOURCES,
+    fns: dict | None = None,
+) -> AsyncIterator[tuple[str, dict]]:
+    """(источник, результат) в порядке готовности; все sources — не позже deadline секунд.
 
+    fns — известный ответ ФНС (например, из кэша), если "fns" не в sources.
+    """
+    deadline = settings.legal_check_deadline if deadline is None else deadline
+    started = time.monotonic()
+
+    fns_task = (
+        asyncio.create_task(_limited("fns", lambda: check_fns(inn)))
+        if "fns" in sources else None
+    )
+
+    async def fssp_after_fns() -> dict:
+        known = await asyncio.shield(fns_task) if fns_task else fns
+        return await _limited("fssp", lambda: check_fssp(inn, fns=known))
+
+    checks = {
+        "arbitr": lambda: _limited("arbitr", lambda: check_arbitr(inn)),
+        "fssp": fssp_after_fns,
+        "bankrupt": lambda: _limited("bankrupt", lambda: check_bankrupt(inn)),
+    }
+    tasks = {fns_task: "fns"} if fns_task else {}
+    for source in sources:
+        if source in checks:
+            tasks[asyncio.create_task(checks[source]())] = source
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                try:
+                    result = task.result()
+                except Exception as e:
+                    logger.error("Legal check %s failed: %s", tasks[task], e)
+                    result = {"status": "error", "message": str(e)}
+                yield tasks[task], result
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    for task in pending:
+        logger.warning("Legal check %s timed out after %.1fs", tasks[task], deadline)
+        yield tasks[task], {"status": "timeout", "message": "Источник не ответил вовремя"}
+
+
+def score_legal_check(results: dict) -> dict:
+    """Дописывает risk_score / risk_factors / risk_level по результатам источников."""
     risk_score = 0
     risk_factors = []
 
@@ -185,9 +269,12 @@ async def full_legal_check(inn: str) -> dict:
         if not fns.get("is_active"):
             risk_score += 50
             risk_factors.append("❌ Компания ликвидирована")
-    else:
+    elif fns["status"] == "not_found":
         risk_score += 30
         risk_factors.append("⚠️ Не найдена в ЕГРЮЛ")
+    else:
+        risk_score += 30
+        risk_factors.append("⚠️ ЕГРЮЛ недоступен — данные не проверены")
 
     arbitr = results["arbitr"]
     if arbitr["status"] == "ok":
@@ -222,17 +309,52 @@ async def full_legal_check(inn: str) -> dict:
         if risk_score < 50
         else "🔴 Высокий"
     )
-
     return results
 
 
+async def full_legal_check(
+    inn: str,
+    on_update: Callable[[dict], Awaitable[None]] | None = None,
+    deadline: float | None = None,
+    known: dict[str, dict] | None = None,
+) -> dict:
+    """Полная проверка контрагента по ИНН.
+
+    on_update(results) вызывается после каждого источника с частичным
+    результатом (без risk_*), итог — с оценкой риска. known — уже известные
+    ответы источников (кэш): опрашиваются только остальные.
+    """
+    results = {
+        "inn": inn,
+        "checked_at": datetime.utcnow().isoformat(),
+        **(known or {}),
+    }
+    missing = tuple(source for source in SOURCES if source not in results)
+    async for source, result in iter_legal_check(inn, deadline, missing, results.get("fns")):
+        results[source] = result
+        done = sum(name in results for name in SOURCES)
+        if on_update and done < len(SOURCES):
+            try:
+                await on_update(results)
+            except Exception as e:
+                logger.warning("Legal check progress update failed: %s", e)
+
+    return score_legal_check(results)
+
+
 def format_legal_check(result: dict) -> str:
-    """Форматирует результат проверки для отправки пользователю."""
+    """Форматирует результат проверки (в т.ч. частичный) для отправки пользователю."""
     text = "🔍 <b>Проверка контрагента</b>\n"
-    text += f"ИНН: {result['inn']}\n\n"
+    text += f"ИНН: {result['inn']}\n"
+    if result.get("cached_at"):
+        cached_at = datetime.fromisoformat(result["cached_at"])
+        text += f"🕒 Часть данных из кэша от {cached_at:%d.%m.%Y %H:%M} UTC\n"
+    text += "\n"
 
     fns = result.get("fns", {})
-    if fns.get("status") == "ok":
+    if "fns" not in result:
+        text += "⏳ ФНС: проверяю…\n\n"
+    elif fns.get("status") == "ok":
         text += f"🏢 <b>{fns.get('name', 'Без названия')}</b>\n"
         addr = fns.get("address", "Адрес не указан")
         suffix = "..." if len(addr) > 50 else ""
@@ -259,6 +381,22 @@ def format_legal_check(result: dict) -> str:
     if bankrupt.get("status") == "ok":
         text += f"💀 <b>Банкротство:</b> {bankrupt.get('message', '?')}\n\n"
 
+    notes = []
+    for source in ("arbitr", "fssp", "bankrupt"):
+        title = SOURCE_TITLES[source]
+        status = result.get(source, {}).get("status")
+        if source not in result:
+            notes.append(f"⏳ {title}: проверяю…")
+        elif status == "timeout":
+            notes.append(f"⌛ {title}: не ответил вовремя")
+        elif status == "error":
+            notes.append(f"⚠️ {title}: ошибка проверки")
+    if notes:
+        text += "\n".join(notes) + "\n\n"
+
+    if "risk_score" not in result:
+        return text
+
     text += "━━━━━━━━━━━━━━━━━━━━\n"
     risk = result.get("risk_score", 0)
     text += f"📊 <b>Риск-скор: {risk}/100</b>\n"
@@ -270,3 +408,15 @@ def format_legal_check(result: dict) -> str:
             text += f"• {factor}\n"
 
     return text
+
+
+def risk_badge(result: dict | None, pending: bool = False) -> str:
+    """Одна строка риска для карточек (отклики, профиль компании).
+
+    result=None: pending — проверка в очереди/идёт, иначе не проверен (ошибка, неверный ИНН).
+    """
+    if result is None:
+        if pending:
+            return "🔍 Проверка контрагента: выполняется…"
+        return "🔍 Проверка контрагента: не проверен (ошибка источников или неверный ИНН)"
+    return f"🔍 Проверка контрагента: {result.get('risk_level', '?')} риск ({result.get('risk_score', 0)}/100)"
@@ -0,0 +1,130 @@
+"""
+Фоновая проверка контрагентов: отклик на груз, просмотр профиля компании.
+
+enqueue(inn) ставит ИНН в очередь и сразу возвращается; settings.legal_precheck_workers
+воркеров прогоняют cached_legal_check(), результат попадает в кэш
+(legal_cache), и в списке откликов грузовладелец видит риск-бейдж без ожидания.
+
+Один ИНН в очереди/работе не больше одного раза: в процессе — множество
+_queued, между инстансами — Redis-замок на время проверки. Свежий кэш
+проверку не запускает (cached_legal_check отдаст его без запросов), а
+запросы к каждому источнику ограничены settings.legal_source_concurrency.
+
+Если ФНС не ответила (ошибка, таймаут), ИНН помечается в Redis на
+FAILED_RETRY секунд: request_legal_check() не ставит его снова на каждый
+просмотр, а карточка показывает «не проверен», а не «выполняется…».
+"""
+
+import asyncio
+
+from src.core.config import settings
+from src.core.logger import logger
+from src.core.redis import get_redis
+from src.core.services.legal_cache import CACHEABLE_STATUSES, cached_legal_check
+
+QUEUE_SIZE = 1000
+FAILED_RETRY = 3600
+_LOCK_KEY = "legal_check:precheck:{}"
+_FAILED_KEY = "legal_check:precheck_failed:{}"
+
+
+def _valid_inn(inn: str | None) -> bool:
+    return bool(inn) and inn.isdigit() and len(inn) in (10, 12)
+
+
+class LegalPrecheckQueue:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._queued: set[str] = set()
+        self._tasks: list[asyncio.Task] = []
+
+    def enqueue(self, inn: str | None) -> bool:
+        """Поставить ИНН на проверку; False — невалиден, уже в очереди или очередь полна."""
+        if not _valid_inn(inn) or inn in self._queued:
+            return False
+        try:
+            self._queue.put_nowait(inn)
+        except asyncio.QueueFull:
+            logger.warning("Legal precheck queue full, dropping %s", inn)
+            return False
+        self._queued.add(inn)
+        return True
+
+    def is_queued(self, inn: str | None) -> bool:
+        return inn in self._queued
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info("Legal precheck started: %d workers", self.workers)
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _worker(self):
+        while True:
+            inn = await self._queue.get()
+            try:
+                await self._check(inn)
+            except Exception as e:
+                logger.error("Legal precheck failed for %s: %s", inn, e)
+            finally:
+                self._queued.discard(inn)
+                self._queue.task_done()
+
+    async def _check(self, inn: str):
+        lock_ttl = int(settings.legal_check_deadline) + 30
+        redis = None
+        try:
+            redis = await get_redis()
+            if not await redis.set(_LOCK_KEY.format(inn), "1", nx=True, ex=lock_ttl):
+                return
+        except Exception as e:
+            logger.warning("Legal precheck lock failed for %s: %s", inn, e)
+            redis = None
+
+        checked = False
+        try:
+            result = await cached_legal_check(inn)
+            checked = result.get("fns", {}).get("status") in CACHEABLE_STATUSES
+            logger.info("Legal precheck %s: risk %s", inn, result.get("risk_score"))
+        finally:
+            if redis is not None:
+                try:
+                    if not checked:
+                        await redis.set(_FAILED_KEY.format(inn), "1", ex=FAILED_RETRY)
+                    await redis.delete(_LOCK_KEY.format(inn))
+                except Exception as e:
+                    logger.warning("Legal precheck unlock failed for %s: %s", inn, e)
+
+
+legal_precheck = LegalPrecheckQueue(settings.legal_precheck_workers)
+
+
+def enqueue_legal_check(inn: str | None) -> bool:
+    return legal_precheck.enqueue(inn)
+
+
+async def request_legal_check(inn: str | None) -> bool:
+    """Для ИНН без результата в кэше: True — проверка в очереди или идёт (бейдж «выполняется…»).
+
+    False — ИНН невалиден или недавняя проверка не удалась (бейдж «не проверен»).
+    """
+    if not _valid_inn(inn):
+        return False
+    if legal_precheck.is_queued(inn):
+        return True
+    try:
+        redis = await get_redis()
+        if await redis.exists(_FAILED_KEY.format(inn)):
+            return False
+        if await redis.exists(_LOCK_KEY.format(inn)):
+            return True  # проверяет другой инстанс
+    except Exception as e:
+        logger.warning("Legal precheck status failed for %s: %s", inn, e)
+    return legal_precheck.enqueue(inn)
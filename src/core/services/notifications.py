@@ -1,66 +1,36 @@
 """
 Push-notification service: rich cargo notifications to route subscribers.
+
+Pipeline for a batch of new cargos:
+1. claim the batch with one ``UPDATE ... SET notified_at WHERE notified_at IS NULL
+   RETURNING id`` — cargos already claimed by the stream consumer, the sweeper
+   or another instance are dropped, so a slow fan-out is never repeated;
+2. match subscribers in the in-memory route index;
+3. bulk-load owners and their company details with one ``IN (...)`` query;
+4. render each notification once per cargo;
+5. send all ``(subscriber, message)`` pairs through the delivery engine.
 """
 
-from sqlalchemy import select, or_
+from datetime import datetime
+
+from sqlalchemy import select, update
 
 from src.core.database import async_session
 from src.core.logger import logger
 from src.core.models import (
     Cargo,
     CompanyDetails,
-    RouteSubscription,
     User,
 )
+from src.core.services.delivery import DeliveryReport, OutboundMessage, delivery
+from src.core.services.route_index import route_index
 
 
-async def notify_subscribers(cargo: Cargo):
-    """Send rich notifications to subscribers matching this cargo's route.
-
-    Sets ``cargo.notified_at`` after successful dispatch.
-    """
-    from src.bot.bot import bot
-    from src.bot.keyboards import notification_kb
-
-    async with async_session() as session:
-        # Find matching subscriptions
-        subs_query = (
-            select(RouteSubscription)
-            .where(RouteSubscription.is_active.is_(True))
-            .where(
-                or_(
-                    RouteSubscription.from_city.is_(None),
-                    RouteSubscription.from_city.ilike(
-                        f"%{cargo.from_city}%"
-                    ),
-                )
-            )
-            .where(
-                or_(
-                    RouteSubscription.to_city.is_(None),
-                    RouteSubscription.to_city.ilike(
-                        f"%{cargo.to_city}%"
-                    ),
-                )
-            )
-        )
-        result = await session.execute(subs_query)
-        subscribers = result.scalars().all()
-
-        if not subscribers:
-            return
-
-        # Owner company rating
-        owner_company = await session.scalar(
-            select(CompanyDetails).where(
-                CompanyDetails.user_id == cargo.owner_id
-            )
-        )
-        owner = await session.scalar(
-            select(User).where(User.id == cargo.owner_id)
-        )
-
-    # Build message
+def render_notification(
+    cargo: Cargo,
+    owner: User | None,
+    owner_company: CompanyDetails | None,
+) -> str:
     text = "🔔 <b>Новый груз по вашему маршруту!</b>\n\n"
     text += f"📍 {cargo.from_city} → {cargo.to_city}\n"
     text += f"📦 {cargo.cargo_type} | {cargo.weight} т\n"
@@ -78,21 +48,91 @@ async def notify_subscribers(cargo: Cargo):
     elif owner:
         text += f"\n👤 {owner.full_name}\n"
 
-    kb = notification_kb(cargo.id)
+    return text
+
+
+async def load_owners(
+    session, owner_ids: set[int]
+) -> dict[int, tuple[User, CompanyDetails | None]]:
+    """Owners with their company details, one query for the whole batch."""
+    if not owner_ids:
+        return {}
+    result = await session.execute(
+        select(User, CompanyDetails)
+        .outerjoin(CompanyDetails, CompanyDetails.user_id == User.id)
+        .where(User.id.in_(owner_ids))
+    )
+    return {user.id: (user, company) for user, company in result.all()}
+
+
+async def notify_cargos(cargos: list[Cargo]) -> DeliveryReport:
+    """Claim a batch of new cargos (``notified_at``) and notify their subscribers."""
+    from src.bot.keyboards import notification_kb
+
+    if not cargos:
+        return DeliveryReport()
+
+    now = datetime.utcnow()
+    async with async_session() as session:
+        result = await session.execute(
+            update(Cargo)
+            .where(Cargo.id.in_([c.id for c in cargos]))
+            .where(Cargo.notified_at.is_(None))
+            .values(notified_at=now)
+            .returning(Cargo.id)
+        )
+        claimed = set(result.scalars().all())
+        await session.commit()
+    for cargo in cargos:
+        if cargo.id in claimed:
+            cargo.notified_at = now
+    cargos = [c for c in cargos if c.id in claimed]
+    if not cargos:
+        return DeliveryReport()
+
+    if not route_index.loaded:
+        async with async_session() as session:
+            await route_index.load(session)
 
-    sent = 0
-    for sub in subscribers:
-        if sub.user_id == cargo.owner_id:
+    recipients: dict[int, set[int]] = {}
+    for cargo in cargos:
+        subscribers = route_index.match(
+            cargo.from_city, cargo.to_city, cargo.from_city_id, cargo.to_city_id
+        )
+        subscribers.discard(cargo.owner_id)
+        if subscribers:
+            recipients[cargo.id] = subscribers
+
+    owners: dict[int, tuple[User, CompanyDetails | None]] = {}
+    if recipients:
+        owner_ids = {c.owner_id for c in cargos if c.id in recipients}
+        async with async_session() as session:
+            owners = await load_owners(session, owner_ids)
+
+    messages: list[OutboundMessage] = []
+    for cargo in cargos:
+        subscribers = recipients.get(cargo.id)
+        if not subscribers:
             continue
-        try:
-            await bot.send_message(sub.user_id, text, reply_markup=kb)
-            sent += 1
-        except Exception:
-            pass
+        owner, owner_company = owners.get(cargo.owner_id, (None, None))
+        text = render_notification(cargo, owner, owner_company)
+        kb = notification_kb(cargo.id)
+        messages.extend(
+            OutboundMessage(chat_id=user_id, text=text, reply_markup=kb, key=f"{cargo.id}:{user_id}")
+            for user_id in subscribers
+        )
+
+    report = await delivery.send_many(messages, kind="notification")
 
     logger.info(
-        "Notified %d/%d subscribers for cargo #%d",
-        sent,
-        len(subscribers),
-        cargo.id,
+        "Notified subscribers for %d cargos (%d with matches): %s",
+        len(cargos),
+        len(recipients),
+        report,
     )
+    return report
+
+
+async def notify_subscribers(cargo: Cargo) -> DeliveryReport:
+    """Claim a single cargo and send its rich notifications."""
+    return await notify_cargos([cargo])
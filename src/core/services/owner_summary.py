@@ -0,0 +1,125 @@
+"""
+Сводка по владельцу груза для карточки груза.
+
+Имя, телефон, верификация, компания с 10-балльным рейтингом, средняя оценка
+и число оценок — одним запросом (User + UserProfile + CompanyDetails +
+UserStats) и кэш в Redis на OWNER_SUMMARY_TTL.
+
+Кэш сбрасывается явно (invalidate_owner_summary) при новой оценке, смене
+профиля/верификации/телефона и пересчёте рейтинга компании.
+"""
+
+import json
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import select
+
+from src.core.logger import logger
+from src.core.models import CompanyDetails, User, UserProfile, UserStats, VerificationStatus
+from src.core.redis import get_redis
+
+OWNER_SUMMARY_TTL = 3600
+_KEY = "owner_summary:{}"
+
+_VERIFICATION_LABELS = {
+    VerificationStatus.VERIFIED.value: "верифицирован",
+    VerificationStatus.CONFIRMED.value: "подтверждён",
+}
+
+
+def verification_label(status: VerificationStatus | str | None) -> str:
+    """Подпись верификации для карточек (груз, отклики, профиль)."""
+    if isinstance(status, VerificationStatus):
+        status = status.value
+    return _VERIFICATION_LABELS.get(status, "обычный")
+
+
+@dataclass
+class OwnerSummary:
+    user_id: int
+    full_name: str | None = None
+    phone: str | None = None
+    company: str | None = None  # users.company — название из онбординга
+    verification: str | None = None  # VerificationStatus.value
+    company_id: int | None = None  # company_details.id
+    company_name: str | None = None
+    total_rating: int | None = None  # 0..10, None — компания не зарегистрирована
+    avg_rating: float | None = None
+    rating_count: int = 0
+
+    @property
+    def display_name(self) -> str:
+        return self.full_name or str(self.user_id)
+
+    @property
+    def verification_label(self) -> str:
+        return verification_label(self.verification)
+
+
+async def load_owner_summary(session, user_id: int) -> OwnerSummary | None:
+    """Сводка из БД одним запросом; None — пользователя нет."""
+    row = (
+        await session.execute(
+            select(
+                User,
+                UserProfile.verification_status,
+                CompanyDetails,
+                UserStats,
+            )
+            .outerjoin(UserProfile, UserProfile.user_id == User.id)
+            .outerjoin(CompanyDetails, CompanyDetails.user_id == User.id)
+            .outerjoin(UserStats, UserStats.user_id == User.id)
+            .where(User.id == user_id)
+        )
+    ).first()
+    if not row:
+        return None
+
+    user, verification, company, stats = row
+    return OwnerSummary(
+        user_id=user.id,
+        full_name=user.full_name,
+        phone=user.phone,
+        company=user.company,
+        verification=verification.value if verification else None,
+        company_id=company.id if company else None,
+        company_name=company.company_name if company else None,
+        total_rating=company.total_rating if company else None,
+        avg_rating=stats.avg_rating if stats else None,
+        rating_count=stats.rating_count if stats else 0,
+    )
+
+
+async def get_owner_summary(session, user_id: int) -> OwnerSummary | None:
+    """Сводка из Redis, при промахе — из БД с записью в кэш."""
+    key = _KEY.format(user_id)
+    try:
+        redis = await get_redis()
+        cached = await redis.get(key)
+        if cached:
+            return OwnerSummary(**json.loads(cached))
+    except Exception as e:
+        logger.warning("Owner summary cache read failed for %s: %s", user_id, e)
+        redis = None
+
+    summary = await load_owner_summary(session, user_id)
+    if summary and redis is not None:
+        try:
+            await redis.set(
+                key, json.dumps(asdict(summary), ensure_ascii=False), ex=OWNER_SUMMARY_TTL
+            )
+        except Exception as e:
+            logger.warning("Owner summary cache write failed for %s: %s", user_id, e)
+    return summary
+
+
+async def invalidate_owner_summary(*user_ids: int | None):
+    """Сбросить кэш сводки; вызывать после commit изменений."""
+    keys = [_KEY.format(uid) for uid in user_ids if uid]
+    if not keys:
+        return
+    try:
+        redis = await get_redis()
+        await redis.delete(*keys)
+    except Exception as e:
+        logger.warning("Owner summary invalidation failed for %s: %s", user_ids, e)
@@ -0,0 +1,126 @@
+"""
+Справочник рыночных цен (market_prices) в памяти процесса.
+
+Ключ — (city_key откуда, city_key куда, тип кузова по первым трём буквам:
+«тентованный» -> «тен», как прежний ilike). lookup() ищет прямое направление,
+затем обратное — оценка цены не ходит в БД.
+
+Таблица маленькая и меняется редко: книга строится на старте (load),
+перечитывается по расписанию (market_prices_refresh_job) и сразу после
+изменения цен в любом процессе — через Redis pub/sub
+(publish_market_prices_changed / price_book_listener).
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import select
+
+from src.core.cities import city_key
+from src.core.logger import logger
+from src.core.models import MarketPrice
+from src.core.redis import get_redis
+
+CHANNEL = "market_prices:changed"
+DEFAULT_CARGO_TYPE = "тент"
+
+PriceKey = tuple[str | None, str | None, str]
+
+
+def cargo_type_key(cargo_type: str | None) -> str:
+    return (cargo_type or DEFAULT_CARGO_TYPE).strip().lower()[:3]
+
+
+@dataclass(frozen=True)
+class MarketQuote:
+    price: int
+    weight: float
+    cargo_type: str
+    source: str
+    updated_at: datetime
+
+
+class PriceBook:
+    def __init__(self):
+        self._quotes: dict[PriceKey, MarketQuote] = {}
+        self.loaded = False
+        self.loaded_at: datetime | None = None
+
+    def __len__(self) -> int:
+        return len(self._quotes)
+
+    def lookup(self, from_city: str, to_city: str, cargo_type: str | None = None) -> MarketQuote | None:
+        """Цена маршрута (или обратного) для типа кузова; None — нет данных."""
+        f, t = city_key(from_city), city_key(to_city)
+        kind = cargo_type_key(cargo_type)
+        return self._quotes.get((f, t, kind)) or self._quotes.get((t, f, kind))
+
+    async def load(self, session):
+        """Полная перестройка книги по market_prices."""
+        result = await session.execute(select(MarketPrice))
+        quotes: dict[PriceKey, MarketQuote] = {}
+        for row in result.scalars().all():
+            key = (city_key(row.from_city), city_key(row.to_city), cargo_type_key(row.cargo_type))
+            quotes[key] = MarketQuote(
+                price=row.price,
+                weight=row.weight or 20.0,
+                cargo_type=row.cargo_type,
+                source=row.source,
+                updated_at=row.updated_at,
+            )
+        self._quotes = quotes
+        self.loaded = True
+        self.loaded_at = datetime.utcnow()
+        logger.info("Price book loaded: %d routes", len(self))
+
+    async def ensure_loaded(self):
+        if self.loaded:
+            return
+        from src.core.database import async_session
+
+        async with async_session() as session:
+            await self.load(session)
+
+
+price_book = PriceBook()
+
+
+async def reload_price_book():
+    from src.core.database import async_session
+
+    async with async_session() as session:
+        await price_book.load(session)
+
+
+async def publish_market_prices_changed():
+    """Сообщить всем процессам, что market_prices изменились."""
+    try:
+        redis = await get_redis()
+        await redis.publish(CHANNEL, "reload")
+    except Exception as e:
+        logger.warning("Price book invalidation publish failed: %s", e)
+
+
+async def price_book_listener():
+    """Фоновая подписка на CHANNEL: перечитать книгу по сообщению."""
+    while True:
+        pubsub = None
+        try:
+            redis = await get_redis()
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(CHANNEL)
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    await reload_price_book()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Price book listener error: %s", e)
+            await asyncio.sleep(5)
+        finally:
+            if pubsub is not None:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
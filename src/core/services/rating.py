@@ -1,66 +1,142 @@
-from datetime import datetime
-from sqlalchemy import select, func, or_
-from src.core.models import CompanyDetails, Cargo, CargoStatus, Claim, ClaimStatus
+"""
+Рейтинг компаний (10-балльная система, см. CompanyDetails).
 
+Счётчики company_details.deals_completed / open_claims / resolved_claims
+меняются по событиям (завершение груза, подача и смена статуса претензии)
+одним UPDATE, в нём же пересчитываются rating_deals_completed и
+rating_no_claims. Ночной recalculate_all_ratings() сверяет счётчики
+с cargos/claims для всех компаний одним сгруппированным запросом.
 
-async def recalculate_rating(session, company_id: int):
-    """Пересчитывает рейтинг компании"""
-    company = await session.scalar(
-        select(CompanyDetails).where(CompanyDetails.id == company_id)
+Функции событий не делают commit — изменения идут в транзакции вызывающего.
+После commit нужно сбросить кэш сводки (invalidate_owner_summary).
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, select, union_all, update
+from sqlalchemy.orm import aliased
+
+from src.core.models import Cargo, CargoStatus, Claim, ClaimStatus, CompanyDetails
+from src.core.services.owner_summary import invalidate_owner_summary
+
+
+def _deals_points(deals):
+    """10+ сделок = +1, 50+ = +2."""
+    return case((deals >= 50, 2), (deals >= 10, 1), else_=0)
+
+
+def _claims_points(open_claims, resolved_claims):
+    """Нет претензий = +1, только решённые = 0, открытые = -1 за каждую (макс -2)."""
+    return case(
+        (open_claims > 0, -func.least(open_claims, 2)),
+        (resolved_claims > 0, 0),
+        else_=1,
     )
-    if not company:
+
+
+async def on_cargo_completed(session, cargo: Cargo):
+    """Груз завершён: +1 сделка компаниям заказчика и перевозчика."""
+    user_ids = {cargo.owner_id, cargo.carrier_id} - {None}
+    deals = CompanyDetails.deals_completed + 1
+    await session.execute(
+        update(CompanyDetails)
+        .where(CompanyDetails.user_id.in_(user_ids))
+        .values(deals_completed=deals, rating_deals_completed=_deals_points(deals))
+    )
+
+
+async def on_claim_status_changed(
+    session,
+    to_company_id: int | None,
+    old_status: ClaimStatus | None,
+    new_status: ClaimStatus,
+):
+    """Претензия подана (old_status=None) или сменила статус."""
+    if not to_company_id or old_status == new_status:
         return
+    open_delta = int(new_status == ClaimStatus.OPEN) - int(old_status == ClaimStatus.OPEN)
+    resolved_delta = int(new_status == ClaimStatus.RESOLVED) - int(old_status == ClaimStatus.RESOLVED)
+    open_claims = func.greatest(CompanyDetails.open_claims + open_delta, 0)
+    resolved_claims = func.greatest(CompanyDetails.resolved_claims + resolved_delta, 0)
+    await session.execute(
+        update(CompanyDetails)
+        .where(CompanyDetails.id == to_company_id)
+        .values(
+            open_claims=open_claims,
+            resolved_claims=resolved_claims,
+            rating_no_claims=_claims_points(open_claims, resolved_claims),
+        )
+    )
 
-    # Опыт > 1 года
-    if company.registered_at:
-        days = (datetime.utcnow() - company.registered_at).days
-        company.rating_experience = 1 if days > 365 else 0
-
-    # Завершённые сделки
-    deals = await session.scalar(
-        select(func.count())
-        .select_from(Cargo)
-        .where(
-            or_(
-                Cargo.owner_id == company.user_id,
-                Cargo.carrier_id == company.user_id,
-            ),
-            Cargo.status == CargoStatus.COMPLETED,
+
+async def on_claim_opened(session, to_company_id: int | None):
+    await on_claim_status_changed(session, to_company_id, None, ClaimStatus.OPEN)
+
+
+async def recalculate_all_ratings(session, company_id: int | None = None) -> int:
+    """Полный пересчёт счётчиков и баллов одним UPDATE ... FROM; commit внутри."""
+    completed = Cargo.status == CargoStatus.COMPLETED
+    participants = union_all(
+        select(Cargo.owner_id.label("user_id")).where(completed),
+        select(Cargo.carrier_id).where(
+            completed,
+            Cargo.carrier_id.is_not(None),
+            Cargo.carrier_id != Cargo.owner_id,
+        ),
+    ).subquery()
+    deals = (
+        select(participants.c.user_id, func.count().label("n"))
+        .group_by(participants.c.user_id)
+        .subquery()
+    )
+    claims = (
+        select(
+            Claim.to_company_id,
+            func.count().filter(Claim.status == ClaimStatus.OPEN).label("open"),
+            func.count().filter(Claim.status == ClaimStatus.RESOLVED).label("resolved"),
         )
+        .where(Claim.to_company_id.is_not(None))
+        .group_by(Claim.to_company_id)
+        .subquery()
     )
-    deals = deals or 0
-    if deals >= 50:
-        company.rating_deals_completed = 2
-    elif deals >= 10:
-        company.rating_deals_completed = 1
-    else:
-        company.rating_deals_completed = 0
-
-    # Претензии
-    open_claims = await session.scalar(
-        select(func.count())
-        .select_from(Claim)
-        .where(
-            Claim.to_company_id == company_id,
-            Claim.status == ClaimStatus.OPEN,
+    company = aliased(CompanyDetails)
+    stats = (
+        select(
+            company.id,
+            func.coalesce(deals.c.n, 0).label("deals"),
+            func.coalesce(claims.c.open, 0).label("open"),
+            func.coalesce(claims.c.resolved, 0).label("resolved"),
         )
+        .outerjoin(deals, deals.c.user_id == company.user_id)
+        .outerjoin(claims, claims.c.to_company_id == company.id)
     )
-    resolved_claims = await session.scalar(
-        select(func.count())
-        .select_from(Claim)
-        .where(
-            Claim.to_company_id == company_id,
-            Claim.status == ClaimStatus.RESOLVED,
+    if company_id is not None:
+        stats = stats.where(company.id == company_id)
+    stats = stats.subquery()
+
+    experienced_before = datetime.utcnow() - timedelta(days=365)
+    result = await session.execute(
+        update(CompanyDetails)
+        .where(CompanyDetails.id == stats.c.id)
+        .values(
+            deals_completed=stats.c.deals,
+            open_claims=stats.c.open,
+            resolved_claims=stats.c.resolved,
+            rating_deals_completed=_deals_points(stats.c.deals),
+            rating_no_claims=_claims_points(stats.c.open, stats.c.resolved),
+            rating_experience=case(
+                (CompanyDetails.registered_at < experienced_before, 1), else_=0
+            ),
         )
+        .returning(CompanyDetails.user_id)
+        .execution_options(synchronize_session=False)
     )
+    user_ids = result.scalars().all()
+    await session.commit()
+    await invalidate_owner_summary(*user_ids)
+    return len(user_ids)
 
-    open_claims = open_claims or 0
-    resolved_claims = resolved_claims or 0
-    if open_claims == 0 and resolved_claims == 0:
-        company.rating_no_claims = 1
-    elif open_claims > 0:
-        company.rating_no_claims = -1 * min(2, open_claims)
-    else:
-        company.rating_no_claims = 0
 
-    await session.commit()
+async def recalculate_rating(session, company_id: int):
+    """Пересчитывает рейтинг компании"""
+    await recalculate_all_ratings(session, company_id)
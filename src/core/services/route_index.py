@@ -0,0 +1,89 @@
+"""
+Инвертированный индекс подписок на маршруты для push-уведомлений.
+
+Ключ — (откуда, куда): ID города из справочника либо city_key() для неизвестных,
+None — «любой город». Подбор подписчиков на груз — 4 lookup'а по словарю
+вместо ilike-сканирования route_subscriptions.
+
+Индекс живёт в памяти процесса: строится на старте (load) и обновляется
+при добавлении/удалении подписки в src/bot/handlers/search.py.
+"""
+
+from sqlalchemy import select
+
+from src.core.cities import city_key
+from src.core.logger import logger
+from src.core.models import RouteSubscription
+
+RouteKey = int | str | None
+
+
+def route_key(city: str | None, city_id: int | None = None) -> RouteKey:
+    """Ключ стороны маршрута: ID из справочника, иначе нормализованное название."""
+    if city_id is not None:
+        return city_id
+    return city_key(city)
+
+
+class RouteIndex:
+    def __init__(self):
+        self._buckets: dict[tuple[RouteKey, RouteKey], dict[int, int]] = {}
+        self._by_sub: dict[int, tuple[RouteKey, RouteKey]] = {}
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._by_sub)
+
+    def add(self, sub: RouteSubscription):
+        """Добавить (или переиндексировать) активную подписку."""
+        self.remove(sub.id)
+        if not sub.is_active:
+            return
+        key = (
+            route_key(sub.from_city, sub.from_city_id),
+            route_key(sub.to_city, sub.to_city_id),
+        )
+        self._buckets.setdefault(key, {})[sub.id] = sub.user_id
+        self._by_sub[sub.id] = key
+
+    def remove(self, sub_id: int):
+        key = self._by_sub.pop(sub_id, None)
+        if key is None:
+            return
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket.pop(sub_id, None)
+            if not bucket:
+                del self._buckets[key]
+
+    def match(
+        self,
+        from_city: str | None,
+        to_city: str | None,
+        from_city_id: int | None = None,
+        to_city_id: int | None = None,
+    ) -> set[int]:
+        """user_id подписчиков маршрута, включая подписки «любой город»."""
+        f = route_key(from_city, from_city_id)
+        t = route_key(to_city, to_city_id)
+        users: set[int] = set()
+        for key in {(f, t), (f, None), (None, t), (None, None)}:
+            bucket = self._buckets.get(key)
+            if bucket:
+                users.update(bucket.values())
+        return users
+
+    async def load(self, session):
+        """Полная перестройка индекса по активным подпискам."""
+        result = await session.execute(
+            select(RouteSubscription).where(RouteSubscription.is_active.is_(True))
+        )
+        self._buckets.clear()
+        self._by_sub.clear()
+        for sub in result.scalars().all():
+            self.add(sub)
+        self.loaded = True
+        logger.info("Route index loaded: %d subscriptions", len(self))
+
+
+route_index = RouteIndex()
@@ -0,0 +1,154 @@
+"""
+Статистика цен по маршрутам из наших завершённых сделок.
+
+rebuild_route_stats() одним сгруппированным запросом считает по
+(откуда, куда, тип кузова) перцентили p25/p50/p75 цены сделки и ₽/т
+(percentile_cont в Postgres), расстояния маршрутов — одним векторным
+вызовом газеттира; ₽/км = перцентиль цены / расстояние (расстояние
+внутри маршрута постоянно). Таблица route_price_stats пересобирается
+целиком в одной транзакции.
+
+Для оценки цены (estimate_price_smart) статистика держится в памяти:
+route_stats.lookup() без запросов в БД; перечитывается после пересборки
+и на старте.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select
+
+from src.core.cities import city_key
+from src.core.geo import route_distances_km
+from src.core.logger import logger
+from src.core.models import Cargo, CargoStatus, RoutePriceStats
+from src.core.services.price_book import cargo_type_key
+
+WINDOW_DAYS = 365
+MIN_DEALS = 3  # меньше сделок — статистике не доверяем
+
+
+@dataclass(frozen=True)
+class RouteQuote:
+    deals: int
+    weight_p50: float
+    price_p25: int
+    price_p50: int
+    price_p75: int
+    per_ton_p25: float
+    per_ton_p50: float
+    per_ton_p75: float
+    per_km_p50: float | None
+
+
+def _percentiles(expr):
+    return [func.percentile_cont(q).within_group(expr) for q in (0.25, 0.5, 0.75)]
+
+
+async def rebuild_route_stats(session, window_days: int = WINDOW_DAYS) -> int:
+    """Пересобрать route_price_stats по завершённым грузам за window_days; commit внутри."""
+    price = func.coalesce(Cargo.actual_price, Cargo.price)
+    type_key = func.left(func.lower(func.trim(Cargo.cargo_type)), 3)
+    since = datetime.utcnow() - timedelta(days=window_days)
+
+    result = await session.execute(
+        select(
+            Cargo.from_city_norm,
+            Cargo.to_city_norm,
+            type_key.label("type_key"),
+            func.count().label("deals"),
+            func.percentile_cont(0.5).within_group(Cargo.weight).label("weight_p50"),
+            *_percentiles(price),
+            *_percentiles(price / Cargo.weight),
+        )
+        .where(
+            Cargo.status == CargoStatus.COMPLETED,
+            Cargo.created_at >= since,
+            Cargo.from_city_norm.is_not(None),
+            Cargo.to_city_norm.is_not(None),
+            Cargo.weight > 0,
+            price > 0,
+        )
+        .group_by(Cargo.from_city_norm, Cargo.to_city_norm, type_key)
+    )
+    groups = result.all()
+    distances = route_distances_km([g[0] for g in groups], [g[1] for g in groups])
+
+    now = datetime.utcnow()
+    rows = []
+    for g, distance in zip(groups, distances):
+        from_key, to_key, kind, deals, weight_p50, p25, p50, p75, t25, t50, t75 = g
+        per_km = [p / distance for p in (p25, p50, p75)] if distance and distance >= 1 else [None] * 3
+        rows.append({
+            "from_key": from_key,
+            "to_key": to_key,
+            "cargo_type_key": kind or "",
+            "deals": deals,
+            "weight_p50": weight_p50,
+            "price_p25": int(p25),
+            "price_p50": int(p50),
+            "price_p75": int(p75),
+            "per_ton_p25": t25,
+            "per_ton_p50": t50,
+            "per_ton_p75": t75,
+            "distance_km": distance,
+            "per_km_p25": per_km[0],
+            "per_km_p50": per_km[1],
+            "per_km_p75": per_km[2],
+            "updated_at": now,
+        })
+
+    await session.execute(delete(RoutePriceStats))
+    if rows:
+        await session.execute(insert(RoutePriceStats), rows)
+    await session.commit()
+    return len(rows)
+
+
+class RouteStatsBook:
+    def __init__(self):
+        self._quotes: dict[tuple[str, str, str], RouteQuote] = {}
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._quotes)
+
+    def lookup(self, from_city: str, to_city: str, cargo_type: str | None = None) -> RouteQuote | None:
+        """Статистика маршрута (или обратного), если сделок не меньше MIN_DEALS."""
+        f, t = city_key(from_city), city_key(to_city)
+        kind = cargo_type_key(cargo_type)
+        return self._quotes.get((f, t, kind)) or self._quotes.get((t, f, kind))
+
+    async def load(self, session):
+        result = await session.execute(
+            select(RoutePriceStats).where(RoutePriceStats.deals >= MIN_DEALS)
+        )
+        self._quotes = {
+            (row.from_key, row.to_key, row.cargo_type_key): RouteQuote(
+                deals=row.deals,
+                weight_p50=row.weight_p50,
+                price_p25=row.price_p25,
+                price_p50=row.price_p50,
+                price_p75=row.price_p75,
+                per_ton_p25=row.per_ton_p25,
+                per_ton_p50=row.per_ton_p50,
+                per_ton_p75=row.per_ton_p75,
+                per_km_p50=row.per_km_p50,
+            )
+            for row in result.scalars().all()
+        }
+        self.loaded = True
+        logger.info("Route stats loaded: %d routes", len(self))
+
+
+route_stats = RouteStatsBook()
+
+
+async def refresh_route_stats(rebuild: bool = True) -> int:
+    """Пересобрать таблицу (rebuild=True) и перечитать статистику в память."""
+    from src.core.database import async_session
+
+    async with async_session() as session:
+        rebuilt = await rebuild_route_stats(session) if rebuild else 0
+        await route_stats.load(session)
+    return rebuilt
@@ -0,0 +1,50 @@
+"""
+Материализованные агрегаты оценок (user_stats).
+
+rating_sum/rating_count обновляются в той же транзакции, что и вставка
+Rating (record_rating), поэтому экраны профиля, карточки груза и админки
+читают готовое значение вместо avg/count по таблице ratings.
+Начальное заполнение — migrations/013_user_stats.sql.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from src.core.models import Rating, UserStats
+
+
+async def record_rating(session, rating: Rating):
+    """Добавить оценку и обновить агрегаты получателя; commit — за вызывающим."""
+    session.add(rating)
+    stmt = insert(UserStats).values(
+        user_id=rating.to_user_id,
+        rating_sum=rating.score,
+        rating_count=1,
+        updated_at=datetime.utcnow(),
+    )
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UserStats.user_id],
+            set_={
+                "rating_sum": UserStats.rating_sum + stmt.excluded.rating_sum,
+                "rating_count": UserStats.rating_count + stmt.excluded.rating_count,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+    )
+
+
+async def get_user_stats(session, user_id: int) -> UserStats:
+    """Агрегаты пользователя; пустые, если оценок ещё нет."""
+    stats = await session.scalar(select(UserStats).where(UserStats.user_id == user_id))
+    return stats or UserStats(user_id=user_id, rating_sum=0, rating_count=0)
+
+
+async def get_users_stats(session, user_ids) -> dict[int, UserStats]:
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    result = await session.execute(select(UserStats).where(UserStats.user_id.in_(user_ids)))
+    return {stats.user_id: stats for stats in result.scalars().all()}
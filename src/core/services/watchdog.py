@@ -5,9 +5,8 @@ Watchdog агент: мониторинг здоровья бота, автоп
 import asyncio
 from datetime import datetime
 
-import httpx
-
 from src.core.config import settings
+from src.core.http import get_http_client
 from src.core.logger import logger
 
 
@@ -70,16 +69,17 @@ class BotWatchdog:
 
         # Telegram API
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                resp = await client.get(
-                    f"https://api.telegram.org/bot{settings.bot_token}/getMe"
+            client = get_http_client("watchdog")
+            resp = await client.get(
+                f"https://api.telegram.org/bot{settings.bot_token}/getMe",
+                timeout=10,
+            )
+            if resp.status_code == 200:
+                results["checks"]["telegram"] = "✅ OK"
+            else:
+                results["checks"]["telegram"] = (
+                    f"⚠️ Status {resp.status_code}"
                 )
-                if resp.status_code == 200:
-                    results["checks"]["telegram"] = "✅ OK"
-                else:
-                    results["checks"]["telegram"] = (
-                        f"⚠️ Status {resp.status_code}"
-                    )
         except Exception as e:
             results["checks"]["telegram"] = f"❌ Error: {e}"
 
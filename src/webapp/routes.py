@@ -14,6 +14,7 @@ from src.core.models import (
     Claim,
     ClaimStatus,
 )
+from src.core.services.cargo_search import search_cargos_page
 from src.webapp.auth import validate_init_data
 
 router = APIRouter(tags=["webapp"])
@@ -55,29 +56,23 @@ async def webapp_cargos(
     min_weight: float | None = None,
     max_weight: float | None = None,
     limit: int = 30,
+    cursor: str | None = None,
 ):
-    """List active cargos with optional filters."""
+    """List active cargos with optional filters.
+
+    Keyset-paginated: pass ``next_cursor`` from the previous response as ``cursor``.
+    """
     async with async_session() as session:
-        query = (
-            select(Cargo)
-            .where(Cargo.status == CargoStatus.NEW)
-            .order_by(Cargo.created_at.desc())
+        page = await search_cargos_page(
+            session,
+            cursor=cursor,
+            from_city=from_city,
+            to_city=to_city,
+            min_weight=min_weight,
+            max_weight=max_weight,
+            limit=max(1, min(limit, 50)),
         )
-        if from_city:
-            query = query.where(
-                Cargo.from_city.ilike(f"%{from_city}%")
-            )
-        if to_city:
-            query = query.where(
-                Cargo.to_city.ilike(f"%{to_city}%")
-            )
-        if min_weight is not None:
-            query = query.where(Cargo.weight >= min_weight)
-        if max_weight is not None:
-            query = query.where(Cargo.weight <= max_weight)
-
-        result = await session.execute(query.limit(min(limit, 50)))
-        cargos = result.scalars().all()
+        cargos = page.items
 
         items = []
         for c in cargos:
@@ -96,7 +91,7 @@ async def webapp_cargos(
                 "created_at": c.created_at.isoformat(),
             })
 
-    return {"cargos": items, "count": len(items)}
+    return {"cargos": items, "count": len(items), "next_cursor": page.next_cursor}
 
 
 @router.get("/api/webapp/cargo/{cargo_id}")